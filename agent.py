@@ -1,4 +1,5 @@
 from chess.board import Board
+from chess import utils
 import random
 
 class Agent:
@@ -14,8 +15,8 @@ class Agent:
             move = random.choice(legal_moves)
             self.board.make_move(move)
 
-            duck_moves = self.board.generate_moves()
-            duck = random.choice(duck_moves)
+            duck_squares = utils.get_squares(self.board.duck_targets())
+            duck = self.board.duck_move(random.choice(duck_squares))
             self.board.unmake_move()
 
             return (None, move, duck)
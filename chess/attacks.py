@@ -0,0 +1,140 @@
+""" Table-driven sliding piece attacks. For each square, every subset of the
+    relevant occupancy (the squares that can block a slider, excluding the
+    board edges) is mapped to its attack set, so finding a bishop or rook's
+    attacks is a single lookup. See https://www.chessprogramming.org/Magic_Bitboards
+    for the general idea - Python dicts take the place of the magic hashing.
+"""
+from . import consts
+from . import squares
+from . import tables
+from . import utils
+from .pieces import PieceType
+from .sides import Side
+
+_ROOK_DIRECTIONS = (8, 1, -8, -1)
+_BISHOP_DIRECTIONS = (9, 7, -7, -9)
+
+def _relevant_mask(idx: int, directions: tuple):
+    """ Returns the relevant occupancy mask for a slider on the given
+        square, i.e., its rays with the final (edge) square of each removed.
+    """
+    result = consts.EMPTY
+    for direction in directions:
+        ray = tables.RAYS[direction][idx]
+        if not ray:
+            continue
+        edge = ray.bit_length() - 1 if direction > 0 else ((ray & -ray) - 1).bit_count()
+        result |= ray ^ squares.masks[edge]
+    return result
+
+def _ray_attacks(idx: int, occupation: int, directions: tuple):
+    """ Calculates slider attacks the slow way, by walking each ray up to
+        and including the first blocker. Only used to build the tables.
+    """
+    result = consts.EMPTY
+    for direction in directions:
+        ray = tables.RAYS[direction][idx]
+        blockers = ray & occupation
+        if blockers:
+            blocker = \
+                ((blockers & -blockers) - 1).bit_count() if direction > 0 \
+                else blockers.bit_length() - 1
+            ray ^= tables.RAYS[direction][blocker]
+        result |= ray
+    return result
+
+def _generate_attack_table(directions: tuple):
+    """ Builds the relevant occupancy masks and attack lookups for a slider
+        moving in the given directions. Subsets of each mask are enumerated
+        with the Carry-Rippler trick.
+    """
+    masks = []
+    lookups = []
+    for idx in range(64):
+        mask = _relevant_mask(idx, directions)
+        lookup = {}
+        subset = consts.EMPTY
+        while True:
+            lookup[subset] = _ray_attacks(idx, subset, directions)
+            subset = (subset - mask) & mask
+            if subset == consts.EMPTY:
+                break
+        masks.append(mask)
+        lookups.append(lookup)
+    return masks, lookups
+
+BISHOP_MASKS, BISHOP_ATTACKS = _generate_attack_table(_BISHOP_DIRECTIONS)
+ROOK_MASKS, ROOK_ATTACKS = _generate_attack_table(_ROOK_DIRECTIONS)
+
+def bishop_attacks(idx: int, occupation: int):
+    """ Returns the squares attacked by a bishop on the given square index,
+        taking into account board occupation. Blocking pieces are included.
+    """
+    return BISHOP_ATTACKS[idx][occupation & BISHOP_MASKS[idx]]
+
+def rook_attacks(idx: int, occupation: int):
+    """ Returns the squares attacked by a rook on the given square index,
+        taking into account board occupation. Blocking pieces are included.
+    """
+    return ROOK_ATTACKS[idx][occupation & ROOK_MASKS[idx]]
+
+def queen_attacks(idx: int, occupation: int):
+    """ Returns the squares attacked by a queen on the given square index,
+        taking into account board occupation. Blocking pieces are included.
+    """
+    return BISHOP_ATTACKS[idx][occupation & BISHOP_MASKS[idx]] \
+         | ROOK_ATTACKS[idx][occupation & ROOK_MASKS[idx]]
+
+# Set-wise attacks - each of these returns the union of the squares attacked
+# by every piece in origins, so whole piece sets can be handled at once.
+def pawn_attacks(origins: int, side: Side):
+    """ Returns the squares attacked by the given pawns.
+    """
+    if side == Side.WHITE:
+        return utils.nwest(origins) | utils.neast(origins)
+    return utils.swest(origins) | utils.seast(origins)
+
+def knight_attacks(origins: int):
+    """ Returns the squares attacked by the given knights.
+    """
+    east = utils.east(origins)
+    west = utils.west(origins)
+    east_two = utils.east(east)
+    west_two = utils.west(west)
+    return utils.north(east | west, 2) | utils.south(east | west, 2) \
+         | utils.north(east_two | west_two) | utils.south(east_two | west_two)
+
+def king_attacks(origins: int):
+    """ Returns the squares attacked by the given kings.
+    """
+    flanks = utils.east(origins) | utils.west(origins)
+    row = flanks | origins
+    return flanks | utils.north(row) | utils.south(row)
+
+def _sliding_set_attacks(origins: int, occupation: int, lookup):
+    """ Unions the single-square slider lookup over every origin square.
+    """
+    result = consts.EMPTY
+    while origins:
+        origin = origins & -origins
+        result |= lookup(origin.bit_length() - 1, occupation)
+        origins ^= origin
+    return result
+
+def piece_attacks(piece: PieceType, origins: int, occupation: int, side: Side):
+    """ Returns the squares attacked by a set of pieces of the given type
+        and side, taking into account board occupation.
+    """
+    if piece == PieceType.PAWN:
+        return pawn_attacks(origins, side)
+    elif piece == PieceType.KNIGHT:
+        return knight_attacks(origins)
+    elif piece == PieceType.BISHOP:
+        return _sliding_set_attacks(origins, occupation, bishop_attacks)
+    elif piece == PieceType.ROOK:
+        return _sliding_set_attacks(origins, occupation, rook_attacks)
+    elif piece == PieceType.QUEEN:
+        return _sliding_set_attacks(origins, occupation, queen_attacks)
+    elif piece == PieceType.KING:
+        return king_attacks(origins)
+    return consts.EMPTY
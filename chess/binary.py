@@ -0,0 +1,283 @@
+""" Vectorised binary position codec, for storing and shipping many
+    positions at once. Records use the fixed-width layout of Board.to_bytes,
+    so an (N, POSITION_SIZE) uint8 array is interchangeable with N encoded
+    boards written back to back (e.g., with records.tobytes()).
+
+    share_boards packs many boards into one shared memory block, so they can
+    be handed to worker processes by name and read without copying. Boards
+    can also be exported to (and rebuilt from) (N, 16) uint64 arrays of
+    bitboards, for vectorised analysis (see boards_to_array).
+"""
+from .board import (
+    Board, BYTE_TURNS, POSITION_SIZE, POSITION_PIECE_CODES,
+    WHITE_INDEX, OCCUPIED_INDEX, BLACK_INDEX, DUCK_INDEX, _INDEX_PIECES, _check_encodable
+)
+from .cache import MoveCache
+from .pieces import Piece, PIECE_INDEX
+from .sides import Side
+from .zobrist import zbr_position
+from . import squares
+
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator
+
+_SQUARE_MASKS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+# Castling rights squares, in the order of their bits in the record.
+_CASTLING_SQUARES = (squares.h1, squares.a1, squares.h8, squares.a8)
+_TURN_VALUES = np.array(BYTE_TURNS, dtype=np.uint32)
+
+def _square_bits(bitboards: np.ndarray) -> np.ndarray:
+    """ Expands a uint64 array to 0/1 values per square (a trailing axis of
+        64, from a1).
+    """
+    return ((bitboards[..., None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)).astype(np.uint8)
+
+def encode_positions(
+    bitboards: np.ndarray,
+    turn: np.ndarray,
+    castle_rights: np.ndarray,
+    en_passant: np.ndarray,
+    halfmove_clock: np.ndarray,
+    fullmove_count: np.ndarray
+) -> np.ndarray:
+    """ Encodes N positions as an (N, POSITION_SIZE) uint8 array of records.
+        Bitboards are an (N, 16) array in PositionBoards layout; the other
+        arguments are length N arrays of board properties. Raises the same
+        ValueErrors as Board.to_bytes for positions that don't fit.
+    """
+    bitboards = np.asarray(bitboards, dtype=np.uint64).reshape(-1, 16)
+    count = len(bitboards)
+    records = np.zeros((count, POSITION_SIZE), dtype=np.uint8)
+
+    # Reject the first position that doesn't fit, as Board.to_bytes would.
+    occupied = bitboards[:, OCCUPIED_INDEX]
+    pieces = _square_bits(occupied).sum(axis=1, dtype=np.int64)
+    halfmove_clock = np.asarray(halfmove_clock, dtype=np.int64)
+    fullmove_count = np.asarray(fullmove_count, dtype=np.int64)
+    invalid = (pieces > POSITION_PIECE_CODES) \
+        | (halfmove_clock < 0) | (halfmove_clock > 0xFF) \
+        | (fullmove_count < 0) | (fullmove_count > 0xFFFF)
+    if invalid.any():
+        row = int(np.argmax(invalid))
+        _check_encodable(int(pieces[row]), int(halfmove_clock[row]), int(fullmove_count[row]))
+
+    # Piece codes per square, compacted to the occupied squares in order.
+    codes = np.zeros((count, 64), dtype=np.uint8)
+    for idx in range(16):
+        if idx not in (WHITE_INDEX, OCCUPIED_INDEX, BLACK_INDEX):
+            codes += _square_bits(bitboards[:, idx]) * np.uint8(idx)
+    order = np.argsort(_square_bits(occupied) == 0, axis=1, kind="stable")
+    codes = np.take_along_axis(codes, order, axis=1)[:, :POSITION_PIECE_CODES]
+    records[:, 0:8] = occupied.astype("<u8").view(np.uint8).reshape(-1, 8)
+    records[:, 8:25] = codes[:, 0::2] | (codes[:, 1::2] << 4)
+
+    turn = np.asarray(turn, dtype=np.uint32)
+    castling = _square_bits(np.asarray(castle_rights, dtype=np.uint64))[:, _CASTLING_SQUARES]
+    records[:, 25] = ((turn >> 12) & 1) | ((turn >> 15) & 2) \
+        | (castling << np.arange(2, 6, dtype=np.uint8)).sum(axis=1, dtype=np.uint8)
+    # At most one en passant square is set, so this is its index + 1.
+    records[:, 26] = (_square_bits(np.asarray(en_passant, dtype=np.uint64)) * np.arange(1, 65, dtype=np.uint8)).sum(axis=1)
+    records[:, 27] = halfmove_clock.astype(np.uint8)
+    records[:, 28:30] = fullmove_count.astype("<u2").view(np.uint8).reshape(-1, 2)
+    return records
+
+def decode_positions(records: np.ndarray) -> tuple:
+    """ Decodes an (N, POSITION_SIZE) uint8 array of records into (bitboards,
+        turn, castle rights, en passant, halfmove clock, fullmove count)
+        arrays, with bitboards as an (N, 16) uint64 array in PositionBoards
+        layout. Bytes objects of concatenated records are accepted too.
+    """
+    records = np.frombuffer(records, dtype=np.uint8) if isinstance(records, (bytes, bytearray)) else records
+    records = np.asarray(records, dtype=np.uint8).reshape(-1, POSITION_SIZE)
+    count = len(records)
+
+    occupied = records[:, 0:8].copy().view("<u8").reshape(count).astype(np.uint64)
+    nibbles = np.empty((count, POSITION_PIECE_CODES), dtype=np.uint8)
+    nibbles[:, 0::2] = records[:, 8:25] & 0xF
+    nibbles[:, 1::2] = records[:, 8:25] >> 4
+
+    # The n-th occupied square takes the n-th piece code.
+    occupied_bits = _square_bits(occupied)
+    ranks = np.clip(np.cumsum(occupied_bits, axis=1, dtype=np.intp) - 1, 0, POSITION_PIECE_CODES - 1)
+    codes = np.take_along_axis(nibbles, ranks, axis=1) * occupied_bits
+
+    bitboards = np.zeros((count, 16), dtype=np.uint64)
+    for idx in range(16):
+        if idx not in (WHITE_INDEX, OCCUPIED_INDEX, BLACK_INDEX):
+            bitboards[:, idx] = np.bitwise_or.reduce(np.where(codes == idx, _SQUARE_MASKS, np.uint64(0)), axis=1)
+    bitboards[:, WHITE_INDEX] = np.bitwise_or.reduce(bitboards[:, WHITE_INDEX + 1:WHITE_INDEX + 7], axis=1)
+    bitboards[:, BLACK_INDEX] = np.bitwise_or.reduce(bitboards[:, BLACK_INDEX + 1:BLACK_INDEX + 7], axis=1)
+    bitboards[:, OCCUPIED_INDEX] = occupied
+
+    castling = records[:, 25] >> 2
+    castle_rights = np.zeros(count, dtype=np.uint64)
+    for bit, square in enumerate(_CASTLING_SQUARES):
+        castle_rights |= ((castling >> bit) & 1).astype(np.uint64) << square
+    en_passant = np.where(
+        records[:, 26] > 0,
+        np.uint64(1) << (np.maximum(records[:, 26], 1) - 1).astype(np.uint64),
+        np.uint64(0)
+    )
+
+    return (
+        bitboards,
+        _TURN_VALUES[records[:, 25] & 3],
+        castle_rights,
+        en_passant,
+        records[:, 27].astype(np.uint32),
+        records[:, 28:30].copy().view("<u2").reshape(count).astype(np.uint32)
+    )
+
+# Conversion to and from boards
+def encode_boards(boards: Iterable[Board]) -> np.ndarray:
+    """ Encodes boards as an (N, POSITION_SIZE) uint8 array of records.
+    """
+    boards = list(boards)
+    return encode_positions(
+        np.array([board.boards.bitboards for board in boards], dtype=np.uint64),
+        [board.turn for board in boards],
+        np.array([board.castle_rights for board in boards], dtype=np.uint64),
+        np.array([board.en_passant for board in boards], dtype=np.uint64),
+        [board.halfmove_clock for board in boards],
+        [board.fullmove_count for board in boards]
+    )
+
+def boards_from_records(records: np.ndarray | bytes) -> Iterator[Board]:
+    """ Lazily creates a board for each record.
+    """
+    records = np.frombuffer(records, dtype=np.uint8) if isinstance(records, (bytes, bytearray)) else records
+    for record in np.asarray(records, dtype=np.uint8).reshape(-1, POSITION_SIZE):
+        yield Board.from_bytes(record.tobytes())
+
+# Shared memory transfer. A block holds a little-endian uint64 record count,
+# followed by the records.
+_SHARED_HEADER_SIZE = 8
+
+def share_boards(boards: Iterable[Board], name: str=None) -> shared_memory.SharedMemory:
+    """ Encodes boards into a new shared memory block and returns it. Workers
+        attach to it by name (see boards_from_shared). The caller owns the block,
+        and should close and unlink it once the workers are done.
+    """
+    records = encode_boards(boards)
+    block = shared_memory.SharedMemory(name=name, create=True, size=_SHARED_HEADER_SIZE + max(records.nbytes, 1))
+    block.buf[:_SHARED_HEADER_SIZE] = len(records).to_bytes(_SHARED_HEADER_SIZE, "little")
+    block.buf[_SHARED_HEADER_SIZE:_SHARED_HEADER_SIZE + records.nbytes] = records.tobytes()
+    return block
+
+def shared_records(block: shared_memory.SharedMemory) -> np.ndarray:
+    """ Returns a read-only (N, POSITION_SIZE) view of the records in a block
+        made by share_boards, without copying them. The view must be released
+        before the block is closed.
+    """
+    count = int.from_bytes(block.buf[:_SHARED_HEADER_SIZE], "little")
+    records = np.frombuffer(block.buf, dtype=np.uint8, count=count * POSITION_SIZE, offset=_SHARED_HEADER_SIZE)
+    records.flags.writeable = False
+    return records.reshape(count, POSITION_SIZE)
+
+def boards_from_shared(name: str) -> list[Board]:
+    """ Attaches to a block made by share_boards and decodes its boards.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        records = shared_records(block)
+        boards = list(boards_from_records(records))
+        del records
+    finally:
+        block.close()
+    return boards
+
+# Position arrays. A board is exported as a row of 16 uint64 bitboards: the
+# piece and duck bitboards at their pieces.PIECE_INDEX and the occupied
+# bitboard at OCCUPIED_INDEX, as in PositionBoards, with castling rights and
+# the en passant square in place of the side aggregates (which can be
+# recomputed from the pieces).
+CASTLING_COLUMN   = WHITE_INDEX
+EN_PASSANT_COLUMN = BLACK_INDEX
+
+# Piece bitboard columns (the mailbox piece in each is board._INDEX_PIECES).
+_PIECE_COLUMNS = [idx for piece, idx in PIECE_INDEX.items() if piece != Piece.DUCK]
+
+# Bitboard planes for array_to_planes (PositionBoards indices, with the side
+# aggregates recomputed). Castling rights and en passant squares follow.
+_PLANE_INDICES = (
+    *(PIECE_INDEX[piece] for piece in (
+        Piece.W_PAWN, Piece.W_KNIGHT, Piece.W_BISHOP, Piece.W_ROOK, Piece.W_QUEEN, Piece.W_KING,
+        Piece.B_PAWN, Piece.B_KNIGHT, Piece.B_BISHOP, Piece.B_ROOK, Piece.B_QUEEN, Piece.B_KING
+    )),
+    WHITE_INDEX, BLACK_INDEX, DUCK_INDEX, OCCUPIED_INDEX
+)
+
+def _side_bitboards(array: np.ndarray) -> tuple:
+    """ Returns the white and black aggregate bitboards of a position array.
+    """
+    return (
+        np.bitwise_or.reduce(array[:, WHITE_INDEX + 1:WHITE_INDEX + 7], axis=1),
+        np.bitwise_or.reduce(array[:, BLACK_INDEX + 1:BLACK_INDEX + 7], axis=1)
+    )
+
+def boards_to_array(boards: Iterable[Board]) -> np.ndarray:
+    """ Exports boards as an (N, 16) uint64 position array. Turns and move
+        counts aren't included.
+    """
+    boards = list(boards)
+    array = np.array([board.boards.bitboards for board in boards], dtype=np.uint64).reshape(-1, 16)
+    array[:, CASTLING_COLUMN] = np.array([board.castle_rights for board in boards], dtype=np.uint64)
+    array[:, EN_PASSANT_COLUMN] = np.array([board.en_passant for board in boards], dtype=np.uint64)
+    return array
+
+def boards_from_array(
+    array: np.ndarray,
+    turn: np.ndarray=None,
+    halfmove_clock: np.ndarray=None,
+    fullmove_count: np.ndarray=None,
+    move_cache: MoveCache=None
+) -> list[Board]:
+    """ Rebuilds boards from an (N, 16) position array. Turns and move counts
+        may be given as length N arrays, otherwise every board has white to
+        move and zeroed move counts, as in a new Board.
+    """
+    array = np.asarray(array, dtype=np.uint64).reshape(-1, 16)
+    count = len(array)
+    bitboards = array.copy()
+    bitboards[:, WHITE_INDEX], bitboards[:, BLACK_INDEX] = _side_bitboards(array)
+
+    # Each square's piece column, for the mailboxes (the duck has no entry).
+    codes = np.zeros((count, 64), dtype=np.uint8)
+    for idx in _PIECE_COLUMNS:
+        codes += _square_bits(array[:, idx]) * np.uint8(idx)
+
+    turns = [Side.WHITE] * count if turn is None else [Side(int(side)) for side in turn]
+    halfmove_clocks = [0] * count if halfmove_clock is None else [int(n) for n in halfmove_clock]
+    fullmove_counts = [0] * count if fullmove_count is None else [int(n) for n in fullmove_count]
+
+    boards = []
+    for row, row_codes, castle_rights, en_passant, side, halfmoves, fullmoves in zip(
+        bitboards.tolist(), codes.tolist(),
+        array[:, CASTLING_COLUMN].tolist(), array[:, EN_PASSANT_COLUMN].tolist(),
+        turns, halfmove_clocks, fullmove_counts
+    ):
+        mailbox = [_INDEX_PIECES[code] for code in row_codes]
+        zbr = zbr_position(mailbox, row[DUCK_INDEX], side, castle_rights, en_passant)
+        boards.append(Board.from_snapshot((
+            tuple(row), tuple(mailbox), side, castle_rights, en_passant,
+            halfmoves, fullmoves, zbr, None
+        ), move_cache))
+    return boards
+
+def array_to_planes(array: np.ndarray) -> np.ndarray:
+    """ Expands an (N, 16) position array to an (N, 18, 8, 8) array of 0/1
+        planes, for neural network input (see Swan.build_model_input): each
+        side's pieces, the white, black, duck and occupied bitboards,
+        castling rights and en passant. Squares run from h8 (top left) to a1.
+    """
+    array = np.asarray(array, dtype=np.uint64).reshape(-1, 16)
+    bitboards = array.copy()
+    bitboards[:, WHITE_INDEX], bitboards[:, BLACK_INDEX] = _side_bitboards(array)
+    planes = np.concatenate((
+        bitboards[:, _PLANE_INDICES],
+        array[:, [CASTLING_COLUMN, EN_PASSANT_COLUMN]]
+    ), axis=1)
+    # Big-endian bytes unpack most significant bit (h8) first.
+    planes = planes.astype(">u8", order="C")
+    return np.unpackbits(planes.view(np.uint8), axis=-1).reshape(-1, 18, 8, 8)
@@ -3,14 +3,24 @@
 
 from .consts import *
 from .moves import *
-from .pieces import Piece, PieceType, PIECE_MASK, SIDE_MASK
-from .sides import Side, next_turn, opposing_side
-from .zobrist import zbr_hash, zbr_update
+from .pieces import Piece, PieceType, PIECE_MASK, SIDE_MASK, PIECE_INDEX, SIDE_INDEX, TYPE_INDEX
+from .sides import Side, NEXT_TURN, OPPOSING_SIDE, PREVIOUS_TURN, opposing_side
+from .zobrist import (
+    CASTLING_KEYS, EN_PASSANT_KEYS, TURN_DELTAS, zbr_hash, zbr_move, zbr_position,
+    VERIFICATION_CASTLING_KEYS, VERIFICATION_EN_PASSANT_KEYS, VERIFICATION_TURN_DELTAS,
+    VERIFICATION_TURN_KEYS, zbr_verification, zbr_verification_move
+)
+from .cache import MoveCache
+from .history import PositionProperties, UndoStack
+from .weights import build_weights, weight_totals
 
+from . import attacks
 from . import squares
+from . import tables
 
 from dataclasses import dataclass
 from enum import IntEnum
+from functools import partial
 
 class GameState(IntEnum):
     ONGOING = 0
@@ -18,59 +28,227 @@ class GameState(IntEnum):
     BLACK_WINS = 2
     STALEMATE = 3
 
-@dataclass
-class PositionProperties:
-    """ Dataclass for storing the properties of a position.
+# Game states by value. The history stores unresolved states as -1, which
+# picks the trailing None.
+_GAME_STATES = (*GameState, None)
+
+# Number of occurrences of a position at which the game is drawn.
+REPETITION_DRAW = 3
+
+# Plain int values of the enum members used by make_move/unmake_move and
+# their helpers (see the note in moves.py). The history holds plain ints.
+# The mailbox holds Piece members (from setup and FEN strings), except on
+# squares written by make/unmake, which hold the equal plain ints; compare
+# mailbox entries by value. Enums are produced for FEN strings, __str__ and
+# unpack_move.
+_QUIET             = MoveType.QUIET.value
+_DOUBLE_PAWN       = MoveType.DOUBLE_PAWN.value
+_CAPTURE           = MoveType.CAPTURE.value
+_PROMOTION         = MoveType.PROMOTION.value
+_EN_PASSANT        = MoveType.EN_PASSANT.value
+_CAPTURE_PROMOTION = MoveType.CAPTURE_PROMOTION.value
+_CASTLE_KINGSIDE   = MoveType.CASTLE_KINGSIDE.value
+_CASTLE_QUEENSIDE  = MoveType.CASTLE_QUEENSIDE.value
+_DUCK_MOVE         = MoveType.DUCK.value
+_MANUAL            = MoveType.MANUAL.value
+
+_PAWN = PieceType.PAWN.value
+_ROOK = PieceType.ROOK.value
+_KING = PieceType.KING.value
+_NO_PIECE = Piece.EMPTY.value
+
+_WHITE      = Side.WHITE.value
+_BLACK      = Side.BLACK.value
+_BLACK_DUCK = Side.BLACK_DUCK.value
+
+_SOUTH = utils.Direction.SOUTH.value
+_NORTH = utils.Direction.NORTH.value
+_KING_OFFSET = TYPE_INDEX[PieceType.KING]
+_ROOK_OFFSET = TYPE_INDEX[PieceType.ROOK]
+
+# Castles by (side, move type), as (king from, king to, rook from, rook to,
+# king mask, rook mask, castling rights mask). The masks cover both the from
+# and to squares, so XORing them moves the pieces either way.
+def _generate_castles():
+    result = {}
+    for side, rank in ((Side.WHITE, RANK_1), (Side.BLACK, RANK_8)):
+        for move_type, castling in (
+            (MoveType.CASTLE_KINGSIDE, CASTLING_KINGSIDE),
+            (MoveType.CASTLE_QUEENSIDE, CASTLING_QUEENSIDE)
+        ):
+            result[side, move_type] = (
+                *castling[side]["KING_SQUARES"],
+                *castling[side]["ROOK_SQUARES"],
+                castling[side][PieceType.KING],
+                castling[side][PieceType.ROOK],
+                ~rank
+            )
+    return result
+_CASTLES = _generate_castles()
+
+def _handler_tables(common: dict, white: dict, black: dict) -> dict:
+    """ Lays out move handlers (see Board.make_move) as lists indexed by
+        move type, one per turn. Handlers in common are shared by both
+        sides; a side's own handlers take precedence.
     """
-    game_state: GameState = None
-    turn: Side = None
-    duck: int = None
-    castle_rights: int = None
-    en_passant: int = None
-    halfmove_clock: int = None
-    fullmove_count: int = None
-    capture: PieceType = None
-    move: Move = None
-    zbr: int = None
+    result = {}
+    for side, handlers in ((Side.WHITE, white), (Side.BLACK, black)):
+        table = [None] * (max(MoveType) + 1)
+        for move_type, handler in {**common, **handlers}.items():
+            table[move_type] = handler
+        result[side] = table
+    # Duck turns only ever play duck moves, which are common to both sides.
+    result[Side.WHITE_DUCK] = result[Side.WHITE]
+    result[Side.BLACK_DUCK] = result[Side.BLACK]
+    return result
+
+# Aggregate bitboard indices in PositionBoards. Piece bitboards are at
+# pieces.PIECE_INDEX, i.e., SIDE_INDEX[side] + TYPE_INDEX[piece_type], and
+# each side's combined bitboard is at its SIDE_INDEX.
+WHITE_INDEX    = SIDE_INDEX[Side.WHITE]
+OCCUPIED_INDEX = 7
+BLACK_INDEX    = SIDE_INDEX[Side.BLACK]
+DUCK_INDEX     = PIECE_INDEX[Piece.DUCK]
+
+# Player piece types, in the order PieceBoards iterates them.
+PIECE_TYPES = (
+    PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+    PieceType.ROOK, PieceType.QUEEN,  PieceType.KING
+)
+
+# Starting position bitboards, in PositionBoards order.
+def _generate_init_bitboards():
+    result = [EMPTY] * 16
+    result[WHITE_INDEX]    = INIT_WHITE_PIECES
+    result[OCCUPIED_INDEX] = INIT_ALL_PIECES
+    result[BLACK_INDEX]    = INIT_BLACK_PIECES
+    result[DUCK_INDEX]     = INIT_DUCK
+    for piece, bitboard in (
+        (Piece.W_PAWN,   INIT_WHITE_PAWNS),   (Piece.B_PAWN,   INIT_BLACK_PAWNS),
+        (Piece.W_KNIGHT, INIT_WHITE_KNIGHTS), (Piece.B_KNIGHT, INIT_BLACK_KNIGHTS),
+        (Piece.W_BISHOP, INIT_WHITE_BISHOPS), (Piece.B_BISHOP, INIT_BLACK_BISHOPS),
+        (Piece.W_ROOK,   INIT_WHITE_ROOKS),   (Piece.B_ROOK,   INIT_BLACK_ROOKS),
+        (Piece.W_QUEEN,  INIT_WHITE_QUEENS),  (Piece.B_QUEEN,  INIT_BLACK_QUEENS),
+        (Piece.W_KING,   INIT_WHITE_KING),    (Piece.B_KING,   INIT_BLACK_KING),
+    ):
+        result[PIECE_INDEX[piece]] = bitboard
+    return result
+INIT_BITBOARDS = _generate_init_bitboards()
+
+# Binary position encoding (see Board.to_bytes). Turns are stored by their
+# index here, and pieces by their PositionBoards index (the duck, at
+# DUCK_INDEX, has no mailbox entry).
+POSITION_SIZE = 32
+POSITION_PIECE_CODES = 34
+BYTE_TURNS = (Side.WHITE, Side.WHITE_DUCK, Side.BLACK, Side.BLACK_DUCK)
+
+def _check_encodable(pieces: int, halfmove_clock: int, fullmove_count: int):
+    """ Raises a ValueError if a position doesn't fit the binary encoding.
+        Shared with chess.binary, so both encoders reject the same boards.
+    """
+    if pieces > POSITION_PIECE_CODES:
+        raise ValueError(f"too many pieces to encode: {pieces} (at most {POSITION_PIECE_CODES})")
+    if not 0 <= halfmove_clock <= 0xFF:
+        raise ValueError(f"halfmove clock out of range for encoding: {halfmove_clock}")
+    if not 0 <= fullmove_count <= 0xFFFF:
+        raise ValueError(f"fullmove count out of range for encoding: {fullmove_count}")
+
+def _generate_index_pieces():
+    result = [Piece.EMPTY] * 16
+    for piece, idx in PIECE_INDEX.items():
+        if piece != Piece.DUCK:
+            result[idx] = piece
+    return result
+_INDEX_PIECES = _generate_index_pieces()
+
+class PieceBoards:
+    """ Dict-like view of one side's piece bitboards in a PositionBoards,
+        keyed by PieceType (PAWN to KING, in that order). Kept for callers
+        written against the old nested dict layout.
+    """
+    def __init__(self, boards: "PositionBoards", side: Side):
+        self.boards = boards
+        self.offset = SIDE_INDEX[side]
+
+    def __getitem__(self, piece_type: PieceType) -> int:
+        return self.boards.bitboards[self.offset + TYPE_INDEX[piece_type]]
+
+    def __setitem__(self, piece_type: PieceType, bitboard: int):
+        self.boards.bitboards[self.offset + TYPE_INDEX[piece_type]] = bitboard
+
+    def __iter__(self):
+        return iter(PIECE_TYPES)
+
+    def __len__(self):
+        return len(PIECE_TYPES)
+
+    def keys(self):
+        return list(PIECE_TYPES)
+
+    def values(self):
+        return [self[piece_type] for piece_type in PIECE_TYPES]
+
+    def items(self):
+        return [(piece_type, self[piece_type]) for piece_type in PIECE_TYPES]
 
 @dataclass
 class PositionBoards:
-    """ Dataclass for storing the bitboards of a position.
+    """ Dataclass for storing the bitboards of a position, as a flat list
+        indexed by pieces.PIECE_INDEX, with the aggregate bitboards in the
+        free slots (see WHITE_INDEX etc.). Defaults to the starting position.
+
+        The pieces, white, black, duck and occupied attributes are views
+        onto the list, for code that doesn't need to index it directly.
     """
-    # Player pieces. Defaults to the starting position - this is
-    # handled in __post_init__.
-    pieces: dict[Side, PieceType] = None
-    # Aggregate bitboards, to be updated incrementally.
-    duck: int = INIT_DUCK
-    white: int = INIT_WHITE_PIECES
-    black: int = INIT_BLACK_PIECES
-    occupied: int = INIT_ALL_PIECES
+    bitboards: list[int] = None
 
     def __post_init__(self):
-        if not self.pieces:
-            self.pieces = {
-                Side.WHITE: {
-                    PieceType.PAWN: INIT_WHITE_PAWNS,
-                    PieceType.KNIGHT: INIT_WHITE_KNIGHTS,
-                    PieceType.BISHOP: INIT_WHITE_BISHOPS,
-                    PieceType.ROOK: INIT_WHITE_ROOKS,
-                    PieceType.QUEEN: INIT_WHITE_QUEENS,
-                    PieceType.KING: INIT_WHITE_KING
-                },
-                Side.BLACK: {
-                    PieceType.PAWN: INIT_BLACK_PAWNS,
-                    PieceType.KNIGHT: INIT_BLACK_KNIGHTS,
-                    PieceType.BISHOP: INIT_BLACK_BISHOPS,
-                    PieceType.ROOK: INIT_BLACK_ROOKS,
-                    PieceType.QUEEN: INIT_BLACK_QUEENS,
-                    PieceType.KING: INIT_BLACK_KING
-                }
-            }
+        if not self.bitboards:
+            self.bitboards = list(INIT_BITBOARDS)
+        self.pieces = {
+            Side.WHITE: PieceBoards(self, Side.WHITE),
+            Side.BLACK: PieceBoards(self, Side.BLACK)
+        }
+
+    @property
+    def white(self) -> int:
+        return self.bitboards[WHITE_INDEX]
+
+    @white.setter
+    def white(self, bitboard: int):
+        self.bitboards[WHITE_INDEX] = bitboard
+
+    @property
+    def black(self) -> int:
+        return self.bitboards[BLACK_INDEX]
+
+    @black.setter
+    def black(self, bitboard: int):
+        self.bitboards[BLACK_INDEX] = bitboard
+
+    @property
+    def duck(self) -> int:
+        return self.bitboards[DUCK_INDEX]
+
+    @duck.setter
+    def duck(self, bitboard: int):
+        self.bitboards[DUCK_INDEX] = bitboard
+
+    @property
+    def occupied(self) -> int:
+        return self.bitboards[OCCUPIED_INDEX]
+
+    @occupied.setter
+    def occupied(self, bitboard: int):
+        self.bitboards[OCCUPIED_INDEX] = bitboard
 
 class Board:
     """ Duck chess board representation.
     """
-    def __init__(self):
+    # Number of trailing history plies kept when pickling (see __getstate__).
+    pickled_plies: int = 0
+
+    def __init__(self, move_cache: MoveCache=None):
         self.boards = PositionBoards()
 
         self.turn = Side.WHITE
@@ -78,7 +256,18 @@ class Board:
         self.en_passant = EMPTY
         self.halfmove_clock = 0
         self.fullmove_count = 0
-        self.game_state = GameState.ONGOING
+        self._game_state = GameState.ONGOING
+        # Attack maps, keyed by (side, piece type). See attacks_by.
+        self._attacks = {}
+        # Move lists, keyed by (packed, pseudo). See generate_move_lists.
+        self._move_lists = {}
+        # Optional move list cache shared across plies, keyed by Zobrist
+        # hash. Disabled (None) by default.
+        self.move_cache = move_cache
+        # Registered weight tables, as {name: (weights, [white, black])}.
+        # See register_weights.
+        self._weights = {}
+        self._accumulators = []
 
         self.mailbox = [
             Piece.W_ROOK, Piece.W_KNIGHT, Piece.W_BISHOP, Piece.W_QUEEN, Piece.W_KING, Piece.W_BISHOP, Piece.W_KNIGHT, Piece.W_ROOK,
@@ -91,30 +280,44 @@ class Board:
             Piece.B_ROOK, Piece.B_KNIGHT, Piece.B_BISHOP, Piece.B_QUEEN, Piece.B_KING, Piece.B_BISHOP, Piece.B_KNIGHT, Piece.B_ROOK,
         ]
 
-        # Initialise Zobrist Hash value.
+        # Initialise Zobrist Hash value. The verification hash is optional,
+        # and disabled (None) by default. See enable_verification.
         self.zbr = zbr_hash(self)
+        self.zbr_verify = None
 
         # Initialise history
-        self.history = [
-            PositionProperties(
-                game_state=self.game_state,
-                turn=self.turn,
-                duck=self.boards.duck,
-                castle_rights=self.castle_rights,
-                en_passant=self.en_passant,
-                halfmove_clock=self.halfmove_clock,
-                fullmove_count=self.fullmove_count,
-                capture=Piece.EMPTY,
-                move=None,
-                zbr=self.zbr
-            )
-        ]
+        self.__reset_history()
+
+    def __reset_history(self):
+        """ Replaces the history with a single entry for the current position.
+        """
+        # Occurrences of the positions moves were made from, keyed by
+        # Zobrist hash. See repetition_count.
+        self._repetitions = {}
+        self.history = UndoStack()
+        self.history.push(
+            self._game_state,
+            self.turn,
+            self.boards.bitboards[DUCK_INDEX],
+            self.castle_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_count,
+            Piece.EMPTY,
+            None,
+            self.zbr,
+            self.zbr_verify or 0
+        )
 
     def to_fen_string(self) -> str:
         """ Builds a FEN-style string from the current board state """
         result = ""
         blank_count = 0
-        mailbox_reshaped = [self.mailbox[n-8:n] for n in range(64, 0, -8)]
+        # The duck isn't kept in the mailbox, so place it from its bitboard.
+        mailbox = list(self.mailbox)
+        if self.boards.duck:
+            mailbox[utils.ls1b_index(self.boards.duck)] = Piece.DUCK
+        mailbox_reshaped = [mailbox[n-8:n] for n in range(64, 0, -8)]
         
         # Pieces
         for rank in mailbox_reshaped:
@@ -153,7 +356,7 @@ class Board:
                 result += "K"
             if self.castle_rights & squares.masks[squares.a1]:
                 result += "Q"
-            if self.castle_rights & squares.masks[squares.a8]:
+            if self.castle_rights & squares.masks[squares.h8]:
                 result += "k"
             if self.castle_rights & squares.masks[squares.a8]:
                 result += "q"
@@ -183,9 +386,8 @@ class Board:
 
         board = Board()
         board.mailbox = [Piece.EMPTY] * 64
-        for side in board.boards.pieces:
-            for piece in board.boards.pieces[side]:
-                board.boards.pieces[side][piece] = EMPTY
+        board.boards = PositionBoards([EMPTY] * 16)
+        bitboards = board.boards.bitboards
 
         idx = 0
         for rank in reversed(ranks.split("/")):
@@ -196,13 +398,11 @@ class Board:
                     continue
                 # Duck
                 elif square == pieces.symbols[Piece.DUCK]:
-                    board.duck = squares.masks[idx]
-                    board.mailbox[idx] = Piece.DUCK
+                    bitboards[DUCK_INDEX] = squares.masks[idx]
                 # Pieces
                 else:
                     piece = pieces.symbol_lookup[square]
-                    board.boards.pieces[piece & SIDE_MASK][piece & PIECE_MASK] \
-                        |= squares.masks[idx]
+                    bitboards[PIECE_INDEX[piece]] |= squares.masks[idx]
                     board.mailbox[idx] = piece
                 idx += 1
         
@@ -236,91 +436,664 @@ class Board:
         board.fullmove_count = fullmove_count
 
         # Set aggregate bitboards
-        board.boards.white = EMPTY
-        for bitboard in board.boards.pieces[Side.WHITE].values():
-            board.boards.white |= bitboard
-        board.boards.black = EMPTY
-        for bitboard in board.boards.pieces[Side.BLACK].values():
-            board.boards.black |= bitboard
-
-        board.boards.occupied = \
-            board.boards.white | board.boards.black | board.boards.duck
+        for side in (Side.WHITE, Side.BLACK):
+            side_index = SIDE_INDEX[side]
+            for piece_type in PIECE_TYPES:
+                bitboards[side_index] |= bitboards[side_index + TYPE_INDEX[piece_type]]
+        bitboards[OCCUPIED_INDEX] = \
+            bitboards[WHITE_INDEX] | bitboards[BLACK_INDEX] | bitboards[DUCK_INDEX]
         
         board.zbr = zbr_hash(board)
+        # The position may already be decided, so resolve it on first access.
+        board.game_state = None
+        board.__reset_history()
 
         return board
 
+    def copy(self, history: bool=True) -> "Board":
+        """ Returns an independent copy of the board. The history is copied
+            too (so moves can still be unmade on the copy), unless history is
+            false, in which case the copy starts a fresh history at the
+            current position. The move cache, if any, is shared.
+        """
+        board = Board.__new__(Board)
+        board.boards = PositionBoards(list(self.boards.bitboards))
+        board.mailbox = list(self.mailbox)
+        board.turn = self.turn
+        board.castle_rights = self.castle_rights
+        board.en_passant = self.en_passant
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_count = self.fullmove_count
+        board.zbr = self.zbr
+        board.zbr_verify = self.zbr_verify
+        board._game_state = self._game_state
+        board._attacks = {}
+        board._move_lists = {}
+        board.move_cache = self.move_cache
+        board._weights = {
+            name: (weights, list(totals))
+            for name, (weights, totals) in self._weights.items()
+        }
+        board._accumulators = list(board._weights.values())
+        if history:
+            board.history = self.history.copy()
+            board._repetitions = dict(self._repetitions)
+        else:
+            board.__reset_history()
+        return board
+
+    def snapshot(self) -> tuple:
+        """ Returns the full state of the current position (bitboards,
+            mailbox, turn, rights, move counts, hash and game state) as a
+            flat immutable tuple of ints, e.g., for handing positions to
+            worker processes. History isn't included. See restore.
+        """
+        return (
+            tuple(self.boards.bitboards),
+            tuple(self.mailbox),
+            self.turn,
+            self.castle_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_count,
+            self.zbr,
+            self._game_state
+        )
+
+    def restore(self, snapshot: tuple):
+        """ Sets the board to the position captured by snapshot. The history
+            is reset to start from the restored position.
+        """
+        (
+            bitboards,
+            mailbox,
+            self.turn,
+            self.castle_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_count,
+            self.zbr,
+            self._game_state
+        ) = snapshot
+        self.boards = PositionBoards(list(bitboards))
+        self.mailbox = list(mailbox)
+        self._attacks = {}
+        self._move_lists = {}
+        for weights, totals in self._accumulators:
+            totals[:] = weight_totals(self.boards.bitboards, weights)
+        if self.zbr_verify is not None:
+            self.zbr_verify = zbr_verification(self)
+        self.__reset_history()
+
+    def from_snapshot(snapshot: tuple, move_cache: MoveCache=None) -> "Board":
+        """ Creates a board from a snapshot (see Board.snapshot).
+        """
+        board = Board.__new__(Board)
+        board.move_cache = move_cache
+        board._weights = {}
+        board._accumulators = []
+        board.zbr_verify = None
+        board.restore(snapshot)
+        return board
+
+    def to_bytes(self) -> bytes:
+        """ Encodes the position as POSITION_SIZE bytes. The encoding is
+            canonical (equal positions encode equally) and fixed-width, so
+            records can be stored back to back. History and game state
+            aren't included. Little-endian layout:
+
+                0-7    occupied squares (including the duck)
+                8-24   a 4-bit PositionBoards index per occupied square, in
+                       square order (low nibble first), zero padded
+                25     turn (index in BYTE_TURNS), with castling rights in
+                       bits 2-5 (K, Q, k, q)
+                26     en passant square + 1, or 0 for none
+                27     halfmove clock
+                28-29  fullmove count
+                30-31  reserved (zero)
+
+            Raises a ValueError if the position has more than
+            POSITION_PIECE_CODES pieces, or its move counts don't fit. See
+            chess.binary for encoding many positions at once.
+        """
+        bitboards = self.boards.bitboards
+        mailbox = self.mailbox
+        occupied = bitboards[OCCUPIED_INDEX]
+        duck = bitboards[DUCK_INDEX]
+
+        codes = 0
+        shift = 0
+        remaining = occupied
+        while remaining:
+            mask = remaining & -remaining
+            remaining ^= mask
+            code = DUCK_INDEX if mask == duck else PIECE_INDEX[mailbox[mask.bit_length() - 1]]
+            codes |= code << shift
+            shift += 4
+        _check_encodable(shift >> 2, self.halfmove_clock, self.fullmove_count)
+
+        turn = ((self.turn >> 12) & 1) | ((self.turn >> 15) & 2)
+        castle_rights = self.castle_rights
+        castling = \
+              ((castle_rights >> squares.h1) & 1)        | ((castle_rights >> squares.a1) & 1) << 1 \
+            | ((castle_rights >> squares.h8) & 1) << 2   | ((castle_rights >> squares.a8) & 1) << 3
+        en_passant = self.en_passant.bit_length()
+
+        return occupied.to_bytes(8, "little") \
+            + codes.to_bytes(POSITION_PIECE_CODES // 2, "little") \
+            + bytes((turn | castling << 2, en_passant, self.halfmove_clock)) \
+            + self.fullmove_count.to_bytes(2, "little") \
+            + bytes(2)
+
+    def from_bytes(data: bytes, move_cache: MoveCache=None) -> "Board":
+        """ Creates a board from a position encoded by Board.to_bytes. The
+            game state is resolved on first access.
+        """
+        return Board.from_snapshot(Board.snapshot_from_bytes(data), move_cache)
+
+    def snapshot_from_bytes(data: bytes) -> tuple:
+        """ Decodes a position encoded by Board.to_bytes into a snapshot (see
+            Board.snapshot), with the game state unresolved.
+        """
+        if len(data) != POSITION_SIZE:
+            raise ValueError(f"expected {POSITION_SIZE} bytes, got {len(data)}")
+        occupied = int.from_bytes(data[0:8], "little")
+        codes = int.from_bytes(data[8:25], "little")
+
+        bitboards = [EMPTY] * 16
+        mailbox = [Piece.EMPTY] * 64
+        remaining = occupied
+        while remaining:
+            mask = remaining & -remaining
+            remaining ^= mask
+            code = codes & 0xF
+            codes >>= 4
+            bitboards[code] |= mask
+            mailbox[mask.bit_length() - 1] = _INDEX_PIECES[code]
+        if bitboards[WHITE_INDEX] or bitboards[OCCUPIED_INDEX] or bitboards[BLACK_INDEX]:
+            raise ValueError("invalid piece code in encoded position")
+        for offset in range(1, 7):
+            bitboards[WHITE_INDEX] |= bitboards[WHITE_INDEX + offset]
+            bitboards[BLACK_INDEX] |= bitboards[BLACK_INDEX + offset]
+        bitboards[OCCUPIED_INDEX] = occupied
+
+        turn = BYTE_TURNS[data[25] & 3]
+        castling = data[25] >> 2
+        castle_rights = \
+              (castling & 1)        << squares.h1 | ((castling >> 1) & 1) << squares.a1 \
+            | ((castling >> 2) & 1) << squares.h8 | ((castling >> 3) & 1) << squares.a8
+        en_passant = 1 << (data[26] - 1) if data[26] else EMPTY
+        duck = bitboards[DUCK_INDEX]
+
+        return (
+            tuple(bitboards),
+            tuple(mailbox),
+            turn,
+            castle_rights,
+            en_passant,
+            data[27],
+            int.from_bytes(data[28:30], "little"),
+            zbr_position(mailbox, duck, turn, castle_rights, en_passant),
+            None
+        )
+
+    # Pickling
+    def __getstate__(self) -> tuple:
+        """ Pickles the board compactly: the binary encoding of the position
+            (see Board.to_bytes), its game state, registered weights, and the
+            last pickled_plies moves of the history as packed moves, with the
+            turn each was played on. When unpickled, those moves are replayed
+            from the position they were made in (skipping turns as skip_move
+            did), so they can be unmade; earlier history is dropped. The move
+            cache isn't pickled; pickled_plies is.
+        """
+        history = self.history
+        plies = min(self.pickled_plies, len(history) - 1)
+        if plies:
+            moves = tuple(
+                (history.turn[ply], move if isinstance(move, int) else move.pack())
+                for ply, move in zip(range(len(history) - plies, len(history)), history.move[len(history) - plies:])
+            )
+            origin = self.copy()
+            for _ in range(plies):
+                origin.unmake_move()
+            data = origin.to_bytes()
+        else:
+            moves = ()
+            data = self.to_bytes()
+        weights = {name: weights for name, (weights, _) in self._weights.items()}
+        return (
+            data, moves, self.turn, self._game_state, weights,
+            self.zbr_verify is not None, self.pickled_plies
+        )
+
+    def __setstate__(self, state: tuple):
+        data, moves, turn, game_state, weights, verification, pickled_plies = state
+        self.move_cache = None
+        self._weights = {}
+        self._accumulators = []
+        self.zbr_verify = 0 if verification else None
+        self.pickled_plies = pickled_plies
+        self.restore(Board.snapshot_from_bytes(data))
+        for name, table in weights.items():
+            self._weights[name] = (table, weight_totals(self.boards.bitboards, table))
+        self._accumulators = list(self._weights.values())
+        # Turns skipped between (or after) the moves are skipped again.
+        for move_turn, move in moves:
+            self.skip_move(move_turn)
+            self.make_move(move)
+        self.skip_move(turn)
+        self._game_state = game_state
+
+    @property
+    def game_state(self) -> GameState:
+        """ The state of the game in the current position. This is resolved
+            lazily on first access and cached until the position changes.
+        """
+        if self._game_state is None:
+            self.update_game_state()
+        return self._game_state
+
+    @game_state.setter
+    def game_state(self, value: GameState):
+        self._game_state = value
+
     def update_game_state(self):
-        if self.boards.pieces[Side.WHITE][PieceType.KING] == consts.EMPTY:
+        """ Resolves the state of the game in the current position. King
+            captures, the halfmove clock and repetitions (REPETITION_DRAW
+            occurrences draw) are checked first, as they're cheap - the side
+            to move is only probed for moves if needed.
+        """
+        if self.boards.bitboards[PIECE_INDEX[Piece.W_KING]] == consts.EMPTY:
             self.game_state = GameState.BLACK_WINS
-        elif self.boards.pieces[Side.BLACK][PieceType.KING] == consts.EMPTY:
+        elif self.boards.bitboards[PIECE_INDEX[Piece.B_KING]] == consts.EMPTY:
             self.game_state = GameState.WHITE_WINS
-        elif self.halfmove_clock >= 50 or len(self.generate_moves()) == 0:
+        elif self.halfmove_clock >= 50 or self.repetition_count() >= REPETITION_DRAW or not self.has_moves():
             self.game_state = GameState.STALEMATE
+        else:
+            self.game_state = GameState.ONGOING
+
+    def repetition_count(self) -> int:
+        """ Returns the number of times the current position has occurred,
+            including now, by Zobrist hash. The count is kept up to date by
+            make_move and unmake_move, so this is a single lookup. Positions
+            from before the history was last reset (e.g., by restore) aren't
+            counted.
+        """
+        return self._repetitions.get(self.zbr, 0) + 1
 
     def skip_move(self, until: Side=None):
-        """ Advanced the turn order without making a move. En passant state is preserved,
-            move counts aren't updated.
+        """ Advanced the turn order without making a move (a null move). En
+            passant state is preserved, move counts aren't updated. If until
+            is given, turns are skipped until it's that side's turn. Only the
+            turn term of the hash changes, so it's updated with a single XOR
+            per turn from zobrist.TURN_DELTAS. See unskip_move.
         """
+        # The side to move changes, so the game state and move lists must be
+        # resolved again.
+        self._game_state = None
+        self._move_lists.clear()
         if until is None:
-            previous = self.turn
-            self.turn = sides.next_turn(self.turn)
-            self.zbr = zbr_update(self.zbr, (
-                PositionProperties(turn=previous, castle_rights=self.castle_rights, en_passant=self.en_passant),
-                PositionProperties(turn=self.turn, castle_rights=self.castle_rights, en_passant=self.en_passant)
-            ))
+            self.zbr ^= TURN_DELTAS[self.turn]
+            if self.zbr_verify is not None:
+                self.zbr_verify ^= VERIFICATION_TURN_DELTAS[self.turn]
+            self.turn = NEXT_TURN[self.turn]
         else:
             while self.turn != until:
-                previous = self.turn
-                self.turn = sides.next_turn(self.turn)
-                self.zbr = zbr_update(self.zbr, (
-                    PositionProperties(turn=previous, castle_rights=self.castle_rights, en_passant=self.en_passant),
-                    PositionProperties(turn=self.turn, castle_rights=self.castle_rights, en_passant=self.en_passant)
-                ))
-
-    def generate_moves(self, pseudo: bool=False):
+                self.skip_move()
+
+    def unskip_move(self):
+        """ Reverts a single skip_move. Note that unmake_move restores the
+            turn and hash too, so a skip directly after make_move doesn't
+            need to be reverted separately.
+        """
+        self._game_state = None
+        self._move_lists.clear()
+        self.turn = PREVIOUS_TURN[self.turn]
+        self.zbr ^= TURN_DELTAS[self.turn]
+        if self.zbr_verify is not None:
+            self.zbr_verify ^= VERIFICATION_TURN_DELTAS[self.turn]
+
+    def __side_bitboards(self, side: Side) -> list[int]:
+        """ Returns [allies, enemies, pawns, knights, bishops, rooks, queens,
+            kings] bitboards for the given side.
+        """
+        bitboards = self.boards.bitboards
+        side_index = SIDE_INDEX[side]
+        return [
+            bitboards[side_index],
+            bitboards[side_index ^ BLACK_INDEX],
+            *bitboards[side_index + 1:side_index + 7]
+        ]
+
+    def generate_moves(self, pseudo: bool=False, packed: bool=False):
         """ Returns a list of valid moves in the position. If
             pseudo is true, the duck is ignored and a pseudolegal move
-            list is generated instead.
+            list is generated instead. If packed is true, moves are
+            returned as packed integers rather than Move objects (see
+            moves.pack_move). Both lists come from the same generation
+            pass (see generate_move_lists), so asking for one after the
+            other is only a copy.
+        """
+        if pseudo:
+            return list(self.__pseudo_moves(packed))
+        return list(self.generate_move_lists(packed)[1])
+
+    def generate_move_lists(self, packed: bool=False) -> tuple[list, list]:
+        """ Returns a (pseudolegal, legal) pair of move lists for the
+            position. Moves are generated once with the duck ignored, and
+            the legal list is derived by dropping moves that land on or pass
+            through the duck (including castles it blocks). The lists are
+            cached until the position or side to move changes, so treat them
+            as read-only.
+        """
+        pseudo_moves = self.__pseudo_moves(packed)
+        key = (packed, False)
+        legal_moves = self.__cached_moves(key)
+        if legal_moves is not None:
+            return pseudo_moves, legal_moves
+
+        duck = self.boards.duck
+        if duck == EMPTY:
+            legal_moves = pseudo_moves
+        else:
+            duck_index = utils.ls1b_index(duck)
+            legal_moves = []
+            for move in pseudo_moves:
+                if packed:
+                    from_index, to_index = move & 0x7F, (move >> 7) & 0x7F
+                else:
+                    from_index, to_index = move.from_index, move.to_index
+                if to_index == duck_index:
+                    continue
+                # Castles have no squares set, so check their blockers.
+                if from_index is None or from_index == NO_SQUARE:
+                    castle = \
+                        CASTLING_KINGSIDE if move_fields(move)[0] == MoveType.CASTLE_KINGSIDE \
+                        else CASTLING_QUEENSIDE
+                    if castle[self.turn]["BLOCKERS"] & duck:
+                        continue
+                elif tables.BETWEEN[from_index][to_index] & duck:
+                    continue
+                legal_moves.append(move)
+
+        self.__cache_moves(key, legal_moves)
+        return pseudo_moves, legal_moves
+
+    def __pseudo_moves(self, packed: bool) -> list:
+        """ Generates (and caches) the pseudolegal move list, i.e., the
+            moves available with the duck removed from the board.
+        """
+        key = (packed, True)
+        moves = self.__cached_moves(key)
+        if moves is not None:
+            return moves
+
+        occupation = self.boards.occupied ^ self.boards.duck
+
+        # Just the duck moves if it's a duck turn.
+        if self.turn in (Side.WHITE_DUCK, Side.BLACK_DUCK):
+            moves = duck_moves(self.boards.duck, occupation, packed)
+        else:
+            # Set bitboards to use based on the current turn.
+            allies, enemies, pawns, knights, bishops, rooks, queens, kings = \
+                self.__side_bitboards(self.turn)
+
+            # Generate the moves.
+            moves = []
+            moves += pawn_captures(pawns,   enemies,    self.turn, packed)
+            moves += pawn_pushes  (pawns,   occupation, self.turn, packed)
+            moves += knight_moves (knights, occupation, allies, packed)
+            moves += bishop_moves (bishops, occupation, allies, packed)
+            moves += rook_moves   (rooks,   occupation, allies, packed)
+            moves += queen_moves  (queens,  occupation, allies, packed)
+            moves += king_moves   (kings,   occupation, allies, packed)
+            moves += castling     (occupation, self.castle_rights, self.turn, packed)
+
+        self.__cache_moves(key, moves)
+        return moves
+
+    def __cached_moves(self, key: tuple) -> list:
+        """ Returns a move list cached for this ply or, failing that, in the
+            move cache (if one is attached). Returns None if neither has it.
+        """
+        moves = self._move_lists.get(key)
+        if moves is None and self.move_cache is not None:
+            moves = self.move_cache.get((self.zbr, *key), self.zbr_verify)
+            if moves is not None:
+                self._move_lists[key] = moves
+        return moves
+
+    def __cache_moves(self, key: tuple, moves: list):
+        """ Caches a move list for this ply, and in the move cache if one
+            is attached.
+        """
+        self._move_lists[key] = moves
+        if self.move_cache is not None:
+            self.move_cache.put((self.zbr, *key), moves, self.zbr_verify)
+
+    def generate_moves_staged(self, pseudo: bool=False, packed: bool=False):
+        """ Yields the same moves as generate_moves, but lazily and in stages:
+            king captures first, then other captures, then promotions, then
+            quiet moves. A search can stop consuming the generator (e.g., on a
+            beta cutoff) without paying for the later stages.
         """
         occupation = self.boards.occupied ^ (self.boards.duck if pseudo else EMPTY)
-        duck = self.boards.duck if not pseudo else EMPTY
 
-        # Return just the duck moves if it's a duck turn.
+        # Just the duck moves if it's a duck turn.
         if self.turn in (Side.WHITE_DUCK, Side.BLACK_DUCK):
-            return duck_moves(self.boards.duck, occupation)
-        
+            yield from duck_moves(self.boards.duck, occupation, packed)
+            return
+
         # Set bitboards to use based on the current turn.
-        pieces = self.boards.pieces[self.turn]
-        allies = self.boards.white if self.turn == Side.WHITE else self.boards.black
-        enemies = self.boards.white if self.turn == Side.BLACK else self.boards.black
-
-        # Generate the moves.
-        moves = []
-        moves += pawn_captures(pieces[PieceType.PAWN],   enemies,    self.turn)
-        moves += pawn_pushes  (pieces[PieceType.PAWN],   occupation, self.turn)
-        moves += knight_moves (pieces[PieceType.KNIGHT], occupation, allies | duck)
-        moves += bishop_moves (pieces[PieceType.BISHOP], occupation, allies | duck)
-        moves += rook_moves   (pieces[PieceType.ROOK],   occupation, allies | duck)
-        moves += queen_moves  (pieces[PieceType.QUEEN],  occupation, allies | duck)
-        moves += king_moves   (pieces[PieceType.KING],   occupation, allies | duck)
-        moves += castling     (occupation, self.castle_rights, self.turn)
+        _, enemies, pawns, knights, bishops, rooks, queens, kings = \
+            self.__side_bitboards(self.turn)
+        enemy_king = self.boards.bitboards[SIDE_INDEX[opposing_side(self.turn)] + TYPE_INDEX[PieceType.KING]]
+        promoting = pawns & (RANK_7 if self.turn == Side.WHITE else RANK_2)
 
-        return moves
+        # Captures - blocking every square but the targets restricts
+        # each generator to captures only.
+        for targets in (enemy_king, enemies ^ enemy_king):
+            if targets == EMPTY:
+                continue
+            blockers = utils.invert(targets)
+            yield from pawn_captures(pawns,   targets,    self.turn, packed)
+            yield from knight_moves (knights, occupation, blockers, packed)
+            yield from bishop_moves (bishops, occupation, blockers, packed)
+            yield from rook_moves   (rooks,   occupation, blockers, packed)
+            yield from queen_moves  (queens,  occupation, blockers, packed)
+            yield from king_moves   (kings,   occupation, blockers, packed)
+
+        # Promotions
+        yield from pawn_pushes(promoting, occupation, self.turn, packed)
+
+        # Quiet moves - blocking every occupied square excludes captures.
+        yield from pawn_pushes  (pawns ^ promoting, occupation, self.turn, packed)
+        yield from knight_moves (knights, occupation, occupation, packed)
+        yield from bishop_moves (bishops, occupation, occupation, packed)
+        yield from rook_moves   (rooks,   occupation, occupation, packed)
+        yield from queen_moves  (queens,  occupation, occupation, packed)
+        yield from king_moves   (kings,   occupation, occupation, packed)
+        yield from castling     (occupation, self.castle_rights, self.turn, packed)
+
+    def register_weights(self, name: str, table: dict) -> list:
+        """ Registers a weight table (see weights.build_weights) under name,
+            and returns its [white, black] totals for the current position.
+            The totals are kept up to date by make_move and unmake_move, so
+            evaluation terms such as material or piece-square scores can be
+            read with weight_totals instead of walking the bitboards.
+        """
+        weights = build_weights(table)
+        totals = weight_totals(self.boards.bitboards, weights)
+        self._weights[name] = (weights, totals)
+        self._accumulators = list(self._weights.values())
+        return totals
+
+    def unregister_weights(self, name: str):
+        """ Stops maintaining the weight table registered under name.
+        """
+        self._weights.pop(name, None)
+        self._accumulators = list(self._weights.values())
+
+    def weight_totals(self, name: str) -> list:
+        """ Returns the [white, black] totals of the weight table registered
+            under name, or None if there isn't one. Don't modify the list.
+        """
+        entry = self._weights.get(name)
+        return entry[1] if entry else None
+
+    def enable_verification(self) -> int:
+        """ Starts maintaining a verification hash (see
+            zobrist.zbr_verification) in zbr_verify, alongside the Zobrist
+            hash, and returns it. The move cache checks its entries against
+            it, so entries stored under a colliding hash are rejected. The
+            history is updated too, so earlier moves can still be unmade.
+        """
+        self.zbr_verify = zbr_verification(self)
+        # Walk back through the history, undoing each move's terms from the
+        # position after it (the next row, or the current position).
+        history = self.history
+        verify = self.zbr_verify
+        turn, castle_rights, en_passant = self.turn, self.castle_rights, self.en_passant
+        for ply in range(len(history) - 1, 0, -1):
+            previous_turn = history.get_turn(ply)
+            previous_rights = history.castle_rights[ply]
+            previous_en_passant = history.en_passant[ply]
+            move_type, piece, from_index, to_index, promotion = move_fields(history.move[ply])
+            # As in make_move, the duck's previous square comes from its board.
+            if move_type == _DUCK_MOVE:
+                duck = history.duck[ply]
+                from_index = duck.bit_length() - 1 if duck else None
+            verify ^= VERIFICATION_TURN_KEYS[previous_turn] ^ VERIFICATION_TURN_KEYS[turn] \
+                ^ VERIFICATION_CASTLING_KEYS[previous_rights ^ castle_rights] \
+                ^ VERIFICATION_EN_PASSANT_KEYS[previous_en_passant.bit_length()] \
+                ^ VERIFICATION_EN_PASSANT_KEYS[en_passant.bit_length()] \
+                ^ zbr_verification_move(
+                    previous_turn, move_type, piece, from_index, to_index, promotion, history.capture[ply]
+                )
+            history.verification[ply] = verify
+            turn, castle_rights, en_passant = previous_turn, previous_rights, previous_en_passant
+        history.verification[0] = verify
+        return self.zbr_verify
+
+    def disable_verification(self):
+        """ Stops maintaining the verification hash.
+        """
+        self.zbr_verify = None
+
+    def attacks_by(self, side: Side, piece_type: PieceType) -> int:
+        """ Returns a bitboard of the squares attacked by the given side's
+            pieces of the given type. The duck blocks sliding pieces. Maps are
+            computed set-wise on first access and cached until the position
+            changes.
+        """
+        key = (side, piece_type)
+        result = self._attacks.get(key)
+        if result is None:
+            result = attacks.piece_attacks(
+                piece_type,
+                self.boards.bitboards[SIDE_INDEX[side] + TYPE_INDEX[piece_type]],
+                self.boards.bitboards[OCCUPIED_INDEX],
+                side
+            )
+            self._attacks[key] = result
+        return result
+
+    def attacks(self, side: Side) -> int:
+        """ Returns a bitboard of all squares attacked by the given side.
+            Cached in the same way as attacks_by.
+        """
+        key = (side, None)
+        result = self._attacks.get(key)
+        if result is None:
+            result = EMPTY
+            for piece_type in PIECE_TYPES:
+                result |= self.attacks_by(side, piece_type)
+            self._attacks[key] = result
+        return result
+
+    def duck_targets(self, candidates: int=FILLED) -> int:
+        """ Returns a bitboard of the squares the duck can be placed on,
+            optionally restricted to a set of candidate squares. Callers can
+            pick placements with bit operations instead of generating a
+            Move per square.
+        """
+        return duck_targets(self.boards.occupied, candidates)
+
+    def duck_move(self, square: int, packed: bool=False) -> Move | int:
+        """ Returns the move placing the duck on the given square index.
+        """
+        build = pack_move if packed else Move
+        return build(MoveType.DUCK, PieceType.DUCK, utils.ls1b_index(self.boards.duck), square)
+
+    def place_duck(self, square: int):
+        """ Places the duck on the given square index. Equivalent to making
+            the corresponding duck move.
+        """
+        self.make_move(self.duck_move(square, packed=True))
+
+    def has_moves(self, pseudo: bool=False) -> bool:
+        """ Returns True if there is at least one valid move in the position.
+            Cheap set-wise checks are tried first, and the probe exits as soon
+            as any move is found rather than building the full move list.
+        """
+        occupation = self.boards.occupied ^ (self.boards.duck if pseudo else EMPTY)
+        duck = self.boards.duck if not pseudo else EMPTY
+
+        # The duck can move to any empty square.
+        if self.turn in (Side.WHITE_DUCK, Side.BLACK_DUCK):
+            return occupation != FILLED
+
+        allies, enemies, pawns, knights, bishops, rooks, queens, kings = \
+            self.__side_bitboards(self.turn)
+        blockers = allies | duck
+        empty = utils.invert(occupation)
+
+        # Pawn pushes and captures
+        if self.turn == Side.WHITE:
+            if utils.north(pawns) & empty:
+                return True
+            if (utils.nwest(pawns) | utils.neast(pawns)) & enemies:
+                return True
+        else:
+            if utils.south(pawns) & empty:
+                return True
+            if (utils.swest(pawns) | utils.seast(pawns)) & enemies:
+                return True
+
+        # Kings and knights
+        for king in utils.get_squares(kings):
+            if KING_TEMPLATES[king] & utils.invert(blockers):
+                return True
+        for knight in utils.get_squares(knights):
+            if KNIGHT_TEMPLATES[knight] & utils.invert(blockers):
+                return True
+
+        # Sliding pieces and castling
+        return bool(
+               bishop_moves(bishops, occupation, blockers)
+            or rook_moves  (rooks,   occupation, blockers)
+            or queen_moves (queens,  occupation, blockers)
+            or castling    (occupation, self.castle_rights, self.turn)
+        )
 
     def __move_piece(self, from_index: int, to_index: int, piece: PieceType):
         """ Helper function to move a piece and update the mailbox accordingly.
         """
         from_mask = squares.masks[from_index]
         to_mask = squares.masks[to_index]
-        # Move the piece
-        self.boards.pieces[self.turn][piece] ^= from_mask | to_mask
-        if self.turn == sides.Side.WHITE:
-            self.boards.white ^= from_mask | to_mask
-        elif self.turn == sides.Side.BLACK:
-            self.boards.black ^= from_mask | to_mask
+        # Move the piece, and update its side's bitboard
+        bitboards = self.boards.bitboards
+        side_index = SIDE_INDEX[self.turn]
+        bitboards[side_index + TYPE_INDEX[piece]] ^= from_mask | to_mask
+        bitboards[side_index] ^= from_mask | to_mask
+        # Update weight totals
+        if self._accumulators:
+            base = (side_index + TYPE_INDEX[piece]) << 6
+            for weights, totals in self._accumulators:
+                totals[side_index >> 3] += weights[base | to_index] - weights[base | from_index]
         # Update the mailbox
-        self.mailbox[from_index] = Piece.EMPTY
+        self.mailbox[from_index] = _NO_PIECE
         self.mailbox[to_index] = piece | self.turn
 
     def __move_and_change_piece(self, from_index: int, to_index: int, from_piece: PieceType, to_piece: PieceType):
@@ -329,14 +1102,19 @@ class Board:
         from_mask = squares.masks[from_index]
         to_mask = squares.masks[to_index]
         # Remove the old piece, add the new piece
-        self.boards.pieces[self.turn][from_piece] &= utils.invert(from_mask)
-        self.boards.pieces[self.turn][to_piece] |= to_mask
-        if self.turn == sides.Side.WHITE:
-            self.boards.white ^= from_mask | to_mask
-        elif self.turn == sides.Side.BLACK:
-            self.boards.black ^= from_mask | to_mask
+        bitboards = self.boards.bitboards
+        side_index = SIDE_INDEX[self.turn]
+        bitboards[side_index + TYPE_INDEX[from_piece]] &= ~from_mask
+        bitboards[side_index + TYPE_INDEX[to_piece]] |= to_mask
+        bitboards[side_index] ^= from_mask | to_mask
+        # Update weight totals
+        if self._accumulators:
+            from_base = (side_index + TYPE_INDEX[from_piece]) << 6
+            to_base = (side_index + TYPE_INDEX[to_piece]) << 6
+            for weights, totals in self._accumulators:
+                totals[side_index >> 3] += weights[to_base | to_index] - weights[from_base | from_index]
         # Update the mailbox
-        self.mailbox[from_index] = Piece.EMPTY
+        self.mailbox[from_index] = _NO_PIECE
         self.mailbox[to_index] = to_piece | self.turn
 
     def __add_piece(self, add_index: int, side: Side, piece: Piece):
@@ -344,11 +1122,15 @@ class Board:
             captures).
         """
         add_mask = squares.masks[add_index]
-        self.boards.pieces[side][piece & PIECE_MASK] |= add_mask
-        if side == sides.Side.WHITE:
-            self.boards.white |= add_mask
-        elif side == sides.Side.BLACK:
-            self.boards.black |= add_mask
+        bitboards = self.boards.bitboards
+        side_index = SIDE_INDEX[side]
+        bitboards[side_index + TYPE_INDEX[piece & PIECE_MASK]] |= add_mask
+        bitboards[side_index] |= add_mask
+        # Update weight totals
+        if self._accumulators:
+            base = (side_index + TYPE_INDEX[piece & PIECE_MASK]) << 6
+            for weights, totals in self._accumulators:
+                totals[side_index >> 3] += weights[base | add_index]
         self.mailbox[add_index] = piece | side
 
     def __remove_piece(self, capture_index: int) -> Piece:
@@ -358,279 +1140,323 @@ class Board:
         # Identify the captured piece and store in properties
         capture_mask = squares.masks[capture_index]
         captured_piece = self.mailbox[capture_index]
-        captured_type = captured_piece & PIECE_MASK
         # Remove the captured piece
-        self.boards.pieces[opposing_side(self.turn)][captured_type] &= utils.invert(capture_mask)
-        if self.turn == sides.Side.WHITE:
-            self.boards.black &= utils.invert(capture_mask)
-        elif self.turn == sides.Side.BLACK:
-            self.boards.white &= utils.invert(capture_mask)
-        self.mailbox[capture_index] = Piece.EMPTY
+        bitboards = self.boards.bitboards
+        bitboards[PIECE_INDEX[captured_piece]] &= ~capture_mask
+        bitboards[SIDE_INDEX[OPPOSING_SIDE[self.turn]]] &= ~capture_mask
+        # Update weight totals
+        if self._accumulators:
+            base = PIECE_INDEX[captured_piece] << 6
+            slot = SIDE_INDEX[OPPOSING_SIDE[self.turn]] >> 3
+            for weights, totals in self._accumulators:
+                totals[slot] -= weights[base | capture_index]
+        self.mailbox[capture_index] = _NO_PIECE
         return captured_piece
 
-    def __update_castling_rights(self, move: Move):
+    def __update_castling_rights(self, from_index: int, to_index: int, piece: PieceType):
         """ Helper function to update castling rights based on a move.
         """
-        from_mask = squares.masks[move.from_index]
-        to_mask = squares.masks[move.to_index]
+        from_mask = squares.masks[from_index]
+        to_mask = squares.masks[to_index]
 
-        self.castle_rights &= utils.invert(from_mask)
-        self.castle_rights &= utils.invert(to_mask)
+        self.castle_rights &= ~from_mask
+        self.castle_rights &= ~to_mask
 
-        if move.piece == PieceType.KING:
-                if self.turn == Side.WHITE:
-                    self.castle_rights &= utils.invert(consts.RANK_1)
-                elif self.turn == Side.BLACK:
-                    self.castle_rights &= utils.invert(consts.RANK_8)
+        if piece == _KING:
+                if self.turn == _WHITE:
+                    self.castle_rights &= ~consts.RANK_1
+                elif self.turn == _BLACK:
+                    self.castle_rights &= ~consts.RANK_8
 
-    def make_move(self, move: Move):
-        """ Applies the provided move to the board.
-            IMPORTANT: This method assumes a legal move is passed.
+    def __castle(self, king_from: int, king_to: int, rook_from: int, rook_to: int, king_mask: int, rook_mask: int):
+        """ Helper function to move the king and rook of a castle (see
+            _CASTLES). Unmaking a castle swaps the from/to squares; the masks
+            are the same both ways.
         """
+        bitboards = self.boards.bitboards
+        side_index = SIDE_INDEX[self.turn]
+        bitboards[side_index + _KING_OFFSET] ^= king_mask
+        bitboards[side_index + _ROOK_OFFSET] ^= rook_mask
+        bitboards[side_index] ^= king_mask | rook_mask
+        # Update weight totals
+        if self._accumulators:
+            king_base = (side_index + _KING_OFFSET) << 6
+            rook_base = (side_index + _ROOK_OFFSET) << 6
+            for weights, totals in self._accumulators:
+                totals[side_index >> 3] += \
+                      weights[king_base | king_to] - weights[king_base | king_from] \
+                    + weights[rook_base | rook_to] - weights[rook_base | rook_from]
+        # Update the mailbox
+        mailbox = self.mailbox
+        mailbox[king_from] = mailbox[rook_from] = _NO_PIECE
+        mailbox[king_to] = _KING | self.turn
+        mailbox[rook_to] = _ROOK | self.turn
+
+    # Move handlers
+    # make_move and unmake_move look up a handler by turn and move type (see
+    # _handler_tables). Make handlers return the captured piece, if any.
+    def __make_quiet(self, from_index: int, to_index: int, piece: int, promotion: int) -> int:
+        self.__move_piece(from_index, to_index, piece)
+        self.en_passant = EMPTY
+        if self.castle_rights:
+            self.__update_castling_rights(from_index, to_index, piece)
+        return _NO_PIECE
+
+    def __make_double_pawn(self, from_index: int, to_index: int, piece: int, promotion: int) -> int:
+        self.__move_piece(from_index, to_index, piece)
+        # The en passant square is the one the pawn skipped
+        self.en_passant = squares.masks[(from_index + to_index) >> 1]
+        return _NO_PIECE
+
+    def __make_capture(self, from_index: int, to_index: int, piece: int, promotion: int) -> int:
+        capture = self.__remove_piece(to_index)
+        self.__move_piece(from_index, to_index, piece)
+        self.en_passant = EMPTY
+        if self.castle_rights:
+            self.__update_castling_rights(from_index, to_index, piece)
+        return capture
+
+    def __make_promotion(self, from_index: int, to_index: int, piece: int, promotion: int) -> int:
+        self.__move_and_change_piece(from_index, to_index, piece, promotion)
+        self.en_passant = EMPTY
+        return _NO_PIECE
+
+    def __make_capture_promotion(self, from_index: int, to_index: int, piece: int, promotion: int) -> int:
+        capture = self.__remove_piece(to_index)
+        self.__move_and_change_piece(from_index, to_index, piece, promotion)
+        self.en_passant = EMPTY
+        if self.castle_rights:
+            self.__update_castling_rights(from_index, to_index, piece)
+        return capture
+
+    def __make_en_passant(self, from_index: int, to_index: int, piece: int, promotion: int, behind: int) -> int:
+        capture = self.__remove_piece(to_index + behind)
+        self.__move_piece(from_index, to_index, piece)
+        self.en_passant = EMPTY
+        return capture
+
+    def __make_castle(self, from_index: int, to_index: int, piece: int, promotion: int, castle: tuple) -> int:
+        king_from, king_to, rook_from, rook_to, king_mask, rook_mask, rights = castle
+        self.__castle(king_from, king_to, rook_from, rook_to, king_mask, rook_mask)
+        self.castle_rights &= rights
+        self.en_passant = EMPTY
+        return _NO_PIECE
+
+    def __make_duck(self, from_index: int, to_index: int, piece: int, promotion: int) -> int:
+        self.boards.bitboards[DUCK_INDEX] = squares.masks[to_index]
+        return _NO_PIECE
+
+    # Unmake handlers take the captured piece and the duck's previous
+    # bitboard as well.
+    def __unmake_move_piece(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int):
+        self.__move_piece(to_index, from_index, piece)
+
+    def __unmake_capture(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int):
+        self.__move_piece(to_index, from_index, piece)
+        self.__add_piece(to_index, OPPOSING_SIDE[self.turn], capture)
+
+    def __unmake_promotion(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int):
+        self.__move_and_change_piece(to_index, from_index, promotion, _PAWN)
+
+    def __unmake_capture_promotion(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int):
+        self.__move_and_change_piece(to_index, from_index, promotion, _PAWN)
+        self.__add_piece(to_index, OPPOSING_SIDE[self.turn], capture)
+
+    def __unmake_en_passant(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int, behind: int):
+        self.__move_piece(to_index, from_index, piece)
+        self.__add_piece(to_index + behind, OPPOSING_SIDE[self.turn], capture)
+
+    def __unmake_castle(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int, castle: tuple):
+        king_from, king_to, rook_from, rook_to, king_mask, rook_mask, _ = castle
+        self.__castle(king_to, king_from, rook_to, rook_from, king_mask, rook_mask)
+
+    def __unmake_duck(self, from_index: int, to_index: int, piece: int, promotion: int, capture: int, duck: int):
+        self.boards.bitboards[DUCK_INDEX] = duck
+
+    __make_handlers = _handler_tables(
+        {
+            MoveType.QUIET:             __make_quiet,
+            MoveType.DOUBLE_PAWN:       __make_double_pawn,
+            MoveType.CAPTURE:           __make_capture,
+            MoveType.PROMOTION:         __make_promotion,
+            MoveType.CAPTURE_PROMOTION: __make_capture_promotion,
+            MoveType.DUCK:              __make_duck
+        },
+        {
+            MoveType.EN_PASSANT:       partial(__make_en_passant, behind=_SOUTH),
+            MoveType.CASTLE_KINGSIDE:  partial(__make_castle, castle=_CASTLES[Side.WHITE, MoveType.CASTLE_KINGSIDE]),
+            MoveType.CASTLE_QUEENSIDE: partial(__make_castle, castle=_CASTLES[Side.WHITE, MoveType.CASTLE_QUEENSIDE])
+        },
+        {
+            MoveType.EN_PASSANT:       partial(__make_en_passant, behind=_NORTH),
+            MoveType.CASTLE_KINGSIDE:  partial(__make_castle, castle=_CASTLES[Side.BLACK, MoveType.CASTLE_KINGSIDE]),
+            MoveType.CASTLE_QUEENSIDE: partial(__make_castle, castle=_CASTLES[Side.BLACK, MoveType.CASTLE_QUEENSIDE])
+        }
+    )
+    __unmake_handlers = _handler_tables(
+        {
+            MoveType.QUIET:             __unmake_move_piece,
+            MoveType.DOUBLE_PAWN:       __unmake_move_piece,
+            MoveType.CAPTURE:           __unmake_capture,
+            MoveType.PROMOTION:         __unmake_promotion,
+            MoveType.CAPTURE_PROMOTION: __unmake_capture_promotion,
+            MoveType.DUCK:              __unmake_duck
+        },
+        {
+            MoveType.EN_PASSANT:       partial(__unmake_en_passant, behind=_SOUTH),
+            MoveType.CASTLE_KINGSIDE:  partial(__unmake_castle, castle=_CASTLES[Side.WHITE, MoveType.CASTLE_KINGSIDE]),
+            MoveType.CASTLE_QUEENSIDE: partial(__unmake_castle, castle=_CASTLES[Side.WHITE, MoveType.CASTLE_QUEENSIDE])
+        },
+        {
+            MoveType.EN_PASSANT:       partial(__unmake_en_passant, behind=_NORTH),
+            MoveType.CASTLE_KINGSIDE:  partial(__unmake_castle, castle=_CASTLES[Side.BLACK, MoveType.CASTLE_KINGSIDE]),
+            MoveType.CASTLE_QUEENSIDE: partial(__unmake_castle, castle=_CASTLES[Side.BLACK, MoveType.CASTLE_QUEENSIDE])
+        }
+    )
+
+    def __resolve_move(self, move: Move | int) -> tuple:
+        """ Works out the move type and piece of a manual move (or a move
+            without a piece) from the position, and stores them in the move
+            so it can be unmade. Returns (move, move_type, piece); packed
+            moves are repacked.
+        """
+        move_type, piece, from_index, to_index, promotion = move_fields(move)
+
         # Work out the move type if needed
-        if move.move_type == MoveType.MANUAL:
-            if (self.mailbox[move.from_index] & PIECE_MASK) == PieceType.PAWN:
-                if utils.ls1b_index(self.en_passant) == move.to_index:
-                    move.move_type = MoveType.EN_PASSANT
-                elif move.promotion:
-                    if self.mailbox[move.to_index] != Piece.EMPTY:
-                        move.move_type = MoveType.CAPTURE_PROMOTION
-                    else:
-                        move.move_type = MoveType.PROMOTION
-                elif abs(move.from_index - move.to_index) == utils.Direction.NORTH * 2:
-                    move.move_type = MoveType.DOUBLE_PAWN
-            elif self.mailbox[move.to_index] != Piece.EMPTY:
-                move.move_type = MoveType.CAPTURE
+        if move_type == _MANUAL:
+            pawn = (self.mailbox[from_index] & PIECE_MASK) == _PAWN
+            if pawn and utils.ls1b_index(self.en_passant) == to_index:
+                move_type = _EN_PASSANT
+            elif pawn and promotion:
+                if self.mailbox[to_index] != _NO_PIECE:
+                    move_type = _CAPTURE_PROMOTION
+                else:
+                    move_type = _PROMOTION
+            elif pawn and abs(from_index - to_index) == utils.Direction.NORTH * 2:
+                move_type = _DOUBLE_PAWN
+            elif self.mailbox[to_index] != _NO_PIECE:
+                move_type = _CAPTURE
             else:
-                move.move_type = MoveType.QUIET
-
-        # Build new position properties object
-        properties = PositionProperties(
-            game_state=self.game_state,
-            turn=self.turn,
-            duck=self.boards.duck,
-            castle_rights=self.castle_rights,
-            en_passant=self.en_passant,
-            halfmove_clock=self.halfmove_clock,
-            fullmove_count=self.fullmove_count,
-            capture=Piece.EMPTY,
-            move=move,
-            zbr=self.zbr
-        )
+                move_type = _QUIET
 
-        # Set piece type if not already known (i.e., for manual moves)
-        if not move.piece:
-            move.piece = self.mailbox[move.from_index] & PIECE_MASK
-
-        # Get from/to masks
-        if move.from_index is not None:
-            from_mask = squares.masks[move.from_index]
-        if move.to_index is not None:
-            to_mask = squares.masks[move.to_index]
-
-        # Quiet moves
-        if move.move_type == MoveType.QUIET:
-            # Move the piece
-            self.__move_piece(move.from_index, move.to_index, move.piece)
-            # Unset en passant
-            self.en_passant = EMPTY
-            # Update castling rights if needed
-            self.__update_castling_rights(move)
-        # Double pawn moves
-        elif move.move_type == MoveType.DOUBLE_PAWN:
-            # Move the piece
-            self.__move_piece(move.from_index, move.to_index, move.piece)
-            # Set en passant square
-            self.en_passant = \
-                utils.south(to_mask) if self.turn == Side.WHITE \
-                else utils.north(to_mask)
-        # Captures
-        elif move.move_type == MoveType.CAPTURE:
-            # Remove the captured piece and store in properties
-            properties.capture = self.__remove_piece(move.to_index)
-            # Move the piece
-            self.__move_piece(move.from_index, move.to_index, move.piece)
-            # Unset en passant
-            self.en_passant = EMPTY
-            # Update castling rights if needed
-            self.__update_castling_rights(move)
-        # Promotions
-        elif move.move_type == MoveType.PROMOTION:
-            self.__move_and_change_piece(
-                move.from_index,
-                move.to_index,
-                move.piece,
-                move.promotion
-            )
-            # Unset en passant
-            self.en_passant = EMPTY
-        # En Passant
-        elif move.move_type == MoveType.EN_PASSANT:
-            # Remove the captured piece and store in properties
-            capture_mask = \
-                utils.south(to_mask) if self.turn == Side.WHITE \
-                else utils.north(to_mask)
-            capture_index = utils.ls1b_index(capture_mask)
-            properties.capture = self.__remove_piece(capture_index)
-            # Move the piece
-            self.__move_piece(move.from_index, move.to_index, move.piece)
-            # Unset en passant
-            self.en_passant = EMPTY
-        # Capture promotions
-        elif move.move_type == MoveType.CAPTURE_PROMOTION:
-            # Remove the captured piece and store in properties
-            properties.capture = self.__remove_piece(move.to_index)
-            # Perform the promotion
-            self.__move_and_change_piece(
-                move.from_index,
-                move.to_index,
-                move.piece,
-                move.promotion
-            )
-            # Unset en passant
-            self.en_passant = EMPTY
-            # Update castling rights if needed
-            self.__update_castling_rights(move)
-        # Kingside Castling
-        elif move.move_type == MoveType.CASTLE_KINGSIDE:
-            if self.turn == Side.WHITE:
-                self.__move_piece(squares.e1, squares.g1, PieceType.KING)
-                self.__move_piece(squares.h1, squares.f1, PieceType.ROOK)
-                self.castle_rights &= utils.invert(consts.RANK_1)
-            elif self.turn == Side.BLACK:
-                self.__move_piece(squares.e8, squares.g8, PieceType.KING)
-                self.__move_piece(squares.h8, squares.f8, PieceType.ROOK)
-                self.castle_rights &= utils.invert(consts.RANK_8)
-            # Unset en passant
-            self.en_passant = EMPTY
-        # Queenside Castling
-        elif move.move_type == MoveType.CASTLE_QUEENSIDE:
-            if self.turn == Side.WHITE:
-                self.__move_piece(squares.e1, squares.c1, PieceType.KING)
-                self.__move_piece(squares.a1, squares.d1, PieceType.ROOK)
-                self.castle_rights &= utils.invert(consts.RANK_1)
-            elif self.turn == Side.BLACK:
-                self.__move_piece(squares.e8, squares.c8, PieceType.KING)
-                self.__move_piece(squares.a8, squares.d8, PieceType.ROOK)
-                self.castle_rights &= utils.invert(consts.RANK_8)
-            # Unset en passant
-            self.en_passant = EMPTY
-        # Duck moves
-        elif move.move_type == MoveType.DUCK:
-            self.boards.duck = to_mask
-
-        # Update Zobrist hash and history
-        self.zbr = zbr_update(
-            self.zbr,
-            (self.history[-1], properties),
-            self.turn,
+        # Set piece type if not already known
+        if not piece:
+            piece = self.mailbox[from_index] & PIECE_MASK
+
+        if isinstance(move, Move):
+            move.move_type = MoveType(move_type)
+            move.piece = PieceType(piece)
+        else:
+            move = pack_move(move_type, piece, from_index, to_index, promotion)
+        return move, move_type, piece
+
+    def make_move(self, move: Move | int):
+        """ Applies the provided move to the board. The move may be a Move
+            object or a packed integer (see moves.pack_move).
+            IMPORTANT: This method assumes a legal move is passed.
+        """
+        move_type, piece, from_index, to_index, promotion = move_fields(move)
+        # Manual moves are resolved against the position first. Moves from
+        # the generators never need this.
+        if move_type == _MANUAL or not piece:
+            move, move_type, piece = self.__resolve_move(move)
+
+        # Keep the properties the move changes, for the history
+        turn = self.turn
+        duck = self.boards.bitboards[DUCK_INDEX]
+        castle_rights = self.castle_rights
+        en_passant = self.en_passant
+
+        capture = self.__make_handlers[turn][move_type](self, from_index, to_index, piece, promotion)
+
+        # Store the properties of the position before the move (move counts,
+        # game state and hash haven't been updated yet)
+        self.history.push(
+            self._game_state,
+            turn,
+            duck,
+            castle_rights,
+            en_passant,
+            self.halfmove_clock,
+            self.fullmove_count,
+            capture,
             move,
-            properties.capture
+            self.zbr,
+            self.zbr_verify or 0
         )
-        self.history.append(properties)
+        repetitions = self._repetitions
+        repetitions[self.zbr] = repetitions.get(self.zbr, 0) + 1
 
         # Update move counts, occupied board, turn and game state
-        if move.piece == PieceType.PAWN or (move.move_type & MoveType.CAPTURE):
+        if piece == _PAWN or (move_type & _CAPTURE):
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
-        if self.turn == Side.BLACK_DUCK:
+        if turn == _BLACK_DUCK:
             self.fullmove_count += 1
-        self.boards.occupied = self.boards.white | self.boards.black | self.boards.duck
-        self.turn = next_turn(self.turn)
-        self.update_game_state()
+        bitboards = self.boards.bitboards
+        bitboards[OCCUPIED_INDEX] = \
+            bitboards[WHITE_INDEX] | bitboards[BLACK_INDEX] | bitboards[DUCK_INDEX]
+        self.turn = NEXT_TURN[turn]
+        # Resolved lazily, see the game_state property.
+        self._game_state = None
+        self._attacks = {}
+        self._move_lists = {}
+
+        # Update Zobrist hash (from the properties before the move to those
+        # after it, see zobrist.zbr_update). Duck moves parsed from text have
+        # no from index, so the duck's previous square comes from its board.
+        if move_type == _DUCK_MOVE:
+            from_index = duck.bit_length() - 1 if duck else None
+        self.zbr ^= TURN_DELTAS[turn] \
+            ^ CASTLING_KEYS[castle_rights ^ self.castle_rights] \
+            ^ EN_PASSANT_KEYS[en_passant.bit_length()] \
+            ^ EN_PASSANT_KEYS[self.en_passant.bit_length()] \
+            ^ zbr_move(turn, move_type, piece, from_index, to_index, promotion, capture)
+        if self.zbr_verify is not None:
+            self.zbr_verify ^= VERIFICATION_TURN_DELTAS[turn] \
+                ^ VERIFICATION_CASTLING_KEYS[castle_rights ^ self.castle_rights] \
+                ^ VERIFICATION_EN_PASSANT_KEYS[en_passant.bit_length()] \
+                ^ VERIFICATION_EN_PASSANT_KEYS[self.en_passant.bit_length()] \
+                ^ zbr_verification_move(turn, move_type, piece, from_index, to_index, promotion, capture)
 
     def unmake_move(self):
         """ Reverts the last played move and restores position properties such
             as castling rights.
         """
         # If no moves have been played, do nothing
-        if len(self.history) <= 1:
+        history = self.history
+        if history.size <= 1:
             return
         
         # Get and restore position properties
-        properties: PositionProperties = self.history.pop()
-        self.game_state = properties.game_state
-        self.turn = properties.turn
-        self.castle_rights = properties.castle_rights
-        self.en_passant = properties.en_passant
-        self.halfmove_clock = properties.halfmove_clock
-        self.fullmove_count = properties.fullmove_count
-        self.zbr = properties.zbr
-
-        move: Move = properties.move
-
-        # Get from/to masks
-        if move.from_index is not None:
-            from_mask = squares.masks[move.from_index]
-        if move.to_index is not None:
-            to_mask = squares.masks[move.to_index]
-
-        # Quiet moves
-        if move.move_type == MoveType.QUIET:
-            # Move the piece back
-            self.__move_piece(move.to_index, move.from_index, move.piece)
-        # Double pawn moves
-        elif move.move_type == MoveType.DOUBLE_PAWN:
-            # Move the piece back
-            self.__move_piece(move.to_index, move.from_index, move.piece)
-        # Captures
-        elif move.move_type == MoveType.CAPTURE:
-            # Move the piece back
-            self.__move_piece(move.to_index, move.from_index, move.piece)
-            # Replace the captured piece
-            self.__add_piece(move.to_index, opposing_side(self.turn), properties.capture)
-        # Promotions
-        elif move.move_type == MoveType.PROMOTION:
-            # Move the piece back and turn it back to a pawn
-            self.__move_and_change_piece(
-                move.to_index,
-                move.from_index,
-                move.promotion,
-                PieceType.PAWN
-            )
-        # En Passant
-        elif move.move_type == MoveType.EN_PASSANT:
-            capture_mask = \
-                utils.south(to_mask) if self.turn == Side.WHITE \
-                else utils.north(to_mask)
-            capture_index = utils.ls1b_index(capture_mask)
-            # Move the pawn back and return the captured piece
-            self.__move_piece(move.to_index, move.from_index, move.piece)
-            self.__add_piece(capture_index, opposing_side(self.turn), properties.capture)
-        # Capture promotions
-        elif move.move_type == MoveType.CAPTURE_PROMOTION:
-            # Move the promoted piece back and turn it back to a pawn
-            self.__move_and_change_piece(
-                move.to_index,
-                move.from_index,
-                move.promotion,
-                PieceType.PAWN
-            )
-            # Return the captured piece
-            self.__add_piece(move.to_index, opposing_side(self.turn), properties.capture)
-        # Kingside Castling
-        elif move.move_type == MoveType.CASTLE_KINGSIDE:
-            if self.turn == Side.WHITE:
-                self.__move_piece(squares.g1, squares.e1, PieceType.KING)
-                self.__move_piece(squares.f1, squares.h1, PieceType.ROOK)
-            elif self.turn == Side.BLACK:
-                self.__move_piece(squares.g8, squares.e8, PieceType.KING)
-                self.__move_piece(squares.f8, squares.h8, PieceType.ROOK)
-        # Queenside Castling
-        elif move.move_type == MoveType.CASTLE_QUEENSIDE:
-            if self.turn == Side.WHITE:
-                self.__move_piece(squares.c1, squares.e1, PieceType.KING)
-                self.__move_piece(squares.d1, squares.a1, PieceType.ROOK)
-            elif self.turn == Side.BLACK:
-                self.__move_piece(squares.c8, squares.e8, PieceType.KING)
-                self.__move_piece(squares.d8, squares.a8, PieceType.ROOK)
-        # Duck moves
-        elif move.move_type == MoveType.DUCK:
-            self.boards.duck = to_mask
+        ply = history.pop()
+        self._game_state = _GAME_STATES[history.game_state[ply]]
+        self.turn = history.get_turn(ply)
+        self.castle_rights = history.castle_rights[ply]
+        self.en_passant = history.en_passant[ply]
+        self.halfmove_clock = history.halfmove_clock[ply]
+        self.fullmove_count = history.fullmove_count[ply]
+        self.zbr = history.zbr[ply]
+        if self.zbr_verify is not None:
+            self.zbr_verify = history.verification[ply]
+        self._attacks = {}
+        self._move_lists = {}
+        count = self._repetitions[self.zbr] - 1
+        if count:
+            self._repetitions[self.zbr] = count
+        else:
+            del self._repetitions[self.zbr]
+
+        move_type, piece, from_index, to_index, promotion = move_fields(history.move[ply])
+        self.__unmake_handlers[self.turn][move_type](
+            self, from_index, to_index, piece, promotion, history.capture[ply], history.duck[ply]
+        )
 
         # Update occupied board
-        self.boards.occupied = self.boards.white | self.boards.black | self.boards.duck
+        bitboards = self.boards.bitboards
+        bitboards[OCCUPIED_INDEX] = \
+            bitboards[WHITE_INDEX] | bitboards[BLACK_INDEX] | bitboards[DUCK_INDEX]
 
     def recalculate_mailbox(self):
         """ Returns a freshly calculated mailbox representation
@@ -0,0 +1,66 @@
+""" Bounded caches for per-position results, keyed by Zobrist hash.
+"""
+from collections import OrderedDict
+
+class MoveCache:
+    """ Least-recently-used cache of generated move lists. Boards with a
+        cache attached (see Board.move_cache) look up their move lists by
+        Zobrist hash before generating them, so transpositions and repeated
+        searches from the same root reuse earlier lists. Once max_size
+        entries are stored, the least recently used entry is evicted.
+
+        Entries can be stored with a verification hash (see
+        Board.enable_verification). Lookups with a different verification
+        hash are treated as misses, and counted as collisions.
+    """
+    def __init__(self, max_size: int=20_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        # Stored as {key: (verification, entry)}
+        self._entries = OrderedDict()
+
+    def get(self, key, verification: int=None):
+        """ Returns the entry stored under key, or None if there isn't one
+            (or its verification hash doesn't match). Hits and misses are
+            counted. Entries are only checked if both they and the lookup
+            have a verification hash.
+        """
+        stored = self._entries.get(key)
+        if stored is None:
+            self.misses += 1
+            return None
+        if verification is not None and stored[0] is not None and stored[0] != verification:
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return stored[1]
+
+    def put(self, key, entry, verification: int=None):
+        """ Stores an entry, with an optional verification hash, evicting the
+            least recently used entry if the cache is full.
+        """
+        self._entries[key] = (verification, entry)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """ Removes all entries and resets the counters.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __str__(self):
+        return f"<MoveCache: size={len(self)}/{self.max_size}, hits={self.hits}, misses={self.misses}, collisions={self.collisions}>"
@@ -0,0 +1,176 @@
+""" Fast FEN-style string codec, for converting positions in bulk (e.g.,
+    training data). Board.from_fen_string and Board.to_fen_string are the
+    reference implementation; these produce the same boards and strings,
+    without building a starting position first or concatenating strings
+    square by square.
+"""
+from .board import (
+    Board, WHITE_INDEX, OCCUPIED_INDEX, BLACK_INDEX, DUCK_INDEX
+)
+from .binary import CASTLING_COLUMN, EN_PASSANT_COLUMN, array_to_planes
+from .cache import MoveCache
+from .consts import EMPTY
+from .pieces import Piece, PIECE_INDEX, symbols
+from .sides import Side
+from .zobrist import zbr_position
+from . import squares
+
+import numpy as np
+from typing import Iterable, Iterator
+
+# Piece placement. Empty squares are spelled out as "1"s while parsing, and
+# runs of them are collapsed (longest first) when serialising.
+_EXPAND_EMPTY = str.maketrans({str(n): "1" * n for n in range(2, 9)})
+_COLLAPSE_EMPTY = [("1" * n, str(n)) for n in range(8, 1, -1)]
+_PIECE_SYMBOLS = {**symbols, Piece.EMPTY: "1"}
+_SYMBOL_PIECES = {symbol: piece for piece, symbol in _PIECE_SYMBOLS.items()}
+
+# Turns
+_TURN_SYMBOLS = {
+    Side.WHITE: "w", Side.WHITE_DUCK: "w@",
+    Side.BLACK: "b", Side.BLACK_DUCK: "b@"
+}
+_SYMBOL_TURNS = {symbol: side for side, symbol in _TURN_SYMBOLS.items()}
+
+# Castling rights, in KQkq order
+_CASTLING_SYMBOLS = (
+    ("K", squares.masks[squares.h1]), ("Q", squares.masks[squares.a1]),
+    ("k", squares.masks[squares.h8]), ("q", squares.masks[squares.a8])
+)
+
+def _generate_castling_strings():
+    result = {}
+    for rights in range(16):
+        mask = EMPTY
+        string = ""
+        for bit, (symbol, square_mask) in enumerate(_CASTLING_SYMBOLS):
+            if rights & (1 << bit):
+                mask |= square_mask
+                string += symbol
+        result[mask] = string or "-"
+    return result
+_CASTLING_STRINGS = _generate_castling_strings()
+_STRING_CASTLING = {string: mask for mask, string in _CASTLING_STRINGS.items()}
+_SYMBOL_CASTLING = {**dict(_CASTLING_SYMBOLS), "-": EMPTY}
+
+def _parse_castling(field: str) -> int:
+    """ Parses a castling rights field. Canonical fields are looked up
+        directly; others (any order, or empty, as older versions wrote for no
+        rights) are parsed a character at a time, like Board.from_fen_string.
+    """
+    rights = _STRING_CASTLING.get(field)
+    if rights is None:
+        rights = EMPTY
+        for symbol in field:
+            if symbol not in _SYMBOL_CASTLING:
+                raise ValueError(f"invalid castling rights: {field!r}")
+            rights |= _SYMBOL_CASTLING[symbol]
+    return rights
+
+# En passant
+_EN_PASSANT_LABELS = {squares.masks[idx]: label for idx, label in enumerate(squares.labels)}
+_EN_PASSANT_LABELS[EMPTY] = "-"
+_LABEL_EN_PASSANT = {label: mask for mask, label in _EN_PASSANT_LABELS.items()}
+
+def _parse(string: str) -> tuple:
+    """ Parses a FEN-style string into (bitboards, mailbox, turn, castle
+        rights, en passant, halfmove clock, fullmove count). Raises a
+        ValueError if a field is invalid.
+    """
+    placement, turn, castle_rights, en_passant, halfmove_clock, fullmove_count = string.split(" ")
+
+    # Ranks are listed from the 8th down, squares are indexed from a1.
+    cells = "".join(reversed(placement.translate(_EXPAND_EMPTY).split("/")))
+    if len(cells) != 64 or not set(cells) <= _SYMBOL_PIECES.keys():
+        raise ValueError(f"invalid piece placement: {placement!r}")
+    if turn not in _SYMBOL_TURNS:
+        raise ValueError(f"invalid turn: {turn!r}")
+    if en_passant not in _LABEL_EN_PASSANT:
+        raise ValueError(f"invalid en passant square: {en_passant!r}")
+
+    bitboards = [EMPTY] * 16
+    mailbox = [_SYMBOL_PIECES[symbol] for symbol in cells]
+    for idx, piece in enumerate(mailbox):
+        if piece:
+            bitboards[PIECE_INDEX[piece]] |= 1 << idx
+    # The duck isn't kept in the mailbox.
+    duck = bitboards[DUCK_INDEX]
+    if duck:
+        mailbox[duck.bit_length() - 1] = Piece.EMPTY
+
+    white = black = EMPTY
+    for offset in range(1, 7):
+        white |= bitboards[WHITE_INDEX + offset]
+        black |= bitboards[BLACK_INDEX + offset]
+    bitboards[WHITE_INDEX] = white
+    bitboards[BLACK_INDEX] = black
+    bitboards[OCCUPIED_INDEX] = white | black | duck
+
+    return (
+        bitboards,
+        mailbox,
+        _SYMBOL_TURNS[turn],
+        _parse_castling(castle_rights),
+        _LABEL_EN_PASSANT[en_passant],
+        int(halfmove_clock),
+        int(fullmove_count)
+    )
+
+def parse_fen(string: str) -> tuple:
+    """ Parses a FEN-style string into a board snapshot (see Board.snapshot).
+        The game state is left unresolved.
+    """
+    bitboards, mailbox, turn, castle_rights, en_passant, halfmove_clock, fullmove_count = _parse(string)
+    zbr = zbr_position(mailbox, bitboards[DUCK_INDEX], turn, castle_rights, en_passant)
+    return (
+        tuple(bitboards), tuple(mailbox), turn, castle_rights, en_passant,
+        halfmove_clock, fullmove_count, zbr, None
+    )
+
+def board_from_fen(string: str, move_cache: MoveCache=None) -> Board:
+    """ Creates a board from a FEN-style string. Equivalent to
+        Board.from_fen_string.
+    """
+    return Board.from_snapshot(parse_fen(string), move_cache)
+
+def board_to_fen(board: Board) -> str:
+    """ Builds a FEN-style string from a board. Equivalent to
+        Board.to_fen_string.
+    """
+    cells = [_PIECE_SYMBOLS[piece] for piece in board.mailbox]
+    duck = board.boards.duck
+    if duck:
+        cells[duck.bit_length() - 1] = _PIECE_SYMBOLS[Piece.DUCK]
+    placement = "/".join(["".join(cells[n:n + 8]) for n in range(56, -8, -8)])
+    for run, count in _COLLAPSE_EMPTY:
+        placement = placement.replace(run, count)
+
+    return (
+        f"{placement} {_TURN_SYMBOLS[board.turn]} "
+        f"{_CASTLING_STRINGS[board.castle_rights]} {_EN_PASSANT_LABELS[board.en_passant]} "
+        f"{board.halfmove_clock} {board.fullmove_count}"
+    )
+
+# Batch conversion
+def boards_from_fens(strings: Iterable[str], move_cache: MoveCache=None) -> Iterator[Board]:
+    """ Lazily creates a board for each FEN-style string.
+    """
+    for string in strings:
+        yield board_from_fen(string, move_cache)
+
+def fens_from_boards(boards: Iterable[Board]) -> list[str]:
+    """ Builds a FEN-style string for each board.
+    """
+    return [board_to_fen(board) for board in boards]
+
+def encode_fens(strings: Iterable[str]) -> np.ndarray:
+    """ Encodes FEN-style strings as an (N, 18, 8, 8) array of 0/1 planes,
+        without building boards (see binary.array_to_planes).
+    """
+    rows = []
+    for string in strings:
+        bitboards, _, _, castle_rights, en_passant, _, _ = _parse(string)
+        bitboards[CASTLING_COLUMN] = castle_rights
+        bitboards[EN_PASSANT_COLUMN] = en_passant
+        rows.append(bitboards)
+    return array_to_planes(np.array(rows, dtype=np.uint64))
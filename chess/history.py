@@ -0,0 +1,158 @@
+""" Move history (undo stack) implementation
+"""
+from .moves import Move
+from .pieces import Piece
+from .sides import Side
+
+from array import array
+from dataclasses import dataclass
+
+@dataclass
+class PositionProperties:
+    """ Dataclass for storing the properties of a position.
+    """
+    game_state: int = None
+    turn: Side = None
+    duck: int = None
+    castle_rights: int = None
+    en_passant: int = None
+    halfmove_clock: int = None
+    fullmove_count: int = None
+    capture: Piece = None
+    move: Move = None
+    zbr: int = None
+    verification: int = None
+
+# Lookups for turning stored integers back into enums.
+_SIDES = {side.value: side for side in Side}
+_PIECES = {piece.value: piece for piece in Piece}
+
+class UndoStack:
+    """ Preallocated, struct-of-arrays stack of position properties. Each
+        property is kept in its own column (an array of machine integers,
+        or a list for moves) and a ply is a row index, so pushing and popping
+        a ply allocates nothing until the capacity has to grow.
+
+        Indexing (e.g., history[-1]) returns a PositionProperties snapshot
+        of a row, for callers that want the old object-based view.
+    """
+    def __init__(self, capacity: int=256):
+        self.size = 0
+        self.capacity = capacity
+
+        # Unresolved game states are stored as -1.
+        self.game_state     = array("b", [-1]) * capacity
+        self.turn           = array("I", [0]) * capacity
+        self.duck           = array("Q", [0]) * capacity
+        self.castle_rights  = array("Q", [0]) * capacity
+        self.en_passant     = array("Q", [0]) * capacity
+        self.halfmove_clock = array("I", [0]) * capacity
+        self.fullmove_count = array("I", [0]) * capacity
+        self.capture        = array("I", [0]) * capacity
+        self.zbr            = array("Q", [0]) * capacity
+        # Verification hashes, if the board keeps them (0 otherwise)
+        self.verification   = array("Q", [0]) * capacity
+        self.move           = [None] * capacity
+
+    def __grow(self):
+        """ Doubles the capacity of every column.
+        """
+        for column in (
+            self.game_state, self.turn, self.duck, self.castle_rights,
+            self.en_passant, self.halfmove_clock, self.fullmove_count,
+            self.capture, self.zbr, self.verification
+        ):
+            column.extend(column[:1] * self.capacity)
+        self.move.extend([None] * self.capacity)
+        self.capacity *= 2
+
+    def push(
+        self,
+        game_state: int,
+        turn: Side,
+        duck: int,
+        castle_rights: int,
+        en_passant: int,
+        halfmove_clock: int,
+        fullmove_count: int,
+        capture: Piece,
+        move: Move | int,
+        zbr: int,
+        verification: int=0
+    ):
+        """ Pushes the properties of a position onto the stack. The game
+            state may be None if it hasn't been resolved.
+        """
+        if self.size == self.capacity:
+            self.__grow()
+        ply = self.size
+        self.game_state[ply] = -1 if game_state is None else game_state
+        self.turn[ply] = turn
+        self.duck[ply] = duck
+        self.castle_rights[ply] = castle_rights
+        self.en_passant[ply] = en_passant
+        self.halfmove_clock[ply] = halfmove_clock
+        self.fullmove_count[ply] = fullmove_count
+        self.capture[ply] = capture
+        self.move[ply] = move
+        self.zbr[ply] = zbr
+        self.verification[ply] = verification
+        self.size = ply + 1
+
+    def copy(self) -> "UndoStack":
+        """ Returns an independent copy of the stack.
+        """
+        stack = UndoStack.__new__(UndoStack)
+        stack.size = self.size
+        stack.capacity = self.capacity
+        for column in (
+            "game_state", "turn", "duck", "castle_rights", "en_passant",
+            "halfmove_clock", "fullmove_count", "capture", "zbr", "verification",
+            "move"
+        ):
+            setattr(stack, column, getattr(self, column)[:])
+        return stack
+
+    def pop(self) -> int:
+        """ Pops the top ply off the stack and returns its row index. The row
+            can still be read until the next push.
+        """
+        self.size -= 1
+        return self.size
+
+    # Row accessors, converting stored integers back to enums.
+    def get_game_state(self, ply: int) -> int:
+        state = self.game_state[ply]
+        return None if state < 0 else state
+
+    def get_turn(self, ply: int) -> Side:
+        return _SIDES[self.turn[ply]]
+
+    def get_capture(self, ply: int) -> Piece:
+        return _PIECES[self.capture[ply]]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx: int) -> PositionProperties:
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError("history index out of range")
+        return PositionProperties(
+            game_state=self.get_game_state(idx),
+            turn=self.get_turn(idx),
+            duck=self.duck[idx],
+            castle_rights=self.castle_rights[idx],
+            en_passant=self.en_passant[idx],
+            halfmove_clock=self.halfmove_clock[idx],
+            fullmove_count=self.fullmove_count[idx],
+            capture=self.get_capture(idx),
+            move=self.move[idx],
+            zbr=self.zbr[idx],
+            verification=self.verification[idx]
+        )
+
+    def __iter__(self):
+        for idx in range(self.size):
+            yield self[idx]
@@ -0,0 +1,132 @@
+""" Versioned binary file of Zobrist keys (see zobrist.py). The keys are
+    read from the file at import instead of being generated, so hashes (and
+    anything persisted by hash, such as opening books, caches and position
+    indices) stay the same across releases, whatever the order of the
+    Piece and Side enums.
+
+    Layout (little-endian):
+        bytes  0-7   magic, b"DUCKZBR\0"
+        bytes  8-11  format version (KEY_FILE_VERSION)
+        bytes 12-15  number of keys
+        bytes 16-47  SHA-256 checksum of the keys
+        bytes 48-    keys, as unsigned 64-bit integers
+
+    The keys are stored as KEY_SETS sets (the main hash's, then the
+    verification hash's) of KEY_SET_SIZE keys each:
+        - 64 keys per piece, in FILE_PIECES order, indexed by square
+        - one key per turn, in FILE_TURNS order
+        - one castling key per rook square, in CASTLING_SQUARES order
+        - 64 en passant keys, indexed by square
+
+    Usage (rewrites the file from seeded random keys):
+        python -m chess.keyfile [path] [--seeds SEED SEED]
+"""
+from .pieces import Piece
+from .sides import Side
+from . import squares
+
+import argparse
+import hashlib
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zobrist.keys")
+KEY_FILE_VERSION = 1
+# Seeds of the main and verification key sets in the shipped file.
+KEY_SEEDS = (271082, 828172)
+
+_KEY_SIZE = (2 ** 64) - 1
+_MAGIC = b"DUCKZBR\0"
+_HEADER = struct.Struct("<8sII32s")
+
+FILE_PIECES = (
+    Piece.W_PAWN, Piece.W_KNIGHT, Piece.W_BISHOP, Piece.W_ROOK, Piece.W_QUEEN, Piece.W_KING,
+    Piece.B_PAWN, Piece.B_KNIGHT, Piece.B_BISHOP, Piece.B_ROOK, Piece.B_QUEEN, Piece.B_KING,
+    Piece.DUCK
+)
+FILE_TURNS = (Side.WHITE, Side.WHITE_DUCK, Side.BLACK, Side.BLACK_DUCK)
+CASTLING_SQUARES = (squares.a1, squares.h1, squares.a8, squares.h8)
+
+# Offsets of each kind of key within a set
+PIECE_OFFSET      = 0
+TURN_OFFSET       = PIECE_OFFSET + 64 * len(FILE_PIECES)
+CASTLING_OFFSET   = TURN_OFFSET + len(FILE_TURNS)
+EN_PASSANT_OFFSET = CASTLING_OFFSET + len(CASTLING_SQUARES)
+KEY_SET_SIZE      = EN_PASSANT_OFFSET + 64
+KEY_SETS = 2
+
+def generate_keys(seed: int) -> list[int]:
+    """ Generates a set of keys in file order from a seeded RNG. The keys
+        are drawn in the order zobrist.py used to generate them at import,
+        so the shipped file reproduces the hashes from before keys were
+        stored.
+    """
+    rng = random.Random(seed)
+    draw = lambda count: [rng.randint(0, _KEY_SIZE) for _ in range(count)]
+    # Keys were drawn for every Piece, including EMPTY.
+    pieces = {piece: draw(64) for piece in Piece}
+    keys = []
+    for piece in FILE_PIECES:
+        keys += pieces[piece]
+    keys += draw(len(FILE_TURNS))
+    keys += draw(len(CASTLING_SQUARES))
+    keys += draw(64)
+    return keys
+
+def write_key_file(path: str=KEY_FILE, seeds: tuple=KEY_SEEDS):
+    """ Writes a key file with a set of keys generated from each seed.
+    """
+    if len(seeds) != KEY_SETS:
+        raise ValueError(f"expected {KEY_SETS} seeds, got {len(seeds)}")
+    keys = array("Q")
+    for seed in seeds:
+        keys.extend(generate_keys(seed))
+    if sys.byteorder == "big":
+        keys.byteswap()
+    body = keys.tobytes()
+    header = _HEADER.pack(_MAGIC, KEY_FILE_VERSION, len(keys), hashlib.sha256(body).digest())
+    with open(path, "wb") as file:
+        file.write(header + body)
+
+def read_key_file(path: str=KEY_FILE) -> list[list[int]]:
+    """ Reads and validates a key file, returning its key sets. The file is
+        memory mapped and checksummed in place. Raises a ValueError if the
+        file isn't a key file of this version, or its checksum doesn't match.
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if len(mapped) < _HEADER.size:
+            raise ValueError(f"{path}: too short for a Zobrist key file")
+        magic, version, count, checksum = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC:
+            raise ValueError(f"{path}: not a Zobrist key file")
+        if version != KEY_FILE_VERSION:
+            raise ValueError(f"{path}: unsupported key file version {version} (expected {KEY_FILE_VERSION})")
+        if count != KEY_SETS * KEY_SET_SIZE or len(mapped) != _HEADER.size + 8 * count:
+            raise ValueError(f"{path}: expected {KEY_SETS * KEY_SET_SIZE} keys")
+
+        with memoryview(mapped)[_HEADER.size:] as body:
+            if hashlib.sha256(body).digest() != checksum:
+                raise ValueError(f"{path}: checksum mismatch")
+            keys = array("Q")
+            keys.frombytes(body)
+
+    if sys.byteorder == "big":
+        keys.byteswap()
+    keys = keys.tolist()
+    return [keys[n:n + KEY_SET_SIZE] for n in range(0, len(keys), KEY_SET_SIZE)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the Zobrist key file.")
+    parser.add_argument("path", type=str, nargs="?", default=KEY_FILE, help="output path, defaults to the shipped key file")
+    parser.add_argument("--seeds", type=int, nargs=KEY_SETS, default=KEY_SEEDS, help="seeds of the main and verification keys")
+    args = parser.parse_args()
+
+    write_key_file(args.path, tuple(args.seeds))
+    print(f"Wrote {KEY_SETS} x {KEY_SET_SIZE} keys to {args.path}")
+
+if __name__ == "__main__":
+    main()
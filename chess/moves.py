@@ -1,7 +1,9 @@
 """ Move generation lookups and functions.
 """
+from . import attacks
 from . import consts
 from . import squares
+from . import tables
 from . import utils
 from . import pieces
 from . import sides
@@ -26,6 +28,33 @@ class MoveType(IntEnum):
     DUCK              = 0b10000
     MANUAL = 0b100000
 
+# Plain int values of the enum members used on hot paths. Reading a module
+# global is much cheaper than an enum attribute lookup, and plain ints skip
+# the IntEnum operator overloads. Moves built by the generators hold these
+# ints; enums are produced at the API boundaries (Move.__repr__/__str__,
+# unpack_move).
+_QUIET             = MoveType.QUIET.value
+_DOUBLE_PAWN       = MoveType.DOUBLE_PAWN.value
+_CAPTURE           = MoveType.CAPTURE.value
+_PROMOTION         = MoveType.PROMOTION.value
+_CAPTURE_PROMOTION = MoveType.CAPTURE_PROMOTION.value
+_CASTLE_KINGSIDE   = MoveType.CASTLE_KINGSIDE.value
+_CASTLE_QUEENSIDE  = MoveType.CASTLE_QUEENSIDE.value
+_DUCK_MOVE         = MoveType.DUCK.value
+_MANUAL            = MoveType.MANUAL.value
+
+_PAWN   = pieces.PieceType.PAWN.value
+_KNIGHT = pieces.PieceType.KNIGHT.value
+_BISHOP = pieces.PieceType.BISHOP.value
+_ROOK   = pieces.PieceType.ROOK.value
+_QUEEN  = pieces.PieceType.QUEEN.value
+_KING   = pieces.PieceType.KING.value
+_DUCK   = pieces.PieceType.DUCK.value
+_PROMOTIONS = (_KNIGHT, _BISHOP, _ROOK, _QUEEN)
+
+_WHITE = sides.Side.WHITE.value
+_BLACK = sides.Side.BLACK.value
+
 # Move class
 class Move:
     """ Holds the from/to square indices of a move, 
@@ -94,14 +123,26 @@ class Move:
     
         return result
 
+    def pack(self) -> int:
+        """ Returns the packed integer form of this move (see pack_move).
+        """
+        return pack_move(self.move_type, self.piece, self.from_index, self.to_index, self.promotion)
+
+    def unpack(packed: int) -> "Move":
+        """ Builds a move from its packed integer form (see pack_move).
+        """
+        return Move(*unpack_move(packed))
+
     def __key(self):
         return (self.from_index, self.to_index, self.move_type, self.promotion)
     
     def __eq__(self, other: "Move"):
+        # Packed moves don't compare equal to Move objects (their hashes
+        # couldn't agree), unpack them first (see Move.unpack).
         if not isinstance(other, Move):
             return NotImplemented
         
-        if MoveType.MANUAL in (self.move_type, other.move_type):
+        if _MANUAL in (self.move_type, other.move_type):
             return \
                 self.from_index == other.from_index \
                 and self.to_index == other.to_index \
@@ -116,8 +157,8 @@ class Move:
         return f"<chess.moves.Move: " \
                f"from_index={self.from_index}, " \
                f"to_index={self.to_index}, " \
-               f"move_type={self.move_type._name_}, " \
-               f"piece={self.piece._name_}, " \
+               f"move_type={MoveType(self.move_type)._name_}, " \
+               f"piece={_enum_name(pieces.PieceType, self.piece)}, " \
                f"promotion={self.promotion}, " \
                f"str={self.__str__()}>"
 
@@ -129,10 +170,89 @@ class Move:
         elif self.move_type == MoveType.DUCK:
             return f"@{squares.labels[self.to_index]}"
         elif self.move_type & MoveType.PROMOTION:
-            return f"{squares.labels[self.from_index]}{squares.labels[self.to_index]}={self.promotion._name_}"
+            return f"{squares.labels[self.from_index]}{squares.labels[self.to_index]}={pieces.PieceType(self.promotion)._name_}"
         else:
             return f"{squares.labels[self.from_index]}{squares.labels[self.to_index]}"
 
+# Packed moves
+# Moves can also be stored as a single integer, avoiding a Move object
+# allocation per move in the search. The layout is:
+#
+#   bits  0-6   from index (NO_SQUARE if none)
+#   bits  7-13  to index (NO_SQUARE if none)
+#   bits 14-19  move type
+#   bits 20-22  piece type code (see PIECE_CODES)
+#   bits 23-25  promotion piece type code
+#
+# Packed moves fit in 32 bits, so lists of them can be stored in an
+# array('I') if needed.
+NO_SQUARE = 64
+PIECE_CODES = {
+    None: 0,
+    pieces.PieceType.PAWN:   1,
+    pieces.PieceType.KNIGHT: 2,
+    pieces.PieceType.BISHOP: 3,
+    pieces.PieceType.ROOK:   4,
+    pieces.PieceType.QUEEN:  5,
+    pieces.PieceType.KING:   6,
+    pieces.PieceType.DUCK:   7
+}
+_PIECE_TYPES = [piece for piece in PIECE_CODES]
+_MOVE_TYPES = {move_type.value: move_type for move_type in MoveType}
+_PIECE_VALUES = [piece and piece.value for piece in PIECE_CODES]
+
+def _enum_name(enum: type, value: int | None) -> str | None:
+    """ Returns the enum member name for a value, or None.
+    """
+    return None if value is None else enum(value)._name_
+
+def pack_move(
+        move_type: MoveType,
+        piece: pieces.PieceType=None,
+        from_index: int=None,
+        to_index: int=None,
+        promotion: pieces.PieceType=None
+    ) -> int:
+    """ Packs a move into a single integer. Takes the same arguments
+        as the Move constructor, so either can be used to build moves.
+    """
+    return (NO_SQUARE if from_index is None else from_index) \
+         | (NO_SQUARE if to_index is None else to_index) << 7 \
+         | move_type << 14 \
+         | PIECE_CODES[piece or None] << 20 \
+         | PIECE_CODES[promotion or None] << 23
+
+def unpack_move(packed: int) -> tuple:
+    """ Unpacks a packed move into a tuple of
+        (move_type, piece, from_index, to_index, promotion).
+    """
+    from_index = packed & 0x7F
+    to_index = packed >> 7 & 0x7F
+    return (
+        _MOVE_TYPES[packed >> 14 & 0x3F],
+        _PIECE_TYPES[packed >> 20 & 0x7],
+        from_index if from_index != NO_SQUARE else None,
+        to_index if to_index != NO_SQUARE else None,
+        _PIECE_TYPES[packed >> 23 & 0x7]
+    )
+
+def move_fields(move: Move | int) -> tuple:
+    """ Returns (move_type, piece, from_index, to_index, promotion) for
+        either a Move object or a packed move. Unlike unpack_move, the
+        fields of packed moves are plain ints (for the make/unmake hot path).
+    """
+    if isinstance(move, int):
+        from_index = move & 0x7F
+        to_index = move >> 7 & 0x7F
+        return (
+            move >> 14 & 0x3F,
+            _PIECE_VALUES[move >> 20 & 0x7],
+            from_index if from_index != NO_SQUARE else None,
+            to_index if to_index != NO_SQUARE else None,
+            _PIECE_VALUES[move >> 23 & 0x7]
+        )
+    return (move.move_type, move.piece, move.from_index, move.to_index, move.promotion)
+
 # Move template generation
 # Precalculated move arrays
 # Pawn capture templates
@@ -191,8 +311,8 @@ def _generate_bishop_templates():
     result = []
     for idx in range(0, 64):
         square = squares.masks[idx]
-        diagonal = utils.get_diagonal(idx)
-        antidiag = utils.get_antidiagonal(idx)
+        diagonal = tables.DIAGONALS[idx]
+        antidiag = tables.ANTIDIAGONALS[idx]
         result.append(
             (diagonal | antidiag) ^ square
         )
@@ -205,8 +325,8 @@ def _generate_rook_templates():
     result = []
     for idx in range(0, 64):
         square = squares.masks[idx]
-        file = utils.get_file(idx)
-        rank = utils.get_rank(idx)
+        file = tables.FILES[idx]
+        rank = tables.RANKS[idx]
         result.append(
             (file | rank) ^ square
         )
@@ -217,38 +337,27 @@ ROOK_TEMPLATES = _generate_rook_templates()
 # Sliding piece move generation (generic)
 def sliding_moves(
         origin: int,
-        axes: list,
+        targets: int,
         occupation: int,
         blockers: int,
-        piece: pieces.PieceType=None
+        piece: pieces.PieceType=None,
+        packed: bool=False
     ):
-    """ Generates valid sliding moves from a given origin square,
-        based on the provided occupation and blocker bitboards, along the
-        given axis masks.
+    """ Generates valid sliding moves from a given origin square, based on
+        the provided attack set (see the attacks module) and occupation and
+        blocker bitboards.
     """
-    # Generate pseudo-legal move templates
-    templates = []
-    for axis in axes:
-        templates.append(utils.hyperbola_quintessence(
-            occupation,
-            axis,
-            squares.masks[origin]
-        ))
-
-    # Combine the above templates
-    targets = consts.EMPTY
-    for template in templates:
-        targets = targets | template
-    targets = targets & utils.invert(blockers)
+    build = pack_move if packed else Move
+    targets = targets & ~blockers
 
     # Build the move objects
     moves = []
     for target in utils.get_squares(targets):
         move_type = \
-            MoveType.QUIET if not squares.masks[target] & (occupation ^ blockers) \
-            else MoveType.CAPTURE
+            _QUIET if not squares.masks[target] & (occupation ^ blockers) \
+            else _CAPTURE
         moves.append(
-            Move(
+            build(
                 move_type=move_type,
                 piece=piece,
                 from_index=origin,
@@ -260,35 +369,34 @@ def sliding_moves(
 
 # Pawn move generation
 # Pushes
-def pawn_pushes(origins: int, occupation: int, side: sides.Side):
+def pawn_pushes(origins: int, occupation: int, side: sides.Side, packed: bool=False):
     """ Generates valid pawn moves from a given set of origin squares,
         taking into account board occupation and blockers.
     """
-    if side == sides.Side.WHITE:
+    build = pack_move if packed else Move
+    if side == _WHITE:
         direction = utils.Direction.NORTH
         promotion_rank = consts.RANK_8
-        single_pushes = utils.north(origins) & utils.invert(occupation)
+        single_pushes = utils.north(origins) & ~occupation
         double_pushes = \
-            (utils.north(single_pushes) & utils.invert(occupation)) & consts.RANK_4
-    elif side == sides.Side.BLACK:
+            (utils.north(single_pushes) & ~occupation) & consts.RANK_4
+    elif side == _BLACK:
         direction = utils.Direction.SOUTH
         promotion_rank = consts.RANK_1
-        single_pushes = utils.south(origins) & utils.invert(occupation)
+        single_pushes = utils.south(origins) & ~occupation
         double_pushes = \
-            (utils.south(single_pushes) & utils.invert(occupation)) & consts.RANK_5
+            (utils.south(single_pushes) & ~occupation) & consts.RANK_5
 
     pawn_pushes = []
     # Single pushes and promotions.
     for target in utils.get_squares(single_pushes):
         # Check if the pawn should promote - if so, add possible promotions.
         if squares.masks[target] & promotion_rank:
-            for piece in pieces.PieceType:
-                if piece in (pieces.PieceType.PAWN, pieces.PieceType.KING, pieces.PieceType.DUCK):
-                    continue
+            for piece in _PROMOTIONS:
                 pawn_pushes.append(
-                    Move(
-                        move_type=MoveType.PROMOTION,
-                        piece=pieces.PieceType.PAWN,
+                    build(
+                        move_type=_PROMOTION,
+                        piece=_PAWN,
                         from_index=target - direction,
                         to_index=target,
                         promotion=piece
@@ -297,9 +405,9 @@ def pawn_pushes(origins: int, occupation: int, side: sides.Side):
         # Otherwise add a regular pawn push.
         else:
             pawn_pushes.append(
-                Move(
-                    move_type=MoveType.QUIET,
-                    piece=pieces.PieceType.PAWN,
+                build(
+                    move_type=_QUIET,
+                    piece=_PAWN,
                     from_index=target - direction,
                     to_index=target
                 )
@@ -307,9 +415,9 @@ def pawn_pushes(origins: int, occupation: int, side: sides.Side):
     # Double pushes - note these can't be promotions.
     for target in utils.get_squares(double_pushes):
         pawn_pushes.append(
-            Move(
-                move_type=MoveType.DOUBLE_PAWN,
-                piece=pieces.PieceType.PAWN,
+            build(
+                move_type=_DOUBLE_PAWN,
+                piece=_PAWN,
                 from_index=target - direction * 2,
                 to_index=target
             )
@@ -317,13 +425,14 @@ def pawn_pushes(origins: int, occupation: int, side: sides.Side):
     return pawn_pushes
 
 # Captures
-def pawn_captures(origins: int, enemies: int, side: sides.Side):
+def pawn_captures(origins: int, enemies: int, side: sides.Side, packed: bool=False):
     """ Generates valid pawn captures from a given set of origin squares,
         taking into account board occupation and blockers.
     """
-    if side == sides.Side.WHITE:
+    build = pack_move if packed else Move
+    if side == _WHITE:
         promotion_rank = consts.RANK_8
-    elif side == sides.Side.BLACK:
+    elif side == _BLACK:
         promotion_rank = consts.RANK_1
 
     pawn_captures = []
@@ -334,13 +443,11 @@ def pawn_captures(origins: int, enemies: int, side: sides.Side):
             # Check if this capture leads to a promotion.
             if squares.masks[target] & promotion_rank:
                 # If so, add possible promotions.
-                for piece in pieces.PieceType:
-                    if piece in (pieces.PieceType.PAWN, pieces.PieceType.KING, pieces.PieceType.DUCK):
-                        continue
+                for piece in _PROMOTIONS:
                     pawn_captures.append(
-                        Move(
-                            move_type=MoveType.CAPTURE_PROMOTION,
-                            piece=pieces.PieceType.PAWN,
+                        build(
+                            move_type=_CAPTURE_PROMOTION,
+                            piece=_PAWN,
                             from_index=pawn,
                             to_index=target,
                             promotion=piece
@@ -349,9 +456,9 @@ def pawn_captures(origins: int, enemies: int, side: sides.Side):
             # Otherwise, add a normal pawn capture.
             else:
                 pawn_captures.append(
-                    Move(
-                        move_type=MoveType.CAPTURE,
-                        piece=pieces.PieceType.PAWN,
+                    build(
+                        move_type=_CAPTURE,
+                        piece=_PAWN,
                         from_index=pawn,
                         to_index=target
                     )
@@ -359,23 +466,24 @@ def pawn_captures(origins: int, enemies: int, side: sides.Side):
     return pawn_captures
 
 # Knight move generation
-def knight_moves(origins: int, occupation: int, blockers: int):
+def knight_moves(origins: int, occupation: int, blockers: int, packed: bool=False):
     """ Generates valid knight moves from a given set of origin squares,
         taking into account board occupation and blockers.
     """
+    build = pack_move if packed else Move
     knight_moves = []
     for knight in utils.get_squares(origins):
         # Get the move template for this knight.
         template = KNIGHT_TEMPLATES[knight]
-        targets = template & utils.invert(blockers)
+        targets = template & ~blockers
         for target in utils.get_squares(targets):
             move_type = \
-                MoveType.QUIET if not squares.masks[target] & (occupation ^ blockers) \
-                else MoveType.CAPTURE
+                _QUIET if not squares.masks[target] & (occupation ^ blockers) \
+                else _CAPTURE
             knight_moves.append(
-                Move(
+                build(
                     move_type=move_type,
-                    piece=pieces.PieceType.KNIGHT,
+                    piece=_KNIGHT,
                     from_index=knight,
                     to_index=target
                 )
@@ -383,7 +491,7 @@ def knight_moves(origins: int, occupation: int, blockers: int):
     return knight_moves
 
 # Bishop move generation
-def bishop_moves(origins: int, occupation: int, blockers: int):
+def bishop_moves(origins: int, occupation: int, blockers: int, packed: bool=False):
     """ Generates valid bishop moves from a given set of origin squares,
         taking into account board occupation and blockers.
     """
@@ -392,18 +500,16 @@ def bishop_moves(origins: int, occupation: int, blockers: int):
     for origin in utils.get_squares(origins):
         bishop_moves += sliding_moves(
             origin,
-            [
-                utils.get_diagonal(origin), 
-                utils.get_antidiagonal(origin)
-            ],
+            attacks.bishop_attacks(origin, occupation),
             occupation,
             blockers,
-            pieces.PieceType.BISHOP
+            _BISHOP,
+            packed
         )
     return bishop_moves
 
 # Rook move generation
-def rook_moves(origins: int, occupation: int, blockers: int):
+def rook_moves(origins: int, occupation: int, blockers: int, packed: bool=False):
     """ Generates valid rook moves from a given set of origin squares,
         taking into account board occupation and blockers.
     """
@@ -412,18 +518,16 @@ def rook_moves(origins: int, occupation: int, blockers: int):
     for origin in utils.get_squares(origins):
         rook_moves += sliding_moves(
             origin,
-            [
-                utils.get_rank(origin), 
-                utils.get_file(origin)
-            ],
+            attacks.rook_attacks(origin, occupation),
             occupation,
             blockers,
-            pieces.PieceType.ROOK
+            _ROOK,
+            packed
         )
     return rook_moves
 
 # Queen move generation
-def queen_moves(origins: int, occupation: int, blockers: int):
+def queen_moves(origins: int, occupation: int, blockers: int, packed: bool=False):
     """ Generates valid queen moves from a given set of origin squares,
         taking into account board occupation and blockers.
     """
@@ -432,36 +536,33 @@ def queen_moves(origins: int, occupation: int, blockers: int):
     for origin in utils.get_squares(origins):
         queen_moves += sliding_moves(
             origin,
-            [
-                utils.get_rank(origin),
-                utils.get_file(origin),
-                utils.get_diagonal(origin), 
-                utils.get_antidiagonal(origin)
-            ],
+            attacks.queen_attacks(origin, occupation),
             occupation,
             blockers,
-            pieces.PieceType.QUEEN
+            _QUEEN,
+            packed
         )
     return queen_moves
 
 # King move generation
-def king_moves(origins: int, occupation: int, blockers: int):
+def king_moves(origins: int, occupation: int, blockers: int, packed: bool=False):
     """ Generates valid knight moves from a given origin square,
         taking into account board occupation and blockers.
     """
+    build = pack_move if packed else Move
     king_moves = []
     for king in utils.get_squares(origins):
         # Get the move template for this king.
         template = KING_TEMPLATES[king]
-        targets = template & utils.invert(blockers)
+        targets = template & ~blockers
         for target in utils.get_squares(targets):    
             move_type = \
-                MoveType.QUIET if not squares.masks[target] & (occupation ^ blockers) \
-                else MoveType.CAPTURE
+                _QUIET if not squares.masks[target] & (occupation ^ blockers) \
+                else _CAPTURE
             king_moves.append(
-                Move(
+                build(
                     move_type=move_type,
-                    piece=pieces.PieceType.KING,
+                    piece=_KING,
                     from_index=king,
                     to_index=target
                 )
@@ -469,16 +570,17 @@ def king_moves(origins: int, occupation: int, blockers: int):
     return king_moves
 
 # Castling move generation
-def castling(occupation: int, rights: int, turn: sides.Side):
+def castling(occupation: int, rights: int, turn: sides.Side, packed: bool=False):
     """ Generates valid castles, taking into account castling rights.
     """
+    build = pack_move if packed else Move
     # Return immediately if there are no valid castling moves.
     if rights == consts.EMPTY:
         return []
     
-    if turn == sides.Side.WHITE:
+    if turn == _WHITE:
         rights &= consts.RANK_1
-    elif turn == sides.Side.BLACK:
+    elif turn == _BLACK:
         rights &= consts.RANK_8
 
     castle_moves = []
@@ -487,24 +589,33 @@ def castling(occupation: int, rights: int, turn: sides.Side):
     kingside_blockers  = occupation & consts.CASTLING_KINGSIDE [turn]["BLOCKERS"]
 
     if rights & consts.FILE_H and not kingside_blockers:
-        castle_moves.append(Move(MoveType.CASTLE_KINGSIDE, pieces.PieceType.KING))
+        castle_moves.append(build(_CASTLE_KINGSIDE, _KING))
     if rights & consts.FILE_A and not queenside_blockers:
-        castle_moves.append(Move(MoveType.CASTLE_QUEENSIDE, pieces.PieceType.KING))
+        castle_moves.append(build(_CASTLE_QUEENSIDE, _KING))
     
     return castle_moves
 
 # Duck move generation
-def duck_moves(origin, occupation):
+def duck_targets(occupation: int, candidates: int=consts.FILLED):
+    """ Returns a bitboard of the squares the duck can be placed on (i.e.,
+        any empty square), optionally restricted to a set of candidates.
+    """
+    return ~occupation & candidates
+
+def duck_moves(origin, occupation, packed: bool=False, candidates: int=consts.FILLED):
     """ Generates valid duck moves, taking into account its current
-        position and board occupation.
+        position and board occupation. Targets can be restricted to a
+        set of candidate squares.
     """
+    build = pack_move if packed else Move
+    from_index = utils.ls1b_index(origin)
     duck_moves = []
-    for target in utils.get_squares(utils.invert(occupation)):
+    for target in utils.get_squares(duck_targets(occupation, candidates)):
         duck_moves.append(
-            Move(
-                move_type=MoveType.DUCK,
-                piece=pieces.PieceType.DUCK,
-                from_index=utils.get_squares(origin)[0] if origin else None,
+            build(
+                move_type=_DUCK_MOVE,
+                piece=_DUCK,
+                from_index=from_index,
                 to_index=target
             )
         )
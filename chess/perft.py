@@ -0,0 +1,125 @@
+""" Perft (performance test) - counts the leaf nodes of the move tree to a
+    given depth. Used to validate move generation and make/unmake, and to
+    track raw engine throughput. Duck moves count as plies, and positions
+    where a king has been captured have no moves.
+    See https://www.chessprogramming.org/Perft for details.
+
+    Usage:
+        python -m chess.perft [depth] [--fen FEN] [--divide] [--hash]
+                              [--no-bulk] [--processes N]
+"""
+from .board import Board
+from .consts import EMPTY
+from .pieces import Piece, PIECE_INDEX
+from .sides import Side
+
+import argparse
+import time
+from multiprocessing import Pool
+
+def _game_over(board: Board) -> bool:
+    """ Returns True if either king has been captured.
+    """
+    return board.boards.bitboards[PIECE_INDEX[Piece.W_KING]] == EMPTY \
+        or board.boards.bitboards[PIECE_INDEX[Piece.B_KING]] == EMPTY
+
+def perft(board: Board, depth: int, bulk: bool=True, table: dict=None) -> int:
+    """ Returns the number of leaf nodes depth plies below the current
+        position. If bulk is true, moves at the final ply are counted rather
+        than made. If a table (dict) is provided, subtree counts are stored in
+        it keyed by Zobrist hash and depth, and reused on transpositions.
+    """
+    if depth == 0:
+        return 1
+    if _game_over(board):
+        return 0
+
+    if table is not None:
+        key = (board.zbr, depth)
+        if key in table:
+            return table[key]
+
+    if bulk and depth == 1:
+        if board.turn in (Side.WHITE_DUCK, Side.BLACK_DUCK):
+            nodes = board.duck_targets().bit_count()
+        else:
+            nodes = len(board.generate_move_lists(packed=True)[1])
+    else:
+        nodes = 0
+        for move in board.generate_move_lists(packed=True)[1]:
+            board.make_move(move)
+            nodes += perft(board, depth - 1, bulk, table)
+            board.unmake_move()
+
+    if table is not None:
+        table[key] = nodes
+    return nodes
+
+def _perft_after(snapshot: tuple, move: int, depth: int, bulk: bool, use_hash: bool) -> int:
+    """ Worker function for divide - restores the position from a snapshot
+        (see Board.snapshot), plays move, then runs perft on the resulting
+        position. Each worker keeps its own hash table.
+    """
+    board = Board.from_snapshot(snapshot)
+    board.make_move(move)
+    return perft(board, depth, bulk, {} if use_hash else None)
+
+def divide(board: Board, depth: int, bulk: bool=True, use_hash: bool=False, processes: int=1) -> dict:
+    """ Runs perft for each root move separately, returning a dict of
+        {move string: node count}. If processes is greater than one, the
+        root moves are split across a process pool.
+    """
+    if depth <= 0 or _game_over(board):
+        return {}
+    moves = board.generate_moves()
+
+    if processes > 1:
+        snapshot = board.snapshot()
+        with Pool(processes) as pool:
+            counts = pool.starmap(
+                _perft_after,
+                [(snapshot, move.pack(), depth - 1, bulk, use_hash) for move in moves]
+            )
+    else:
+        table = {} if use_hash else None
+        counts = []
+        for move in moves:
+            board.make_move(move)
+            counts.append(perft(board, depth - 1, bulk, table))
+            board.unmake_move()
+
+    return {str(move): count for move, count in zip(moves, counts)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Duck chess perft.")
+    parser.add_argument("depth", type=int, nargs="?", default=3, help="search depth in plies (duck moves included)")
+    parser.add_argument("--fen", type=str, default=None, help="starting position, defaults to the initial position")
+    parser.add_argument("--divide", action="store_true", help="print node counts for each root move")
+    parser.add_argument("--hash", action="store_true", help="reuse subtree counts on transpositions")
+    parser.add_argument("--no-bulk", action="store_true", help="make and unmake moves at the final ply")
+    parser.add_argument("--processes", type=int, default=1, help="split root moves across a process pool")
+    args = parser.parse_args()
+
+    board = Board.from_fen_string(args.fen) if args.fen else Board()
+    bulk = not args.no_bulk
+
+    start = time.perf_counter()
+    if args.divide or args.processes > 1:
+        results = divide(board, args.depth, bulk, args.hash, args.processes)
+        nodes = sum(results.values())
+    else:
+        results = {}
+        nodes = perft(board, args.depth, bulk, {} if args.hash else None)
+    elapsed = time.perf_counter() - start
+
+    if args.divide:
+        for move, count in results.items():
+            print(f"{move}: {count}")
+        print()
+    print(f"Depth: {args.depth}")
+    print(f"Nodes: {nodes}")
+    print(f"Time:  {elapsed:.3f}s")
+    print(f"NPS:   {nodes / elapsed if elapsed else 0:.0f}")
+
+if __name__ == "__main__":
+    main()
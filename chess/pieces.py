@@ -64,3 +64,19 @@ piece_type_lookup = {
     "K": PieceType.KING,
     "@": PieceType.DUCK
 }
+
+# Dense indices, for flat arrays such as board.PositionBoards. Piece types
+# map to 1-7 and black is offset by 8, so the index of a piece is its side's
+# index plus its type's index, and every Piece maps to a unique slot in
+# 0-15. The free slots (0, 7 and 8) are left for aggregates.
+TYPE_INDEX = {piece_type: idx for idx, piece_type in enumerate(PieceType, 1)}
+SIDE_INDEX = {
+    Side.WHITE:      0,
+    Side.WHITE_DUCK: 0,
+    Side.BLACK:      8,
+    Side.BLACK_DUCK: 8,
+}
+PIECE_INDEX = {
+    piece: SIDE_INDEX[piece & SIDE_MASK] + TYPE_INDEX[piece & PIECE_MASK]
+    for piece in Piece if piece != Piece.EMPTY
+}
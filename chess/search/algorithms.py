@@ -2,6 +2,7 @@ from .node import Node
 from ..board import Board
 from ..moves import Move
 from ..sides import Side
+from .. import utils
 
 import random
 
@@ -9,12 +10,17 @@ from math import inf as infinity
 
 def minimax(board: Board, node: Node, eval_fn: callable, depth: int=1) -> Move:
     def __minimax_recursive(node: Node, eval_fn: callable, depth: int=depth-1):
+        # Repeated positions are scored as draws
+        if board.repetition_count() > 1:
+            node.score = 0
+            return node.score
+
         if depth == 0:
             node.score = eval_fn(board)
             return node.score
         
-        if not node.children:
-            node.expand(board.generate_moves(pseudo=True))
+        if not node.expanded:
+            node.expand(board.generate_moves(pseudo=True, packed=True))
         
         best_score = -infinity
         for child in node.children:
@@ -31,7 +37,7 @@ def minimax(board: Board, node: Node, eval_fn: callable, depth: int=1) -> Move:
     legal_moves = board.generate_moves()
     if not legal_moves:
         return (None, None)
-    if not node.children:
+    if not node.expanded:
         node.expand(legal_moves)
 
     best_score = -infinity
@@ -50,27 +56,45 @@ def minimax(board: Board, node: Node, eval_fn: callable, depth: int=1) -> Move:
             best_score = child.score
             best_move = child.move
     
+    # Nodes expanded during a previous search hold packed moves, so
+    # make sure a Move object is returned to the caller.
+    if isinstance(best_move, int):
+        best_move = Move.unpack(best_move)
+
     board.make_move(best_move)
-    duck_move = random.choice(board.generate_moves())
+    duck_move = board.duck_move(random.choice(utils.get_squares(board.duck_targets())))
     board.make_move(duck_move)
 
     return (best_score, best_move, duck_move)
 
-def alpha_beta(board: Board, node: Node, depth: int, eval_fn: callable, **eval_args) -> tuple[Move, Move]:
-    """ Minimax with alpha-beta pruning.
+def alpha_beta(board: Board, node: Node, depth: int, eval_fn: callable, staged: bool=True, **eval_args) -> tuple[Move, Move]:
+    """ Minimax with alpha-beta pruning. If staged is true, interior nodes are
+        expanded lazily (captures first) so move generation stops at a beta
+        cutoff. Evaluation functions that need every sibling of a node to have
+        been generated should pass staged=False.
     """
     score_multiplier = 1 if board.turn == Side.WHITE else -1
 
     def __alpha_beta_recursive(current: Node, alpha: float, beta: float, depth: int):
+        # Repeated positions are scored as draws
+        if board.repetition_count() > 1:
+            current.score = 0
+            return current.score
+
         if depth <= 0:
             current.score = eval_fn(board, node=current, **eval_args) * score_multiplier
             return current.score
         
         # Expand the current node if it hasn't already been
-        if not current.children:
-            current.expand(board.generate_moves(pseudo=True))
-
-        for child in current.children:
+        if current.expanded:
+            children = current.children
+        elif staged:
+            children = current.expand_lazily(board.generate_moves_staged(pseudo=True, packed=True))
+        else:
+            current.expand(board.generate_moves(pseudo=True, packed=True))
+            children = current.children
+
+        for child in children:
             board.make_move(child.move)
             board.skip_move()
             child.score = -__alpha_beta_recursive(child, -beta, -alpha, depth - 1)
@@ -88,7 +112,7 @@ def alpha_beta(board: Board, node: Node, depth: int, eval_fn: callable, **eval_a
     legal_moves = board.generate_moves()
     if not legal_moves:
         return (None, None)
-    if not node.children:
+    if not node.expanded:
         node.expand(legal_moves)
 
     best_move = None
@@ -109,28 +133,44 @@ def alpha_beta(board: Board, node: Node, depth: int, eval_fn: callable, **eval_a
 
     node.score = best_score
 
+    # Nodes expanded during a previous search hold packed moves, so
+    # make sure a Move object is returned to the caller.
+    if isinstance(best_move, int):
+        best_move = Move.unpack(best_move)
+
     board.make_move(best_move)
-    duck_move = random.choice(board.generate_moves())
+    duck_move = board.duck_move(random.choice(utils.get_squares(board.duck_targets())))
     board.unmake_move()
 
     return (best_move, duck_move)
 
-def alpha_beta_nn(board: Board, node: Node, depth: int, eval_fn: callable, **eval_args) -> tuple[Move, Move]:
+def alpha_beta_nn(board: Board, node: Node, depth: int, eval_fn: callable, staged: bool=True, **eval_args) -> tuple[Move, Move]:
     """ Minimax with alpha-beta pruning and allowances for neural network style evaluation functions.
         Expects eval_fn to return a tuple (white_win_percent, black_win_percent).
+        See alpha_beta for the staged parameter.
     """
     score_index = 0 if board.turn == Side.WHITE else 1
 
     def __alpha_beta_recursive(current: Node, alpha: float, beta: float, depth: int):
+        # Repeated positions are scored as draws (even odds)
+        if board.repetition_count() > 1:
+            current.score = 0.5
+            return current.score
+
         if depth <= 0:
             current.score = eval_fn(board, **eval_args)[score_index]
             return current.score
         
         # Expand the current node if it hasn't already been
-        if not current.children:
-            current.expand(board.generate_moves(pseudo=True))
-
-        for child in current.children:
+        if current.expanded:
+            children = current.children
+        elif staged:
+            children = current.expand_lazily(board.generate_moves_staged(pseudo=True, packed=True))
+        else:
+            current.expand(board.generate_moves(pseudo=True, packed=True))
+            children = current.children
+
+        for child in children:
             board.make_move(child.move)
             board.skip_move()
             child.score = 1 - __alpha_beta_recursive(child, 1 - beta, 1 - alpha, depth - 1)
@@ -147,7 +187,7 @@ def alpha_beta_nn(board: Board, node: Node, depth: int, eval_fn: callable, **eva
     legal_moves = board.generate_moves()
     if not legal_moves:
         return (None, None)
-    if not node.children:
+    if not node.expanded:
         node.expand(legal_moves)
 
     best_move = None
@@ -168,8 +208,13 @@ def alpha_beta_nn(board: Board, node: Node, depth: int, eval_fn: callable, **eva
 
     node.score = best_score
 
+    # Nodes expanded during a previous search hold packed moves, so
+    # make sure a Move object is returned to the caller.
+    if isinstance(best_move, int):
+        best_move = Move.unpack(best_move)
+
     board.make_move(best_move)
-    duck_move = random.choice(board.generate_moves())
+    duck_move = board.duck_move(random.choice(utils.get_squares(board.duck_targets())))
     board.unmake_move()
 
     return (best_move, duck_move)
@@ -26,13 +26,28 @@ class Node:
         self.score = -infinity
 
         self.children = []
+        self.expanded = False
 
-    def expand(self, moves: list[Move]):
+    def expand(self, moves: list[Move | int]):
+        self.children = [Node(move, self) for move in moves]
+        self.expanded = True
+
+    def expand_lazily(self, moves):
+        """ Expands the node one child at a time from a move iterable (e.g.,
+            Board.generate_moves_staged), yielding each child as it's added.
+            The node is only marked as expanded once the moves run out, so a
+            search that stops early will expand it again on the next visit.
+        """
+        self.children = []
         for move in moves:
-            self.children.append(Node(move, self))
+            child = Node(move, self)
+            self.children.append(child)
+            yield child
+        self.expanded = True
 
     def as_string(node, depth=0):
-        result = " " * depth + f"{str(node.move)} ({node.score})"
+        move = Move.unpack(node.move) if isinstance(node.move, int) else node.move
+        result = " " * depth + f"{str(move)} ({node.score})"
         for child in node.children:
             result += "\n" + Node.as_string(child, depth + 1)
         return result
@@ -22,3 +22,8 @@ def opposing_side(side: Side):
         return Side.BLACK
     else:
         return Side.WHITE
+
+# Turn order lookups, for hot paths where calling next_turn is too slow.
+NEXT_TURN = {side: next_turn(side) for side in Side}
+PREVIOUS_TURN = {after: before for before, after in NEXT_TURN.items()}
+OPPOSING_SIDE = {side: opposing_side(side) for side in Side}
@@ -0,0 +1,66 @@
+""" Precomputed line, ray and between masks, indexed by square. These are
+    built once at import so move generation and evaluation can index into
+    them rather than recalculating masks on every call.
+"""
+from . import consts
+from . import squares
+
+# Ray directions, as (file delta, rank delta) pairs. Keys match the
+# index shifts used by utils.Direction, so either can be used to index
+# the RAYS table.
+_DIRECTIONS = {
+     8: ( 0,  1), # North
+     1: ( 1,  0), # East
+    -8: ( 0, -1), # South
+    -1: (-1,  0), # West
+     9: ( 1,  1), # North-east
+     7: (-1,  1), # North-west
+    -7: ( 1, -1), # South-east
+    -9: (-1, -1), # South-west
+}
+
+def _generate_ray(idx: int, file_delta: int, rank_delta: int):
+    """ Returns a bitboard of all squares from (but excluding) the given
+        square index to the edge of the board in the given direction.
+    """
+    result = consts.EMPTY
+    file, rank = idx % 8 + file_delta, idx // 8 + rank_delta
+    while 0 <= file < 8 and 0 <= rank < 8:
+        result |= squares.masks[rank * 8 + file]
+        file, rank = file + file_delta, rank + rank_delta
+    return result
+
+# Rays - RAYS[direction][square] gives the squares reachable from square
+# when sliding in direction on an empty board.
+RAYS = {
+    direction: [_generate_ray(idx, *deltas) for idx in range(64)]
+    for direction, deltas in _DIRECTIONS.items()
+}
+
+# Full lines through each square. The square itself is included.
+RANKS = [consts.LOOKUP_RANK[idx // 8] for idx in range(64)]
+FILES = [consts.LOOKUP_FILE[idx % 8] for idx in range(64)]
+DIAGONALS = [
+    RAYS[9][idx] | RAYS[-9][idx] | squares.masks[idx] for idx in range(64)
+]
+ANTIDIAGONALS = [
+    RAYS[7][idx] | RAYS[-7][idx] | squares.masks[idx] for idx in range(64)
+]
+
+def _generate_line_tables():
+    """ Builds the LINES and BETWEEN tables. For each pair of aligned
+        squares, LINES holds the full line passing through both, and BETWEEN
+        holds the squares strictly between them. Unaligned pairs are empty.
+    """
+    lines = [[consts.EMPTY] * 64 for _ in range(64)]
+    between = [[consts.EMPTY] * 64 for _ in range(64)]
+    for a in range(64):
+        for direction, rays in RAYS.items():
+            opposite = RAYS[-direction]
+            for b in range(64):
+                if not rays[a] & squares.masks[b]:
+                    continue
+                lines[a][b] = rays[a] | opposite[a] | squares.masks[a]
+                between[a][b] = rays[a] & opposite[b]
+    return lines, between
+LINES, BETWEEN = _generate_line_tables()
@@ -2,6 +2,7 @@
 """
 from . import squares
 from . import consts
+from . import tables
 
 import numpy as np
 from enum import IntEnum
@@ -48,26 +49,16 @@ def get_file(idx: int):
 def get_diagonal(idx: int):
     """ Returns a bitboard representing the diagonal
         passing through a given square index (on the a1-h8
-        axis). Works by shifting the a1h8 diagonal above the
-        board, then shifting back down until it overlaps
-        with the provided square.
+        axis). See tables.DIAGONALS.
     """
-    result = consts.DIAG_A1H8 << 56
-    while result & squares.masks[idx] == 0:
-        result = result >> 8
-    return result & consts.FILLED
+    return tables.DIAGONALS[idx]
 
 def get_antidiagonal(idx: int):
     """ Returns a bitboard representing the diagonal
         passing through a given square index (on the a8-h1
-        axis). Works by shifting the a8h1 diagonal above the
-        board, then shifting back down until it overlaps
-        with the provided square.
+        axis). See tables.ANTIDIAGONALS.
     """
-    result = consts.DIAG_A8H1 << 56
-    while result & squares.masks[idx] == 0:
-        result = result >> 8
-    return result & consts.FILLED
+    return tables.ANTIDIAGONALS[idx]
 
 def get_squares(board: int):
     """ Returns an array of square indices for all squares in a
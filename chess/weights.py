@@ -0,0 +1,43 @@
+""" Weight tables for incrementally maintained evaluation terms, such as
+    material and piece-square scores. A table is flattened to a list of
+    16 * 64 weights, indexed by (pieces.PIECE_INDEX << 6) | square, so the
+    board can update per-side totals with a single lookup per changed
+    square (see Board.register_weights).
+"""
+from . import utils
+from .pieces import Piece, PieceType, PIECE_INDEX, SIDE_INDEX, TYPE_INDEX
+from .sides import Side
+
+def build_weights(table: dict) -> list:
+    """ Flattens a weight table. Keys are either a Piece (weights for one
+        side) or a PieceType (the same weights for both sides). Values are
+        either a single weight, or a sequence of 64 weights indexed by
+        square. Pieces missing from the table weigh nothing.
+    """
+    result = [0] * (16 * 64)
+    for key, value in table.items():
+        if key in (Piece.EMPTY, PieceType.DUCK, Piece.DUCK):
+            continue
+        if isinstance(key, Piece):
+            indices = [PIECE_INDEX[key]]
+        else:
+            indices = [SIDE_INDEX[side] + TYPE_INDEX[key] for side in (Side.WHITE, Side.BLACK)]
+        weights = [value] * 64 if isinstance(value, (int, float)) else list(value)
+        if len(weights) != 64:
+            raise ValueError(f"expected 64 square weights for {key!r}, got {len(weights)}")
+        for index in indices:
+            result[index << 6:(index + 1) << 6] = weights
+    return result
+
+def weight_totals(bitboards: list, weights: list) -> list:
+    """ Sums a flattened weight table over the pieces in a list of
+        bitboards (see board.PositionBoards), returning [white, black].
+    """
+    totals = [0, 0]
+    for side in (Side.WHITE, Side.BLACK):
+        side_index = SIDE_INDEX[side]
+        for type_index in range(1, 7):
+            base = (side_index + type_index) << 6
+            for square in utils.get_squares(bitboards[side_index + type_index]):
+                totals[side_index >> 3] += weights[base | square]
+    return totals
@@ -1,113 +1,231 @@
 """ Lookup tables for Zobrist hashing.
-    See https://www.chessprogramming.org/Zobrist_Hashing for 
+    See https://www.chessprogramming.org/Zobrist_Hashing for
     details on the method.
 """
-from .moves import Move, MoveType
-from .pieces import Piece, PieceType
-from .sides import Side, opposing_side
+from .moves import Move, MoveType, move_fields
+from .pieces import Piece, PieceType, PIECE_INDEX, SIDE_INDEX, TYPE_INDEX
+from .sides import Side, next_turn, opposing_side
 from .squares import *
 from .consts import *
-from .utils import get_squares
+from .utils import get_squares, Direction
+from .keyfile import (
+    read_key_file, FILE_PIECES, FILE_TURNS, CASTLING_SQUARES,
+    PIECE_OFFSET, TURN_OFFSET, CASTLING_OFFSET, EN_PASSANT_OFFSET
+)
 
-import random
+# Plain int values for zbr_move (see the note in moves.py)
+_CASTLE_KINGSIDE  = MoveType.CASTLE_KINGSIDE.value
+_CASTLE_QUEENSIDE = MoveType.CASTLE_QUEENSIDE.value
+_EN_PASSANT       = MoveType.EN_PASSANT.value
+_DUCK             = PieceType.DUCK.value
+_WHITE            = Side.WHITE.value
+_SOUTH, _NORTH    = Direction.SOUTH.value, Direction.NORTH.value
 
-_KEY_SIZE = (2 ** 64) - 1
+_sides = [Side.WHITE, Side.WHITE_DUCK, Side.BLACK, Side.BLACK_DUCK]
 
-# Fixing the random seed allows for storing e.g., opening books 
-# or positions between sessions.
-zobrist_rng = random.Random(271082) # 271082
+# Lookup tables
+# The keys are loaded from a versioned key file (see keyfile.py), so they
+# don't depend on the seed of an RNG or the iteration order of the enums.
+# Each set of keys is laid out in the tables below.
 
-_sides = [Side.WHITE, Side.WHITE_DUCK, Side.BLACK, Side.BLACK_DUCK]
-_pieces = [
-    p for p in Piece
-]
-_squares = [n for n in range(64)]
-
-# Initialising lookup tables
-_piece_lookup = {
-    piece: [zobrist_rng.randint(0, _KEY_SIZE) for _ in _squares]
-    for piece in _pieces
-}
-
-# Initialising other terms
-_turns = {
-    side: zobrist_rng.randint(0, _KEY_SIZE)
-    for side in _sides
-}
-
-# All possible castling rights configurations
-_castle_rights = {
-    EMPTY: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[h1]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1] | masks[h1]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1] | masks[a8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[h1] | masks[a8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1] | masks[h1] | masks[a8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1] | masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[h1] | masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1] | masks[h1] | masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a8] | masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[a1] | masks[a8] | masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    masks[h1] | masks[a8] | masks[h8]: zobrist_rng.randint(0, _KEY_SIZE),
-    INIT_CASTLE_RIGHTS: zobrist_rng.randint(0, _KEY_SIZE),
-}
-
-# En Passant
-_en_passant = {
-    masks[square]: zobrist_rng.randint(0, _KEY_SIZE) for square in range(64)
-}
-_en_passant[EMPTY] = EMPTY
+# Piece keys are flattened and indexed by (pieces.PIECE_INDEX << 6) | square,
+# like the weight tables (see weights.py). The slots of the aggregate
+# bitboards (sides, occupied) are left as zeros.
+def _generate_piece_keys(keys: list):
+    result = [0] * (16 * 64)
+    for n, piece in enumerate(FILE_PIECES):
+        base = PIECE_INDEX[piece] << 6
+        offset = PIECE_OFFSET + (n << 6)
+        result[base:base + 64] = keys[offset:offset + 64]
+    return result
+
+def _generate_turn_keys(keys: list):
+    return {side: keys[TURN_OFFSET + n] for n, side in enumerate(FILE_TURNS)}
+
+# Turn transitions - XORing TURN_DELTAS[side] into a hash moves its turn
+# term from side to the next side to play (see Board.skip_move).
+def _generate_turn_deltas(turn_keys: dict):
+    return {side: turn_keys[side] ^ turn_keys[next_turn(side)] for side in _sides}
+
+# Castling rights are hashed with one key per rook square, so the key of a
+# set of rights is the XOR of its squares' keys. The table is keyed by
+# castling rights bitboard, and also serves as the delta for a change of
+# rights: CASTLING_KEYS[before ^ after].
+def _generate_castling_keys(keys: list):
+    corners = [masks[square] for square in CASTLING_SQUARES]
+    corner_keys = keys[CASTLING_OFFSET:CASTLING_OFFSET + len(corners)]
+    result = {}
+    for rights in range(1 << len(corners)):
+        mask = key = EMPTY
+        for bit, (corner, corner_key) in enumerate(zip(corners, corner_keys)):
+            if rights & (1 << bit):
+                mask |= corner
+                key ^= corner_key
+        result[mask] = key
+    return result
+
+# En passant keys, indexed by the bit length of the en passant bitboard
+# (i.e., square + 1, or 0 for no en passant square)
+def _generate_en_passant_keys(keys: list):
+    return [EMPTY] + keys[EN_PASSANT_OFFSET:EN_PASSANT_OFFSET + 64]
+
+# Castles move two pieces each, so their piece terms are precomputed by
+# (side, move type).
+def _generate_castle_deltas(piece_keys: list):
+    result = {}
+    for side in (Side.WHITE, Side.BLACK):
+        king_base = (SIDE_INDEX[side] + TYPE_INDEX[PieceType.KING]) << 6
+        rook_base = (SIDE_INDEX[side] + TYPE_INDEX[PieceType.ROOK]) << 6
+        for move_type, castling in (
+            (MoveType.CASTLE_KINGSIDE, CASTLING_KINGSIDE),
+            (MoveType.CASTLE_QUEENSIDE, CASTLING_QUEENSIDE)
+        ):
+            delta = EMPTY
+            for square in castling[side]["KING_SQUARES"]:
+                delta ^= piece_keys[king_base | square]
+            for square in castling[side]["ROOK_SQUARES"]:
+                delta ^= piece_keys[rook_base | square]
+            result[side, move_type] = delta
+    return result
+
+_keys, _verification_keys = read_key_file()
+
+PIECE_KEYS      = _generate_piece_keys(_keys)
+TURN_KEYS       = _generate_turn_keys(_keys)
+TURN_DELTAS     = _generate_turn_deltas(TURN_KEYS)
+CASTLING_KEYS   = _generate_castling_keys(_keys)
+EN_PASSANT_KEYS = _generate_en_passant_keys(_keys)
+_CASTLE_DELTAS  = _generate_castle_deltas(PIECE_KEYS)
+_DUCK_BASE = PIECE_INDEX[Piece.DUCK] << 6
+
+# Verification keys
+# An independent set of keys for an optional second 64-bit hash, which
+# caches and stores can keep alongside the main hash to reject entries
+# whose main hash collides (see Board.enable_verification). The two hashes
+# together behave like a 128-bit key.
+VERIFICATION_PIECE_KEYS      = _generate_piece_keys(_verification_keys)
+VERIFICATION_TURN_KEYS       = _generate_turn_keys(_verification_keys)
+VERIFICATION_TURN_DELTAS     = _generate_turn_deltas(VERIFICATION_TURN_KEYS)
+VERIFICATION_CASTLING_KEYS   = _generate_castling_keys(_verification_keys)
+VERIFICATION_EN_PASSANT_KEYS = _generate_en_passant_keys(_verification_keys)
+_VERIFICATION_CASTLE_DELTAS  = _generate_castle_deltas(VERIFICATION_PIECE_KEYS)
 
 def zbr_hash(board):
     """ Calculates the Zobrist hash of a board from scratch.
     """
+    return zbr_position(
+        board.mailbox,
+        board.boards.duck,
+        board.turn,
+        board.castle_rights,
+        board.en_passant
+    )
+
+def zbr_verification(board):
+    """ Calculates the verification hash of a board from scratch.
+    """
+    return zbr_position(
+        board.mailbox,
+        board.boards.duck,
+        board.turn,
+        board.castle_rights,
+        board.en_passant,
+        verification=True
+    )
+
+def zbr_position(mailbox: list, duck: int, turn: Side, castle_rights: int, en_passant: int, verification: bool=False) -> int:
+    """ Calculates the Zobrist hash of a position from its parts (or its
+        verification hash, if verification is true). The duck isn't kept in
+        the mailbox, so it's hashed from its bitboard.
+    """
+    if verification:
+        piece_keys, turn_keys = VERIFICATION_PIECE_KEYS, VERIFICATION_TURN_KEYS
+        castling_keys, en_passant_keys = VERIFICATION_CASTLING_KEYS, VERIFICATION_EN_PASSANT_KEYS
+    else:
+        piece_keys, turn_keys = PIECE_KEYS, TURN_KEYS
+        castling_keys, en_passant_keys = CASTLING_KEYS, EN_PASSANT_KEYS
+
     zbr = 0
-    for idx, piece in enumerate(board.mailbox):
-        zbr ^= _piece_lookup[piece][idx]
-    zbr ^= _castle_rights[board.castle_rights]
-    zbr ^= _en_passant[board.en_passant]
-    zbr ^= _turns[board.turn]
-    
+    for idx, piece in enumerate(mailbox):
+        # Empty squares aren't hashed, matching the incremental update.
+        if piece:
+            zbr ^= piece_keys[(PIECE_INDEX[piece] << 6) | idx]
+    if duck:
+        zbr ^= piece_keys[_DUCK_BASE | (duck.bit_length() - 1)]
+    zbr ^= castling_keys[castle_rights]
+    zbr ^= en_passant_keys[en_passant.bit_length()]
+    zbr ^= turn_keys[turn]
     return zbr
 
-def zbr_update(zbr: int, properties: tuple, side: Side=None, move: Move=None, capture: Piece=Piece.EMPTY):
-    """ Updates a Zobrist hash based on a given move.
+def zbr_move(
+        side: Side,
+        move_type: MoveType,
+        piece: PieceType,
+        from_index: int,
+        to_index: int,
+        promotion: PieceType=None,
+        capture: Piece=Piece.EMPTY,
+        piece_keys: list=PIECE_KEYS,
+        castle_deltas: dict=_CASTLE_DELTAS
+    ) -> int:
+    """ Returns the change in the piece terms of a hash for a move played by
+        side (a single XOR per changed square). Takes the fields returned by
+        moves.move_fields, and the captured piece. For duck moves, from_index
+        must be the duck's previous square (None if it wasn't placed yet).
+        The keys default to the main hash's (see zbr_verification_move).
+    """
+    if move_type == _CASTLE_KINGSIDE or move_type == _CASTLE_QUEENSIDE:
+        return castle_deltas[side, move_type]
+
+    if piece == _DUCK:
+        delta = piece_keys[_DUCK_BASE | to_index]
+        if from_index is not None:
+            delta ^= piece_keys[_DUCK_BASE | from_index]
+        return delta
+
+    side_index = SIDE_INDEX[side]
+    base = (side_index + TYPE_INDEX[piece]) << 6
+    # Promoted pawns arrive as the promotion piece
+    placed = (side_index + TYPE_INDEX[promotion]) << 6 if promotion else base
+    delta = piece_keys[base | from_index] ^ piece_keys[placed | to_index]
+    # Remove the captured piece, if applicable
+    if capture:
+        if move_type == _EN_PASSANT:
+            to_index += _SOUTH if side == _WHITE else _NORTH
+        delta ^= piece_keys[(PIECE_INDEX[capture] << 6) | to_index]
+    return delta
+
+def zbr_verification_move(
+        side: Side,
+        move_type: MoveType,
+        piece: PieceType,
+        from_index: int,
+        to_index: int,
+        promotion: PieceType=None,
+        capture: Piece=Piece.EMPTY
+    ) -> int:
+    """ Returns the change in the piece terms of a verification hash for a
+        move (see zbr_move).
+    """
+    return zbr_move(
+        side, move_type, piece, from_index, to_index, promotion, capture,
+        VERIFICATION_PIECE_KEYS, _VERIFICATION_CASTLE_DELTAS
+    )
+
+def zbr_update(zbr: int, properties: tuple, side: Side=None, move: Move | int=None, capture: Piece=Piece.EMPTY):
+    """ Updates a Zobrist hash based on a given move. The move may be a
+        Move object or a packed integer. Properties is a pair of
+        (turn, castle rights, en passant) tuples, from before and after
+        the move.
     """
     # Update properties
-    zbr ^= _turns[properties[0].turn]
-    zbr ^= _turns[properties[1].turn]
-    zbr ^= _castle_rights[properties[0].castle_rights]
-    zbr ^= _castle_rights[properties[1].castle_rights]
-    zbr ^= _en_passant[properties[0].en_passant]
-    zbr ^= _en_passant[properties[1].en_passant]
+    (turn, castle_rights, en_passant), (next_turn, next_castle_rights, next_en_passant) = properties
+    zbr ^= TURN_KEYS[turn]
+    zbr ^= TURN_KEYS[next_turn]
+    zbr ^= CASTLING_KEYS[castle_rights ^ next_castle_rights]
+    zbr ^= EN_PASSANT_KEYS[en_passant.bit_length()]
+    zbr ^= EN_PASSANT_KEYS[next_en_passant.bit_length()]
 
     if not side and not move:
         return zbr
-
-    # Castling
-    if move.move_type in (MoveType.CASTLE_KINGSIDE, MoveType.CASTLE_QUEENSIDE):
-        # Set variables depending on the type/side of the castling
-        castling_lookup = \
-            CASTLING_KINGSIDE if move.move_type == MoveType.CASTLE_KINGSIDE \
-            else CASTLING_QUEENSIDE
-        king_piece = Piece.W_KING if side == Side.WHITE else Piece.B_KING
-        rook_piece = Piece.W_ROOK if side == Side.WHITE else Piece.B_ROOK
-
-        # Update the hash
-        zbr ^= _piece_lookup[king_piece][castling_lookup[side]["KING_SQUARES"][0]]
-        zbr ^= _piece_lookup[king_piece][castling_lookup[side]["KING_SQUARES"][1]]
-        zbr ^= _piece_lookup[rook_piece][castling_lookup[side]["ROOK_SQUARES"][0]]
-        zbr ^= _piece_lookup[rook_piece][castling_lookup[side]["ROOK_SQUARES"][1]]
-    # Update the moved piece
-    else:
-        piece = move.piece ^ side if move.piece != PieceType.DUCK else Piece.DUCK
-        if move.from_index:
-            zbr ^= _piece_lookup[piece][move.from_index]
-        zbr ^= _piece_lookup[piece][move.to_index]
-        # Remove the captured piece, if applicable
-        if capture != Piece.EMPTY:
-            zbr ^= _piece_lookup[capture][move.to_index]
-    return zbr
+    return zbr ^ zbr_move(side, *move_fields(move), capture)
@@ -1,6 +1,7 @@
 """ 'Goose' - a chess engine using the traditional approach.
 """
 from chess.board import Board
+from chess.cache import MoveCache
 from chess.moves import Move, MoveType, KING_TEMPLATES
 from chess.sides import Side, opposing_side
 from chess.pieces import PieceType
@@ -28,33 +29,31 @@ class Goose(Agent):
     EVAL_ROOK_VALUE   = 5
     EVAL_QUEEN_VALUE  = 9
     EVAL_KING_VALUE   = 100_000
+    # Entries in the move list cache (see chess.cache), or 0 for no cache.
+    # Searches at the default depth don't revisit positions, so it's off.
+    MOVE_CACHE_SIZE = 0
+    MATERIAL_WEIGHTS = "goose_v1.material"
 
     def __init__(self):
-        self.board: Board = Board()
+        self.board: Board = Board(MoveCache(Goose.MOVE_CACHE_SIZE) if Goose.MOVE_CACHE_SIZE else None)
         self.current: Node  = Node()
         self.stats = Stats()
         self.transpositions = {}
 
     def eval_material(board: Board):
-        white = board.boards.pieces[Side.WHITE]
-        black = board.boards.pieces[Side.BLACK]
-
-        pawn_diff   = white[PieceType.PAWN].bit_count()   - black[PieceType.PAWN].bit_count()
-        knight_diff = white[PieceType.KNIGHT].bit_count() - black[PieceType.KNIGHT].bit_count()
-        bishop_diff = white[PieceType.BISHOP].bit_count() - black[PieceType.BISHOP].bit_count()
-        rook_diff   = white[PieceType.ROOK].bit_count()   - black[PieceType.ROOK].bit_count()
-        queen_diff  = white[PieceType.QUEEN].bit_count()  - black[PieceType.QUEEN].bit_count()
-        king_diff   = white[PieceType.KING].bit_count()   - black[PieceType.KING].bit_count()
-
-        material_score = 0
-        material_score += pawn_diff   * Goose.EVAL_PAWN_VALUE 
-        material_score += knight_diff * Goose.EVAL_KNIGHT_VALUE 
-        material_score += bishop_diff * Goose.EVAL_BISHOP_VALUE 
-        material_score += rook_diff   * Goose.EVAL_ROOK_VALUE 
-        material_score += queen_diff  * Goose.EVAL_QUEEN_VALUE 
-        material_score += king_diff   * Goose.EVAL_KING_VALUE
-
-        return material_score
+        # Material totals are maintained incrementally by the board, once
+        # the weights are registered (on the first evaluation).
+        totals = board.weight_totals(Goose.MATERIAL_WEIGHTS)
+        if totals is None:
+            totals = board.register_weights(Goose.MATERIAL_WEIGHTS, {
+                PieceType.PAWN:   Goose.EVAL_PAWN_VALUE,
+                PieceType.KNIGHT: Goose.EVAL_KNIGHT_VALUE,
+                PieceType.BISHOP: Goose.EVAL_BISHOP_VALUE,
+                PieceType.ROOK:   Goose.EVAL_ROOK_VALUE,
+                PieceType.QUEEN:  Goose.EVAL_QUEEN_VALUE,
+                PieceType.KING:   Goose.EVAL_KING_VALUE
+            })
+        return totals[0] - totals[1]
 
     def evaluate(board: Board, **kwargs: dict):
         score = 0
@@ -64,7 +63,7 @@ class Goose(Agent):
         return score
 
     def reset(self):
-        self.board: Board = Board()
+        self.board: Board = Board(MoveCache(Goose.MOVE_CACHE_SIZE) if Goose.MOVE_CACHE_SIZE else None)
         self.current: Node  = Node()
         self.stats = Stats()
         self.transpositions = {}
@@ -74,11 +73,13 @@ class Goose(Agent):
 
     def play_move(self, move: Move):
         if move.move_type != MoveType.DUCK:
-            if not self.current.children:
+            if not self.current.expanded:
                 self.current.expand(self.board.generate_moves())
             
             for child in self.current.children:
-                if child.move == move:
+                # Searches expand nodes with packed moves.
+                child_move = Move.unpack(child.move) if isinstance(child.move, int) else child.move
+                if child_move == move:
                     self.current = child
                     self.current.parent = None
                     break
@@ -6,7 +6,9 @@ from chess.sides import Side, opposing_side
 from chess.pieces import PieceType
 
 from agent import Agent
+from chess import binary
 from chess import consts
+from chess import fen
 from chess.search.algorithms import alpha_beta_nn
 from chess.search.node import Node
 from game_manager import GameManager
@@ -14,12 +16,8 @@ from game_manager import GameManager
 import random
 import numpy as np
 import tensorflow as tf
-from bitarray.util import int2ba
 from math import inf as infinity
 
-def bitboard_to_list(board: int):
-    return np.reshape(int2ba(board, length=64, endian='big').tolist(), (8, 8))
-
 class Swan(Agent):
     def __init__(self, model_path: str=None):
         self.board:     Board = Board()
@@ -99,13 +97,15 @@ class Swan(Agent):
         training_outputs = []
         test_inputs = []
         test_outputs = []
-        for record in raw_training_data:
-            board = Board.from_fen_string(record[0])
+        # Encode the positions in one batch, rather than building a board
+        # for each record.
+        inputs = fen.encode_fens(record[0] for record in raw_training_data)
+        for record, data in zip(raw_training_data, inputs):
             if random.random() > 0.2:
-                training_inputs.append(Swan.build_model_input(board))
+                training_inputs.append(data)
                 training_outputs.append(record[1])
             else:
-                test_inputs.append(Swan.build_model_input(board))
+                test_inputs.append(data)
                 test_outputs.append(record[1])
 
         print("Beginning training run...")
@@ -149,19 +149,10 @@ class Swan(Agent):
         return result
 
     def build_model_input(board: Board):
-        data = []
-        for b in board.boards.pieces[Side.WHITE].values():
-            data.append(bitboard_to_list(b))
-        for b in board.boards.pieces[Side.BLACK].values():
-            data.append(bitboard_to_list(b))
-        data.append(bitboard_to_list(board.boards.white))
-        data.append(bitboard_to_list(board.boards.black))
-        data.append(bitboard_to_list(board.boards.duck))
-        data.append(bitboard_to_list(board.boards.occupied))
-        data.append(bitboard_to_list(board.castle_rights))
-        data.append(bitboard_to_list(board.en_passant))
-        data = np.array(data)
-        return data
+        """ Encodes a board as (18, 8, 8) input planes (see
+            binary.array_to_planes).
+        """
+        return binary.array_to_planes(binary.boards_to_array([board]))[0]
 
     def evaluate(board: Board, **kwargs: dict):
         model = kwargs['model']
@@ -180,11 +171,13 @@ class Swan(Agent):
 
     def play_move(self, move: Move):
         if move.move_type != MoveType.DUCK:
-            if not self.current.children:
+            if not self.current.expanded:
                 self.current.expand(self.board.generate_moves())
             
             for child in self.current.children:
-                if child.move == move:
+                # Searches expand nodes with packed moves.
+                child_move = Move.unpack(child.move) if isinstance(child.move, int) else child.move
+                if child_move == move:
                     self.current = child
                     self.current.parent = None
                     break
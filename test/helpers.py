@@ -0,0 +1,17 @@
+""" Shared helpers for the unit tests """
+from chess.board import Board, GameState
+
+from random import Random
+
+def random_boards(seed: int, games: int) -> list:
+    """ Plays games of random moves, and returns a copy (without history)
+        of the board after every move.
+    """
+    rng = Random(seed)
+    boards = []
+    for _ in range(games):
+        board = Board()
+        while board.game_state == GameState.ONGOING:
+            board.make_move(rng.choice(board.generate_moves()))
+            boards.append(board.copy(history=False))
+    return boards
@@ -2,7 +2,11 @@
 import unittest
 from chess import utils
 from chess import squares
+from chess import attacks
 from chess import consts
+from chess import tables
+from chess.moves import KING_TEMPLATES, KNIGHT_TEMPLATES, PAWN_CAPTURE_TEMPLATES
+from chess.sides import Side
 
 import random
 
@@ -30,6 +34,42 @@ class TestAlgorithms(unittest.TestCase):
             mask = squares.masks[idx]
             self.assertTrue(utils.get_antidiagonal(idx) & mask)
 
+    def test_rays(self):
+        expected = consts.EMPTY
+        for square in [squares.e5, squares.e6, squares.e7, squares.e8]:
+            expected |= squares.masks[square]
+        self.assertEqual(tables.RAYS[utils.Direction.NORTH][squares.e4], expected)
+
+        expected = consts.EMPTY
+        for square in [squares.d3, squares.c2, squares.b1]:
+            expected |= squares.masks[square]
+        self.assertEqual(tables.RAYS[utils.Direction.SWEST][squares.e4], expected)
+
+        self.assertEqual(tables.RAYS[utils.Direction.WEST][squares.a4], consts.EMPTY)
+
+    def test_between(self):
+        expected = consts.EMPTY
+        for square in [squares.c3, squares.d4, squares.e5]:
+            expected |= squares.masks[square]
+        self.assertEqual(tables.BETWEEN[squares.b2][squares.f6], expected)
+        self.assertEqual(tables.BETWEEN[squares.f6][squares.b2], expected)
+        # Adjacent and unaligned squares have nothing between them.
+        self.assertEqual(tables.BETWEEN[squares.e4][squares.e5], consts.EMPTY)
+        self.assertEqual(tables.BETWEEN[squares.a1][squares.b3], consts.EMPTY)
+
+    def test_lines(self):
+        for idx in range(64):
+            for other in range(64):
+                if other == idx:
+                    continue
+                line = tables.LINES[idx][other]
+                if line:
+                    self.assertIn(line, (
+                        utils.get_rank(idx), utils.get_file(idx),
+                        utils.get_diagonal(idx), utils.get_antidiagonal(idx)
+                    ))
+                    self.assertTrue(line & squares.masks[other])
+
     def test_get_squares(self):
         white_pieces = consts.INIT_WHITE_PIECES
         squares = utils.get_squares(white_pieces)
@@ -145,3 +185,38 @@ class TestAlgorithms(unittest.TestCase):
         result = diag | anti
 
         self.assertEqual(result, expected)
+
+    def test_sliding_attacks(self):
+        # Table lookups should match hyperbola quintessence on random boards.
+        for _ in range(1_000):
+            idx = self.random.randrange(64)
+            piece = squares.masks[idx]
+            occupancy = self.random.getrandbits(64) & self.random.getrandbits(64) | piece
+
+            rank = utils.hyperbola_quintessence(occupancy, utils.get_rank(idx), piece)
+            file = utils.hyperbola_quintessence(occupancy, utils.get_file(idx), piece)
+            diag = utils.hyperbola_quintessence(occupancy, utils.get_diagonal(idx), piece)
+            anti = utils.hyperbola_quintessence(occupancy, utils.get_antidiagonal(idx), piece)
+
+            self.assertEqual(attacks.rook_attacks(idx, occupancy), rank | file)
+            self.assertEqual(attacks.bishop_attacks(idx, occupancy), diag | anti)
+            self.assertEqual(attacks.queen_attacks(idx, occupancy), rank | file | diag | anti)
+
+    def test_set_attacks(self):
+        # Set-wise attacks should match the union of the per-square templates.
+        for _ in range(1_000):
+            origins = self.random.getrandbits(64) & self.random.getrandbits(64)
+            knights = consts.EMPTY
+            kings = consts.EMPTY
+            for idx in utils.get_squares(origins):
+                knights |= KNIGHT_TEMPLATES[idx]
+                kings |= KING_TEMPLATES[idx]
+            self.assertEqual(attacks.knight_attacks(origins), knights)
+            self.assertEqual(attacks.king_attacks(origins), kings)
+
+            pawns = origins & utils.invert(consts.RANK_1 | consts.RANK_8)
+            for side in (Side.WHITE, Side.BLACK):
+                expected = consts.EMPTY
+                for idx in utils.get_squares(pawns):
+                    expected |= PAWN_CAPTURE_TEMPLATES[side][idx]
+                self.assertEqual(attacks.pawn_attacks(pawns, side), expected)
@@ -0,0 +1,122 @@
+""" Binary position codec unit tests """
+import unittest
+from chess.board import Board, DUCK_INDEX, POSITION_SIZE
+from chess.pieces import PieceType
+from chess.sides import Side
+from chess import binary
+from test.helpers import random_boards
+
+import numpy as np
+from multiprocessing import Pool
+
+class TestBinary(unittest.TestCase):
+    def test_round_trip(self):
+        for string in (
+            "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 4 300",
+            "4k3/8/8/3@4/8/8/8/4K3 w@ - - 0 1",
+            "rnbqkbnr/pp1p1ppp/8/2pPp3/8/8/PPP1PPPP/RNBQKBNR w KQkq e6 0 3",
+        ):
+            data = Board.from_fen_string(string).to_bytes()
+            self.assertEqual(len(data), POSITION_SIZE)
+            self.assertEqual(Board.from_bytes(data).to_fen_string(), string)
+
+        for board in random_boards(1729, 5):
+            decoded = Board.from_bytes(board.to_bytes())
+            # Everything but the (unresolved) game state is restored.
+            self.assertEqual(decoded.snapshot()[:-1], board.snapshot()[:-1])
+            self.assertEqual(decoded.game_state, board.game_state)
+
+        with self.assertRaises(ValueError):
+            Board.from_bytes(bytes(POSITION_SIZE - 1))
+
+    def test_encoding_limits(self):
+        # Both encoders reject positions that don't fit a record.
+        crowded = Board.from_fen_string("rnbqkbnr/pppppppp/8/8/8/PPP5/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        slow = Board()
+        slow.halfmove_clock = 256
+        long = Board()
+        long.fullmove_count = 0x10000
+        for board in (crowded, slow, long):
+            with self.assertRaises(ValueError) as single:
+                board.to_bytes()
+            with self.assertRaises(ValueError) as batch:
+                binary.encode_boards([Board(), board])
+            self.assertEqual(str(batch.exception), str(single.exception))
+
+    def test_vectorised(self):
+        boards = random_boards(4104, 3)
+        records = binary.encode_boards(boards)
+        self.assertEqual(records.shape, (len(boards), POSITION_SIZE))
+        self.assertEqual(records.tobytes(), b"".join(board.to_bytes() for board in boards))
+
+        bitboards, turn, castle_rights, en_passant, halfmove_clock, fullmove_count = \
+            binary.decode_positions(records.tobytes())
+        self.assertListEqual(bitboards.tolist(), [board.boards.bitboards for board in boards])
+        self.assertListEqual(turn.tolist(), [board.turn for board in boards])
+        self.assertListEqual(castle_rights.tolist(), [board.castle_rights for board in boards])
+        self.assertListEqual(en_passant.tolist(), [board.en_passant for board in boards])
+        self.assertListEqual(halfmove_clock.tolist(), [board.halfmove_clock for board in boards])
+        self.assertListEqual(fullmove_count.tolist(), [board.fullmove_count for board in boards])
+
+        self.assertTrue(np.array_equal(
+            binary.encode_positions(bitboards, turn, castle_rights, en_passant, halfmove_clock, fullmove_count),
+            records
+        ))
+        self.assertListEqual(
+            [board.zbr for board in binary.boards_from_records(records)],
+            [board.zbr for board in boards]
+        )
+
+    def test_shared_memory(self):
+        boards = random_boards(1093, 1)
+        block = binary.share_boards(boards)
+        try:
+            records = binary.shared_records(block)
+            self.assertEqual(records.tobytes(), binary.encode_boards(boards).tobytes())
+            del records
+            with Pool(2) as pool:
+                hashes = pool.map(_shared_hashes, [block.name] * 2)
+        finally:
+            block.close()
+            block.unlink()
+        self.assertListEqual(hashes, [[board.zbr for board in boards]] * 2)
+
+def _shared_hashes(name: str) -> list:
+    return [board.zbr for board in binary.boards_from_shared(name)]
+
+class TestPositionArrays(unittest.TestCase):
+    def test_round_trip(self):
+        boards = random_boards(2718, 2)
+        array = binary.boards_to_array(boards)
+        self.assertEqual((array.shape, array.dtype), ((len(boards), 16), np.uint64))
+        self.assertListEqual(array[:, binary.CASTLING_COLUMN].tolist(), [board.castle_rights for board in boards])
+        self.assertListEqual(array[:, binary.EN_PASSANT_COLUMN].tolist(), [board.en_passant for board in boards])
+        self.assertListEqual(array[:, DUCK_INDEX].tolist(), [board.boards.duck for board in boards])
+
+        rebuilt = binary.boards_from_array(
+            array,
+            turn=[board.turn for board in boards],
+            halfmove_clock=[board.halfmove_clock for board in boards],
+            fullmove_count=[board.fullmove_count for board in boards]
+        )
+        for board, copy in zip(boards, rebuilt):
+            self.assertEqual(copy.snapshot()[:-1], board.snapshot()[:-1])
+
+        # Without properties, boards default to white to move.
+        board = binary.boards_from_array(binary.boards_to_array([Board()]))[0]
+        self.assertEqual(board.snapshot(), Board().snapshot()[:-1] + (None,))
+
+    def test_planes(self):
+        boards = random_boards(3141, 1)
+        planes = binary.array_to_planes(binary.boards_to_array(boards))
+        self.assertEqual(planes.shape, (len(boards), 18, 8, 8))
+        for board, encoded in zip(boards, planes):
+            for plane, bitboard in (
+                (0, board.boards.pieces[Side.WHITE][PieceType.PAWN]),
+                (11, board.boards.pieces[Side.BLACK][PieceType.KING]),
+                (12, board.boards.white),
+                (13, board.boards.black),
+                (17, board.en_passant),
+            ):
+                expected = [(bitboard >> (63 - idx)) & 1 for idx in range(64)]
+                self.assertListEqual(encoded[plane].flatten().tolist(), expected)
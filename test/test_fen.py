@@ -0,0 +1,76 @@
+""" FEN codec unit tests """
+import unittest
+from chess.board import Board
+from chess import fen
+from chess.pieces import PieceType
+from chess.sides import Side
+from test.helpers import random_boards
+
+class TestFen(unittest.TestCase):
+    def test_round_trip(self):
+        # Castling rights and the duck survive a round trip.
+        for string in (
+            "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+            "r3k2r/8/8/8/8/8/8/R3K2R b Kk - 4 12",
+            "4k3/8/8/3@4/8/8/8/4K3 w@ - - 0 1",
+            "rnbqkbnr/pp1p1ppp/8/2pPp3/8/8/PPP1PPPP/RNBQKBNR w KQkq e6 0 3",
+        ):
+            self.assertEqual(Board.from_fen_string(string).to_fen_string(), string)
+            self.assertEqual(fen.board_to_fen(fen.board_from_fen(string)), string)
+
+    def test_legacy_fields(self):
+        # Older versions wrote an empty castling field for no rights (as in
+        # training_sets/models/swan_trained_gen4), and castling rights may
+        # be in any order. Both are parsed like Board.from_fen_string.
+        for string in (
+            "1nbqk2r/1p1ppp2/1p6/2p2p1p/2PPP1n1/r6N/P3B1PP/bNBQK1R1 w  - 3 11",
+            "r3k2r/8/8/8/8/8/8/R3K2R b Qk - 0 1",
+        ):
+            parsed = fen.board_from_fen(string)
+            self.assertEqual(parsed.snapshot(), Board.from_fen_string(string).snapshot())
+            self.assertEqual(fen.board_to_fen(parsed), Board.from_fen_string(string).to_fen_string())
+            self.assertEqual(fen.encode_fens([string]).shape, (1, 18, 8, 8))
+
+        for string in (
+            "4k3/8/8/8/8/8/8/4K3 x - - 0 1",
+            "4k3/8/8/8/8/8/8/4K3 w X - 0 1",
+            "4k3/8/8/8/8/8/8/4K3 w - z9 0 1",
+            "4k3/8/8/8/8/8/8/4Z3 w - - 0 1",
+        ):
+            with self.assertRaises(ValueError):
+                fen.encode_fens([string])
+
+    def test_matches_reference(self):
+        # The fast codec agrees with Board.to_fen_string/from_fen_string,
+        # including the hash of positions reached by playing moves.
+        for board in random_boards(8128, 15):
+            string = board.to_fen_string()
+            self.assertEqual(fen.board_to_fen(board), string)
+
+            parsed = fen.board_from_fen(string)
+            self.assertEqual(parsed.snapshot(), Board.from_fen_string(string).snapshot())
+            self.assertEqual(parsed.zbr, board.zbr)
+            self.assertListEqual(parsed.boards.bitboards, board.boards.bitboards)
+
+    def test_batch(self):
+        strings = [board.to_fen_string() for board in random_boards(496, 2)]
+        boards = list(fen.boards_from_fens(strings))
+        self.assertListEqual(fen.fens_from_boards(boards), strings)
+
+        planes = fen.encode_fens(strings)
+        self.assertEqual(planes.shape, (len(strings), 18, 8, 8))
+        for board, encoded in zip(boards, planes):
+            # Planes are laid out with h8 at the top left.
+            for plane, bitboard in (
+                (0, board.boards.pieces[Side.WHITE][PieceType.PAWN]),
+                (11, board.boards.pieces[Side.BLACK][PieceType.KING]),
+                (14, board.boards.duck),
+                (15, board.boards.occupied),
+                (16, board.castle_rights),
+            ):
+                expected = [(bitboard >> (63 - idx)) & 1 for idx in range(64)]
+                self.assertListEqual(encoded[plane].flatten().tolist(), expected)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            fen.board_from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1")
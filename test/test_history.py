@@ -0,0 +1,146 @@
+""" Move history unit tests """
+import unittest
+from chess.board import Board, GameState
+from chess.history import UndoStack
+from chess.moves import Move, MoveType
+from chess.pieces import Piece, PieceType
+from chess.sides import Side
+
+import pickle
+from random import Random
+
+class TestHistory(unittest.TestCase):
+    def test_push_pop(self):
+        stack = UndoStack(capacity=2)
+        for ply in range(5):
+            stack.push(None, Side.BLACK, 1 << ply, 0, 0, ply, 1, Piece.B_QUEEN, ply, 2 ** 64 - 1)
+        # The stack grows past its initial capacity.
+        self.assertEqual(len(stack), 5)
+        self.assertGreaterEqual(stack.capacity, 5)
+
+        properties = stack[-1]
+        self.assertIsNone(properties.game_state)
+        self.assertIs(properties.turn, Side.BLACK)
+        self.assertIs(properties.capture, Piece.B_QUEEN)
+        self.assertEqual(properties.duck, 1 << 4)
+        self.assertEqual(properties.zbr, 2 ** 64 - 1)
+        self.assertListEqual([p.move for p in stack], [0, 1, 2, 3, 4])
+
+        self.assertEqual(stack.pop(), 4)
+        self.assertEqual(len(stack), 4)
+        self.assertEqual(stack[-1].move, 3)
+        with self.assertRaises(IndexError):
+            stack[4]
+
+    def test_board_history(self):
+        board = Board()
+        self.assertEqual(len(board.history), 1)
+        board.make_move(Move.from_string("e2e4", MoveType.DOUBLE_PAWN))
+        self.assertEqual(len(board.history), 2)
+        self.assertEqual(board.history[-1].move, Move.from_string("e2e4", MoveType.DOUBLE_PAWN))
+        self.assertIs(board.history[-1].turn, Side.WHITE)
+        self.assertEqual(board.history[-1].game_state, GameState.ONGOING)
+
+    def test_unmake_game(self):
+        # Playing out whole games and unmaking every move should restore
+        # each earlier position exactly.
+        rng = Random(20221)
+        for _ in range(10):
+            board = Board()
+            positions = []
+            while board.game_state == GameState.ONGOING:
+                positions.append((board.to_fen_string(), board.zbr, board.boards.duck))
+                board.make_move(rng.choice(board.generate_moves(packed=True)))
+            while positions:
+                board.unmake_move()
+                self.assertEqual((board.to_fen_string(), board.zbr, board.boards.duck), positions.pop())
+            self.assertEqual(len(board.history), 1)
+
+    def test_copy(self):
+        rng = Random(404)
+        board = Board()
+        for _ in range(12):
+            board.make_move(rng.choice(board.generate_moves()))
+        fen, zbr = board.to_fen_string(), board.zbr
+
+        copy = board.copy()
+        self.assertEqual((copy.to_fen_string(), copy.zbr), (fen, zbr))
+        self.assertEqual(copy.boards.duck, board.boards.duck)
+        self.assertEqual(len(copy.history), len(board.history))
+
+        # The copy is independent of the original.
+        copy.make_move(rng.choice(copy.generate_moves()))
+        copy.unmake_move()
+        copy.unmake_move()
+        self.assertEqual((board.to_fen_string(), board.zbr), (fen, zbr))
+        self.assertEqual(len(board.history), 13)
+
+        fresh = board.copy(history=False)
+        self.assertEqual(len(fresh.history), 1)
+        self.assertEqual(fresh.to_fen_string(), fen)
+
+    def test_snapshot(self):
+        rng = Random(505)
+        board = Board()
+        for _ in range(9):
+            board.make_move(rng.choice(board.generate_moves()))
+        snapshot = board.snapshot()
+        self.assertEqual(hash(snapshot), hash(board.snapshot()))
+        fen, zbr, moves = board.to_fen_string(), board.zbr, board.generate_moves()
+
+        while len(board.history) > 1:
+            board.unmake_move()
+        board.restore(snapshot)
+        self.assertEqual((board.to_fen_string(), board.zbr), (fen, zbr))
+        self.assertListEqual(board.generate_moves(), moves)
+        self.assertEqual(len(board.history), 1)
+
+        restored = Board.from_snapshot(snapshot)
+        self.assertEqual(restored.snapshot(), snapshot)
+        self.assertListEqual(restored.generate_moves(), moves)
+
+    def test_pickle(self):
+        rng = Random(606)
+        board = Board()
+        board.register_weights("material", {PieceType.QUEEN: 9, PieceType.PAWN: 1})
+        for _ in range(40):
+            board.make_move(rng.choice(board.generate_moves()))
+
+        restored = pickle.loads(pickle.dumps(board))
+        self.assertEqual(restored.snapshot(), board.snapshot())
+        self.assertEqual(restored.weight_totals("material"), board.weight_totals("material"))
+        self.assertEqual(len(restored.history), 1)
+
+        # A history tail can be kept, and unmade.
+        board.pickled_plies = 6
+        restored = pickle.loads(pickle.dumps(board))
+        self.assertEqual(restored.snapshot(), board.snapshot())
+        self.assertEqual(len(restored.history), 7)
+        for _ in range(6):
+            board.unmake_move()
+            restored.unmake_move()
+        self.assertEqual(restored.to_fen_string(), board.to_fen_string())
+        self.assertEqual(restored.weight_totals("material"), board.weight_totals("material"))
+
+    def test_pickle_skips(self):
+        # Skipped turns in the history tail (as in a null move search) are
+        # replayed too.
+        board = Board()
+        board.pickled_plies = 5
+        board.make_move(Move.from_string("e2e4", MoveType.DOUBLE_PAWN))
+        board.skip_move()
+        board.make_move(Move.from_string("e7e5", MoveType.DOUBLE_PAWN))
+        board.make_move(board.generate_moves()[0])
+        board.make_move(Move.from_string("g1f3", MoveType.QUIET))
+        board.skip_move()
+
+        restored = pickle.loads(pickle.dumps(board))
+        self.assertEqual(restored.pickled_plies, 5)
+        self.assertEqual(restored.snapshot(), board.snapshot())
+        self.assertEqual(restored.zbr, board.zbr)
+        for _ in range(4):
+            board.unmake_move()
+            restored.unmake_move()
+            # Game states are resolved lazily, so compare them resolved.
+            self.assertEqual(restored.snapshot()[:-1], board.snapshot()[:-1])
+            self.assertEqual(restored.game_state, board.game_state)
@@ -2,10 +2,12 @@
 import unittest
 from chess.board import Board, GameState
 from chess.moves import Move, MoveType
-from chess.pieces import Piece, PieceType
+from chess.pieces import Piece, PieceType, PIECE_INDEX
 from chess.sides import Side
 from chess.consts import *
 from chess.squares import *
+from chess.utils import get_squares
+from chess.weights import build_weights, weight_totals
 
 from random import Random, choice
 
@@ -209,3 +211,68 @@ class TestMailbox(unittest.TestCase):
                     pass
                 self.assertListEqual(board.mailbox, current)
                 board.unmake_move()
+
+    def test_bitboard_integrity(self):
+        # The flat bitboard array should agree with the mailbox, and the
+        # per-side views should read from it.
+        for _ in range(100):
+            board = Board()
+            while board.game_state == GameState.ONGOING:
+                board.make_move(self.rng.choice(board.generate_moves()))
+
+                boards = board.boards
+                for side in (Side.WHITE, Side.BLACK):
+                    combined = EMPTY
+                    for piece_type, bitboard in boards.pieces[side].items():
+                        self.assertEqual(bitboard, boards.bitboards[PIECE_INDEX[piece_type | side]])
+                        for square in get_squares(bitboard):
+                            self.assertEqual(board.mailbox[square], piece_type | side)
+                        combined |= bitboard
+                    self.assertEqual(combined, boards.white if side == Side.WHITE else boards.black)
+                self.assertEqual(boards.occupied, boards.white | boards.black | boards.duck)
+
+    def test_piece_views(self):
+        board = Board()
+        white = board.boards.pieces[Side.WHITE]
+        self.assertListEqual(
+            list(white),
+            [PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN, PieceType.KING]
+        )
+        self.assertEqual(white[PieceType.PAWN], INIT_WHITE_PAWNS)
+        white[PieceType.PAWN] = EMPTY
+        self.assertEqual(board.boards.bitboards[PIECE_INDEX[Piece.W_PAWN]], EMPTY)
+        board.boards.duck = INIT_WHITE_KING
+        self.assertEqual(board.boards.bitboards[PIECE_INDEX[Piece.DUCK]], INIT_WHITE_KING)
+
+    def test_weight_totals(self):
+        # Incrementally maintained totals should match a full recount after
+        # every make and unmake.
+        rng = Random(6174)
+        material = {
+            PieceType.PAWN: 1, PieceType.KNIGHT: 3, PieceType.BISHOP: 3,
+            PieceType.ROOK: 5, PieceType.QUEEN: 9, PieceType.KING: 100
+        }
+        squares = {
+            Piece.W_KNIGHT: [rng.randrange(-50, 50) for _ in range(64)],
+            Piece.B_PAWN:   [rng.randrange(-50, 50) for _ in range(64)],
+            PieceType.KING: list(range(64)),
+        }
+        for _ in range(20):
+            board = Board()
+            self.assertListEqual(board.register_weights("material", material), [139, 139])
+            board.register_weights("squares", squares)
+            while board.game_state == GameState.ONGOING:
+                board.make_move(rng.choice(board.generate_moves()))
+                for name, table in (("material", material), ("squares", squares)):
+                    self.assertListEqual(
+                        board.weight_totals(name),
+                        weight_totals(board.boards.bitboards, build_weights(table))
+                    )
+            copy = board.copy()
+            while len(board.history) > 1:
+                board.unmake_move()
+            self.assertListEqual(board.weight_totals("material"), [139, 139])
+            self.assertListEqual(copy.weight_totals("squares"), weight_totals(copy.boards.bitboards, build_weights(squares)))
+
+        board.unregister_weights("squares")
+        self.assertIsNone(board.weight_totals("squares"))
@@ -1,8 +1,15 @@
 """ Move generation unit tests """
 import unittest
-from chess.board import Board
+from chess.board import Board, GameState
+from chess.cache import MoveCache
+from chess.consts import RANK_3
 from chess.moves import Move, MoveType
 from chess.pieces import PieceType
+from chess.sides import Side
+from chess import squares
+from chess import utils
+
+from random import Random
 
 class TestMoveGeneration(unittest.TestCase):
     def test_starting_position(self):
@@ -310,3 +317,248 @@ class TestMoveGeneration(unittest.TestCase):
         }
 
         self.assertSetEqual(moves, expected)
+
+    def test_has_moves(self):
+        # The early-exit probe should agree with full move generation.
+        rng = Random(5318008)
+        for _ in range(50):
+            board = Board()
+            while board.game_state == GameState.ONGOING:
+                self.assertEqual(board.has_moves(), bool(board.generate_moves()))
+                self.assertEqual(board.has_moves(True), bool(board.generate_moves(True)))
+                board.make_move(rng.choice(board.generate_moves()))
+
+    def test_lazy_game_state(self):
+        board = Board.from_fen_string("4k3/8/8/8/8/8/8/4KR2 b - - 0 1")
+        self.assertEqual(board.game_state, GameState.ONGOING)
+
+        board.make_move(Move.from_string("e8f8", MoveType.QUIET))
+        board.skip_move()
+        board.make_move(Move.from_string("f1f8", MoveType.CAPTURE))
+        self.assertEqual(board.game_state, GameState.WHITE_WINS)
+
+        # Unmaking restores the state cached for the previous ply.
+        board.unmake_move()
+        self.assertEqual(board.game_state, GameState.ONGOING)
+
+    def test_packed_moves(self):
+        # Packed moves should round trip and play identically to Move objects.
+        rng = Random(8675309)
+        for _ in range(20):
+            board_a = Board()
+            board_b = Board()
+            while board_a.game_state == GameState.ONGOING:
+                moves = board_a.generate_moves()
+                packed = board_b.generate_moves(packed=True)
+                self.assertListEqual([Move.unpack(m) for m in packed], moves)
+                self.assertListEqual([m.pack() for m in moves], packed)
+
+                idx = rng.randrange(len(moves))
+                board_a.make_move(moves[idx])
+                board_b.make_move(packed[idx])
+                self.assertEqual(board_a.zbr, board_b.zbr)
+                self.assertListEqual(board_a.mailbox, board_b.mailbox)
+
+            while len(board_b.history) > 1:
+                board_a.unmake_move()
+                board_b.unmake_move()
+                self.assertEqual(board_a.zbr, board_b.zbr)
+                self.assertListEqual(board_a.mailbox, board_b.mailbox)
+
+    def test_packed_equality(self):
+        # Move objects and packed moves don't compare equal, so set and dict
+        # lookups can't mix the two forms; unpack packed moves first.
+        for move in Board().generate_moves():
+            self.assertNotEqual(move, move.pack())
+            self.assertNotIn(move.pack(), {move})
+            self.assertIn(Move.unpack(move.pack()), {move})
+            self.assertEqual(hash(Move.unpack(move.pack())), hash(move))
+
+    def test_packed_manual_move(self):
+        board = Board()
+        board.make_move(Move.from_string("e2e4", MoveType.MANUAL).pack())
+        self.assertEqual(Move.unpack(board.history[-1].move).move_type, MoveType.DOUBLE_PAWN)
+        board.unmake_move()
+        self.assertListEqual(board.mailbox, Board().mailbox)
+
+    def test_manual_moves(self):
+        # Manual moves resolve to the same move types as generated moves,
+        # including single pawn pushes and captures.
+        rng = Random(1618)
+        for _ in range(10):
+            board = Board()
+            reference = Board()
+            while board.game_state == GameState.ONGOING:
+                move = rng.choice(reference.generate_moves())
+                reference.make_move(move)
+                if move.move_type in (MoveType.DUCK, MoveType.CASTLE_KINGSIDE, MoveType.CASTLE_QUEENSIDE):
+                    board.make_move(move)
+                else:
+                    board.make_move(Move(MoveType.MANUAL, None, move.from_index, move.to_index, move.promotion))
+                self.assertEqual(board.history[-1].move.move_type, move.move_type)
+                self.assertEqual(board.zbr, reference.zbr)
+
+            while len(board.history) > 1:
+                board.unmake_move()
+            self.assertListEqual(board.mailbox, Board().mailbox)
+
+    def test_staged_moves(self):
+        # Staged generation should produce the same moves, captures first.
+        rng = Random(1123581321)
+        for _ in range(20):
+            board = Board()
+            while board.game_state == GameState.ONGOING:
+                for pseudo in (False, True):
+                    moves = board.generate_moves(pseudo)
+                    staged = list(board.generate_moves_staged(pseudo))
+                    self.assertEqual(len(staged), len(moves))
+                    self.assertSetEqual(set(staged), set(moves))
+
+                    captures = [bool(m.move_type & MoveType.CAPTURE) for m in staged]
+                    self.assertListEqual(captures, sorted(captures, reverse=True))
+                board.make_move(rng.choice(board.generate_moves()))
+
+    def test_staged_king_captures(self):
+        board = Board.from_fen_string("4k3/8/8/1q6/8/8/3p4/1N2R1K1 w - - 0 1")
+        staged = list(board.generate_moves_staged())
+        self.assertEqual(staged[0], Move.from_string("e1e8", MoveType.CAPTURE))
+        self.assertEqual(staged[1], Move.from_string("b1d2", MoveType.CAPTURE))
+        self.assertEqual(staged[2].move_type & MoveType.CAPTURE, 0)
+
+    def test_duck_targets(self):
+        board = Board()
+        board.make_move(Move.from_string("e2e4", MoveType.DOUBLE_PAWN))
+
+        targets = board.duck_targets()
+        moves = board.generate_moves()
+        self.assertEqual(targets.bit_count(), len(moves))
+        self.assertSetEqual(
+            {m.to_index for m in moves},
+            set(utils.get_squares(targets))
+        )
+
+        # Candidates restrict the placements, occupied squares are excluded.
+        candidates = squares.masks[squares.e4] | squares.masks[squares.e5]
+        self.assertEqual(board.duck_targets(candidates), squares.masks[squares.e5])
+
+        board.place_duck(squares.e5)
+        self.assertEqual(board.boards.duck, squares.masks[squares.e5])
+        self.assertEqual(Move.unpack(board.history[-1].move), Move.from_string("@e5"))
+
+    def test_attack_maps(self):
+        board = Board()
+        self.assertEqual(board.attacks_by(Side.WHITE, PieceType.PAWN), RANK_3)
+        self.assertEqual(
+            board.attacks_by(Side.BLACK, PieceType.KNIGHT),
+            squares.masks[squares.a6] | squares.masks[squares.c6] | squares.masks[squares.d7]
+          | squares.masks[squares.e7] | squares.masks[squares.f6] | squares.masks[squares.h6]
+        )
+
+        # Each piece type's attacks should cover the destinations of its
+        # pseudolegal moves that aren't pawn pushes or castling.
+        rng = Random(8)
+        for _ in range(20):
+            moves = board.generate_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+            for side in (Side.WHITE, Side.BLACK):
+                combined = 0
+                for piece_type in board.boards.pieces[side]:
+                    combined |= board.attacks_by(side, piece_type)
+                self.assertEqual(board.attacks(side), combined)
+
+            if board.turn in (Side.WHITE, Side.BLACK):
+                for move in board.generate_moves():
+                    if move.piece == PieceType.PAWN and not move.move_type & MoveType.CAPTURE:
+                        continue
+                    if move.move_type in (MoveType.CASTLE_KINGSIDE, MoveType.CASTLE_QUEENSIDE):
+                        continue
+                    self.assertTrue(board.attacks_by(board.turn, move.piece) & squares.masks[move.to_index])
+
+        # Maps are recalculated once the position changes.
+        board = Board()
+        board.make_move(Move.from_string("e2e4", MoveType.DOUBLE_PAWN))
+        before = board.attacks_by(Side.WHITE, PieceType.BISHOP)
+        board.place_duck(squares.e2)
+        self.assertNotEqual(board.attacks_by(Side.WHITE, PieceType.BISHOP), before)
+        board.unmake_move()
+        self.assertEqual(board.attacks_by(Side.WHITE, PieceType.BISHOP), before)
+
+    def test_move_lists(self):
+        # Moves landing on or passing through the duck, including castles
+        # it blocks, are dropped from the legal list only.
+        positions = {
+            "4k3/8/8/8/8/4@3/4P3/R3K3 w Q - 0 1": {
+                Move.from_string("e2e3", MoveType.QUIET),
+                Move.from_string("e2e4", MoveType.DOUBLE_PAWN),
+            },
+            "4k3/8/8/8/8/8/8/R1@1K3 w Q - 0 1": {
+                Move.from_string("a1c1", MoveType.QUIET),
+                Move.from_string("a1d1", MoveType.QUIET),
+                Move(MoveType.CASTLE_QUEENSIDE, PieceType.KING),
+            },
+        }
+        for fen, blocked in positions.items():
+            board = Board.from_fen_string(fen)
+            pseudo, legal = board.generate_move_lists()
+            self.assertSetEqual(set(pseudo) - set(legal), blocked)
+            self.assertListEqual(board.generate_moves(pseudo=True), pseudo)
+            self.assertListEqual(board.generate_moves(), legal)
+            self.assertListEqual(
+                board.generate_moves(packed=True),
+                [move.pack() for move in legal]
+            )
+
+        # Lists are cached for the ply, and regenerated when the turn changes.
+        self.assertIs(board.generate_move_lists()[1], legal)
+        board.skip_move()
+        self.assertIsNot(board.generate_move_lists()[1], legal)
+
+    def test_move_cache(self):
+        cache = MoveCache(max_size=2)
+        cache.put(1, [1])
+        cache.put(2, [2])
+        self.assertEqual(cache.get(1), [1])
+        # 2 is now the least recently used entry, so it's evicted first.
+        cache.put(3, [3])
+        self.assertNotIn(2, cache)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Cached boards should generate the same moves as uncached ones.
+        rng = Random(31415)
+        board = Board()
+        cached = Board(MoveCache())
+        while board.game_state == GameState.ONGOING:
+            moves = board.generate_moves()
+            self.assertListEqual(cached.generate_moves(), moves)
+            self.assertListEqual(cached.generate_moves(pseudo=True), board.generate_moves(pseudo=True))
+            move = rng.choice(moves)
+            board.make_move(move)
+            cached.make_move(move)
+
+        # Returning to a position reuses its lists.
+        hits = cached.move_cache.hits
+        legal = cached.generate_move_lists()[1]
+        cached.unmake_move()
+        cached.generate_moves()
+        cached.make_move(board.history[-1].move)
+        self.assertIs(cached.generate_move_lists()[1], legal)
+        self.assertGreater(cached.move_cache.hits, hits)
+
+    def test_move_cache_verification(self):
+        cache = MoveCache()
+        cache.put(1, [1], verification=10)
+        self.assertEqual(cache.get(1, verification=10), [1])
+        self.assertEqual(cache.get(1), [1])
+        # A different verification hash means the key collided.
+        self.assertIsNone(cache.get(1, verification=11))
+        self.assertEqual((cache.hits, cache.misses, cache.collisions), (2, 1, 1))
+
+        # Boards with verification enabled reject colliding entries.
+        board = Board(cache)
+        board.enable_verification()
+        cache.put((board.zbr, False, False), [], verification=board.zbr_verify ^ 1)
+        self.assertEqual(len(board.generate_moves()), 20)
+        self.assertEqual(cache.collisions, 2)
@@ -1,10 +1,13 @@
 """ Zobrist hashing unit tests """
 import unittest
-from chess.board import Board
+from chess.board import Board, GameState
 from goose_v3 import Goose
+from chess import attacks, squares, utils
+from chess.sides import next_turn
+from chess.zobrist import zbr_update
 from chess.search.node import *
 from chess.search.algorithms import *
-from random import random
+from random import Random, random
 import time
 
 class TestPerformance(unittest.TestCase):
@@ -28,3 +31,82 @@ class TestPerformance(unittest.TestCase):
         root = Node()
 
         alpha_beta(board, root, 4, Goose.evaluate)
+
+    def test_sliding_attacks(self):
+        # Benchmark table-driven queen attacks against hyperbola quintessence.
+        # Only the ratio is reported, wall-clock timings are too noisy to
+        # assert on.
+        rng = Random(1189998819991197253)
+        positions = [
+            (idx, rng.getrandbits(64) & rng.getrandbits(64) | squares.masks[idx])
+            for idx in (rng.randrange(64) for _ in range(10_000))
+        ]
+
+        start = time.perf_counter()
+        for idx, occupancy in positions:
+            piece = squares.masks[idx]
+            for axis in (
+                utils.get_rank(idx), utils.get_file(idx),
+                utils.get_diagonal(idx), utils.get_antidiagonal(idx)
+            ):
+                utils.hyperbola_quintessence(occupancy, axis, piece)
+        hyperbola_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for idx, occupancy in positions:
+            attacks.queen_attacks(idx, occupancy)
+        table_time = time.perf_counter() - start
+
+        print(f"Hyperbola quintessence: {hyperbola_time:.4f}s, tables: {table_time:.4f}s " \
+              f"({hyperbola_time / table_time:.1f}x)")
+
+    def test_skip_move(self):
+        # Benchmark the null move against a full zbr_update per skip (the
+        # timings are reported, not asserted on)
+        board = Board()
+        iterations = 100_000
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            previous = board.turn
+            board.turn = next_turn(board.turn)
+            board.zbr = zbr_update(board.zbr, (
+                (previous, board.castle_rights, board.en_passant),
+                (board.turn, board.castle_rights, board.en_passant)
+            ))
+        update_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            board.skip_move()
+        skip_time = time.perf_counter() - start
+
+        print(f"zbr_update: {update_time:.4f}s, skip_move: {skip_time:.4f}s " \
+              f"({update_time / skip_time:.1f}x)")
+
+    def test_make_unmake(self):
+        # Benchmark make/unmake of a recorded game (best of 5). This only
+        # reports timings; to measure a change, run it on the trees before
+        # and after it (e.g. from a git worktree of each).
+        rng = Random(3)
+        board = Board()
+        moves = []
+        while board.game_state == GameState.ONGOING and len(moves) < 400:
+            moves.append(rng.choice(board.generate_moves(packed=True)))
+            board.make_move(moves[-1])
+        while len(board.history) > 1:
+            board.unmake_move()
+        fen, zbr = board.to_fen_string(), board.zbr
+
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(100):
+                for move in moves:
+                    board.make_move(move)
+                for _ in moves:
+                    board.unmake_move()
+            timings.append(time.perf_counter() - start)
+            self.assertEqual((board.to_fen_string(), board.zbr), (fen, zbr))
+
+        print(f"make/unmake {len(moves)} plies x 100: {min(timings):.4f}s")
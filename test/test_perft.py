@@ -0,0 +1,36 @@
+""" Perft unit tests """
+import unittest
+from chess.board import Board
+from chess.perft import perft, divide
+
+class TestPerft(unittest.TestCase):
+    def test_starting_position(self):
+        board = Board()
+        self.assertEqual(perft(board, 1), 20)
+        # Every white move is followed by a duck placement on an empty square
+        self.assertEqual(perft(board, 2), 20 * 32)
+        self.assertEqual(perft(board, 3), 12240)
+
+    def test_counting_modes(self):
+        board = Board()
+        expected = perft(board, 3, bulk=False)
+        self.assertEqual(perft(board, 3, bulk=True), expected)
+        self.assertEqual(perft(board, 3, table={}), expected)
+
+    def test_divide(self):
+        board = Board()
+        results = divide(board, 3)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(sum(results.values()), perft(board, 3))
+        self.assertDictEqual(divide(board, 3, processes=2), results)
+
+    def test_state_restored(self):
+        board = Board()
+        board.make_move(board.generate_moves()[0])
+        fen = board.to_fen_string()
+        zbr = board.zbr
+        duck = board.boards.duck
+        perft(board, 3)
+        self.assertEqual(board.to_fen_string(), fen)
+        self.assertEqual(board.zbr, zbr)
+        self.assertEqual(board.boards.duck, duck)
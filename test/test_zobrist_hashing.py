@@ -1,7 +1,16 @@
 """ Zobrist hashing unit tests """
 import unittest
-from chess.board import Board
+from chess.board import Board, GameState, REPETITION_DRAW
 from chess.moves import Move, MoveType
+from chess.sides import Side
+from chess.zobrist import zbr_hash, zbr_update, zbr_verification, PIECE_KEYS, VERIFICATION_EN_PASSANT_KEYS
+from chess.keyfile import KEY_FILE, KEY_SEEDS, read_key_file, write_key_file
+from chess import squares
+
+import os
+import pickle
+import tempfile
+from random import Random
 
 class TestZobristHashing(unittest.TestCase):
     def test_make_move(self):
@@ -85,6 +94,119 @@ class TestZobristHashing(unittest.TestCase):
 
         self.assertEqual(board_a.zbr, board_b.zbr)
 
+    def test_incremental_hash(self):
+        # The hash kept by make_move matches one calculated from scratch
+        # (including the duck) and zbr_update, for every move type.
+        rng = Random(7)
+        played = set()
+        for _ in range(20):
+            board = Board()
+            while board.game_state == GameState.ONGOING:
+                move = rng.choice(board.generate_moves())
+                before = (board.zbr, board.turn, board.castle_rights, board.en_passant)
+                board.make_move(move)
+                played.add(move.move_type)
+
+                self.assertEqual(board.zbr, zbr_hash(board))
+                zbr, turn, castle_rights, en_passant = before
+                self.assertEqual(board.zbr, zbr_update(
+                    zbr,
+                    ((turn, castle_rights, en_passant), (board.turn, board.castle_rights, board.en_passant)),
+                    turn,
+                    move,
+                    board.history.get_capture(len(board.history) - 1)
+                ))
+        self.assertTrue({MoveType.CASTLE_KINGSIDE, MoveType.PROMOTION, MoveType.CAPTURE}.issubset(played))
+
+    def test_parsed_duck_moves(self):
+        # Duck moves parsed from text (as play.py builds them) have no from
+        # index, so the duck's previous square is taken from the board.
+        moves = ("e2e4", "@e5", "e7e6", "@d4", "g1f3", "@d5", "b8c6", "@e3")
+        board = Board()
+        board.enable_verification()
+        for text in moves:
+            move_type = MoveType.DUCK if text.startswith("@") else MoveType.MANUAL
+            board.make_move(Move.from_string(text, move_type))
+            self.assertEqual(board.zbr, zbr_hash(board))
+            self.assertEqual(board.zbr_verify, zbr_verification(board))
+
+        # Verification enabled after the moves were played
+        late = Board()
+        for text in moves:
+            move_type = MoveType.DUCK if text.startswith("@") else MoveType.MANUAL
+            late.make_move(Move.from_string(text, move_type))
+        late.enable_verification()
+
+        while len(board.history) > 1:
+            board.unmake_move()
+            late.unmake_move()
+            self.assertEqual(board.zbr, zbr_hash(board))
+            self.assertEqual(board.zbr_verify, zbr_verification(board))
+            self.assertEqual(late.zbr_verify, board.zbr_verify)
+
+    def test_verification(self):
+        rng = Random(8)
+        board = Board()
+        self.assertIsNone(board.zbr_verify)
+        for _ in range(30):
+            board.make_move(rng.choice(board.generate_moves()))
+        board.skip_move()
+
+        # Enabling verification covers moves already played.
+        board.enable_verification()
+        hashes = [(board.zbr, board.zbr_verify)]
+        while board.game_state == GameState.ONGOING:
+            board.make_move(rng.choice(board.generate_moves()))
+            self.assertEqual(board.zbr_verify, zbr_verification(board))
+            self.assertNotEqual(board.zbr_verify, board.zbr)
+            hashes.append((board.zbr, board.zbr_verify))
+
+        copy = board.copy()
+        self.assertEqual(copy.zbr_verify, board.zbr_verify)
+        board.pickled_plies = 4
+        self.assertEqual(pickle.loads(pickle.dumps(board)).zbr_verify, board.zbr_verify)
+
+        board.skip_move()
+        self.assertEqual(board.zbr_verify, zbr_verification(board))
+        board.unskip_move()
+        while len(board.history) > 1:
+            if hashes:
+                self.assertEqual((board.zbr, board.zbr_verify), hashes.pop())
+            board.unmake_move()
+            self.assertEqual(board.zbr_verify, zbr_verification(board))
+
+        board.disable_verification()
+        board.make_move(board.generate_moves()[0])
+        self.assertIsNone(board.zbr_verify)
+
+    def test_key_file(self):
+        with open(KEY_FILE, "rb") as file:
+            shipped = file.read()
+        keys, verification_keys = read_key_file()
+        self.assertEqual(keys[:64], PIECE_KEYS[64:128])
+        self.assertEqual(verification_keys[-64:], VERIFICATION_EN_PASSANT_KEYS[1:])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "zobrist.keys")
+            # The shipped file is reproducible from its seeds.
+            write_key_file(path, KEY_SEEDS)
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), shipped)
+
+            # Corrupt magic, version and keys
+            for offset in (0, 8, len(shipped) - 1):
+                corrupted = bytearray(shipped)
+                corrupted[offset] ^= 1
+                with open(path, "wb") as file:
+                    file.write(corrupted)
+                with self.assertRaises(ValueError):
+                    read_key_file(path)
+
+            with open(path, "wb") as file:
+                file.write(shipped[:-8])
+            with self.assertRaises(ValueError):
+                read_key_file(path)
+
     def test_castle_rights(self):
         # All rights
         board_a = Board.from_fen_string("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
@@ -92,3 +214,49 @@ class TestZobristHashing(unittest.TestCase):
         board_b = Board.from_fen_string("r3k2r/8/8/8/8/8/8/R3K2R w - - 0 1")
 
         self.assertNotEqual(board_a.zbr, board_b.zbr)
+
+    def test_unskip_move(self):
+        board = Board()
+        board.make_move(Move.from_string("e2e4", MoveType.DOUBLE_PAWN))
+        turn, h = board.turn, board.zbr
+
+        board.skip_move()
+        self.assertNotEqual(board.zbr, h)
+        board.unskip_move()
+        self.assertEqual((board.turn, board.zbr), (turn, h))
+
+        # Skipping to a side matches the same number of single skips.
+        board.skip_move(Side.WHITE)
+        self.assertEqual(board.turn, Side.WHITE)
+        target = board.zbr
+        board.skip_move(Side.WHITE)
+        self.assertEqual(board.zbr, target)
+        for _ in range(3):
+            board.unskip_move()
+        self.assertEqual((board.turn, board.zbr), (turn, h))
+
+    def test_repetitions(self):
+        board = Board()
+        # Knights and the duck shuffle back and forth.
+        def play_cycle():
+            for move, duck in (("g1f3", squares.a4), ("g8f6", squares.a5), ("f3g1", squares.a4), ("f6g8", squares.a5)):
+                board.make_move(Move.from_string(move, MoveType.QUIET))
+                board.make_move(board.duck_move(duck))
+
+        play_cycle()
+        self.assertEqual(board.repetition_count(), 1)
+        play_cycle()
+        self.assertEqual(board.repetition_count(), 2)
+        self.assertEqual(board.game_state, GameState.ONGOING)
+        play_cycle()
+        self.assertEqual(board.repetition_count(), REPETITION_DRAW)
+        self.assertEqual(board.game_state, GameState.STALEMATE)
+
+        # Counts follow unmade moves, and copies keep their own.
+        copy = board.copy()
+        for _ in range(8):
+            board.unmake_move()
+        self.assertEqual(board.repetition_count(), 2)
+        self.assertEqual(board.game_state, GameState.ONGOING)
+        self.assertEqual(copy.repetition_count(), REPETITION_DRAW)
+        self.assertEqual(board.copy(history=False).repetition_count(), 1)